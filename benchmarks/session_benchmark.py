@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Measures the request throughput of :mod:`gdpc.interface` with and without keep-alive sessions.
+
+Runs against :class:`gdpc.stand_in_server.StandInServer`, a local stand-in for the GDMC HTTP
+interface, so no Minecraft server is needed. Usage:
+
+    python benchmarks/session_benchmark.py [--requests N] [--blocks N]
+"""
+
+
+import argparse
+import time
+
+from gdpc import Block, interface
+from gdpc.stand_in_server import StandInServer
+
+
+def _measure(requestCount: int, blockCount: int, host: str, session) -> float:
+    blocks = [((x, 0, 0), Block("stone")) for x in range(blockCount)]
+    start = time.perf_counter()
+    for _ in range(requestCount):
+        interface.placeBlocks(blocks, host=host, session=session)
+    return requestCount / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    parser.add_argument("--blocks",   type=int, default=16,   help="blocks per request")
+    args = parser.parse_args()
+
+    with StandInServer() as server:
+        pool = interface.SessionPool()
+        before = _measure(args.requests, args.blocks, server.host, None)
+        after  = _measure(args.requests, args.blocks, server.host, pool.get(server.host))
+        pool.close()
+
+    print(f"New connection per request: {before:8.1f} requests/s")
+    print(f"Keep-alive session:         {after:8.1f} requests/s")
+    print(f"Speedup:                    {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ For example, you can use :python:`from gdpc import Editor` instead of :python:`f
 The following classes are re-exported:
 
 - :class:`.Editor` (from module :mod:`.gdpc.editor`)
+- :class:`.AsyncEditor` (from module :mod:`.gdpc.async_editor`)
 - :class:`.WorldSlice` (from module :mod:`.gdpc.world_slice`)
 - :class:`.Block` (from module :mod:`.gdpc.block`)
 - :class:`.Transform` (from module :mod:`.gdpc.transform`)
@@ -70,3 +71,4 @@ from .transform import Transform
 from .block import Block
 from .world_slice import WorldSlice
 from .editor import Editor
+from .async_editor import AsyncEditor
@@ -0,0 +1,537 @@
+"""Provides the :class:`.AsyncEditor` class, an asyncio interface to the functionality of
+:class:`.Editor`.
+
+The GDMC HTTP requests themselves are still made with the blocking functions of
+:mod:`.interface`: :mod:`.async_interface` runs them in a thread pool (see
+:func:`.async_interface.runInExecutor`). The advantage of :class:`.AsyncEditor` is that multiple
+requests can be in flight while the event loop continues, not that the requests are
+asyncio-native."""
+
+
+from __future__ import annotations
+
+from typing import Dict, Sequence, Union, Optional, List, Iterable, Generator, Tuple
+from numbers import Integral
+from contextlib import contextmanager
+from copy import copy, deepcopy
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import random
+import logging
+
+import numpy as np
+from glm import ivec3
+import requests
+
+from .vector_tools import Vec3iLike, Rect, Box
+from .transform import Transform, TransformLike, toTransform
+from .block import Block, transformedBlockOrPalette
+from . import interface
+from . import async_interface
+from .world_slice import WorldSlice
+from .metrics import MetricsRegistry
+from .editor import _batchedReadRegions
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEditor:
+    """Provides awaitable high-level functions to interact with the Minecraft world through the GDMC
+    HTTP interface.
+
+    This is the asyncio counterpart of :class:`.Editor`. Block placements are always buffered.
+    When the buffer is full (:attr:`.bufferLimit`), it is flushed in the background while the
+    caller continues, so block writes, block reads and world slice loads can all be in flight at
+    the same time. At most :attr:`.maxConcurrentRequests` requests are in flight at once; once
+    that limit is reached, further requests wait until one finishes.
+
+    An ``AsyncEditor`` must be used from a single event loop. Use it as an async context manager,
+    or call :meth:`.close` when done, to make sure all buffered blocks are placed:
+
+    .. code-block:: python
+
+        async with AsyncEditor() as editor:
+            await editor.placeBlock((0, 80, 0), Block("stone"))
+    """
+
+    def __init__(
+        self,
+        transformLike: Optional[TransformLike] = None,
+        dimension: Optional[str] = None,
+        bufferLimit           = 1024,
+        maxConcurrentRequests = 4,
+        retries               = 4,
+        timeout               = None,
+        deadline              = None,
+        host                  = interface.DEFAULT_HOST,
+        connectionPoolSize    = interface.DEFAULT_POOL_SIZE,
+        metrics               = None,
+    ) -> None:
+        """Constructs an AsyncEditor instance with the specified transform and settings.
+
+        For more information on each setting, see the documentation for the corresponding
+        property."""
+        self._retries  = retries
+        self._timeout  = timeout
+        self._deadline = deadline
+        self._host     = host
+
+        self._transform = Transform() if transformLike is None else toTransform(transformLike)
+
+        self._dimension = dimension
+
+        self._bufferLimit = bufferLimit
+        self._buffer: Dict[ivec3,Block] = {}
+        self._commandBuffer: List[str] = []
+
+        self._maxConcurrentRequests = maxConcurrentRequests
+        self._executor    = ThreadPoolExecutor(maxConcurrentRequests)
+        self._sessionPool = interface.SessionPool(max(connectionPoolSize, maxConcurrentRequests))
+        self._metrics = MetricsRegistry() if metrics is None else metrics
+        # asyncio primitives must be created inside the event loop that uses them.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self._doBlockUpdates = True
+        self._spawnDrops     = False
+
+        # Buffers that are being flushed, together with futures that are done when their flush is.
+        # Reads check these, so that blocks are visible while their placement request is in flight
+        # or waiting for a free request slot.
+        self._pendingFlushes: List[Tuple[asyncio.Future, Dict[ivec3,Block]]] = []
+        self._flushError: Optional[BaseException] = None
+
+        self._worldSlice: Optional[WorldSlice] = None
+
+
+    async def __aenter__(self) -> AsyncEditor:
+        return self
+
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+
+    @property
+    def transform(self) -> Transform:
+        """This editor's local coordinate transform (see :attr:`.Editor.transform`)."""
+        return self._transform
+
+    @transform.setter
+    def transform(self, value: TransformLike) -> None:
+        self._transform = toTransform(value)
+
+    @property
+    def dimension(self) -> Optional[str]:
+        """The Minecraft dimension this editor interacts with (see :attr:`.Editor.dimension`)."""
+        return self._dimension
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """The registry in which this editor records metrics about its requests (see
+        :attr:`.Editor.metrics`)."""
+        return self._metrics
+
+    @property
+    def host(self) -> str:
+        """The address (hostname+port) of the GDMC HTTP interface to use."""
+        return self._host
+
+    @property
+    def bufferLimit(self) -> int:
+        """Size of the block buffer."""
+        return self._bufferLimit
+
+    @bufferLimit.setter
+    def bufferLimit(self, value: int) -> None:
+        self._bufferLimit = value
+
+    @property
+    def maxConcurrentRequests(self) -> int:
+        """The maximum amount of requests to the GDMC HTTP interface that are in flight at once."""
+        return self._maxConcurrentRequests
+
+    @property
+    def doBlockUpdates(self) -> bool:
+        """Whether placed blocks receive a block update (see :attr:`.Editor.doBlockUpdates`).\n
+        The setting is read when the buffer is flushed, so changes also apply to blocks that are
+        already buffered. To change it only for blocks placed after the change, call
+        :meth:`.flushBuffer` first."""
+        return self._doBlockUpdates
+
+    @doBlockUpdates.setter
+    def doBlockUpdates(self, value: bool) -> None:
+        self._doBlockUpdates = value
+
+    @property
+    def spawnDrops(self) -> bool:
+        """Whether overwritten blocks drop items (see :attr:`.Editor.spawnDrops`).\n
+        The setting is read when the buffer is flushed, so changes also apply to blocks that are
+        already buffered. To change it only for blocks placed after the change, call
+        :meth:`.flushBuffer` first."""
+        return self._spawnDrops
+
+    @spawnDrops.setter
+    def spawnDrops(self, value: bool) -> None:
+        self._spawnDrops = value
+
+    @property
+    def retries(self) -> int:
+        """The amount of retries for requests to the GDMC HTTP interface."""
+        return self._retries
+
+    @retries.setter
+    def retries(self, value: int) -> None:
+        self._retries = value
+
+    @property
+    def timeout(self) -> float:
+        """The timeout for requests to the GDMC HTTP interface (see :attr:`.Editor.timeout`)."""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value) -> None:
+        self._timeout = value
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """The maximum total time for a request, including retries (see :attr:`.Editor.deadline`)."""
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, value: Optional[float]) -> None:
+        self._deadline = value
+
+    @property
+    def worldSlice(self) -> Optional[WorldSlice]:
+        """The cached WorldSlice (see :meth:`.loadWorldSlice`)."""
+        return self._worldSlice
+
+
+    @property
+    def _session(self) -> requests.Session:
+        """The keep-alive session for the current :attr:`.host`."""
+        return self._sessionPool.get(self._host)
+
+
+    def _getSemaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._maxConcurrentRequests)
+        return self._semaphore
+
+
+    async def _request(self, function, *args, **kwargs):
+        """Awaits ``function`` from :mod:`.async_interface`, respecting the in-flight request limit."""
+        async with self._getSemaphore():
+            return await function(
+                *args, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host,
+                session=self._session, metrics=self._metrics, executor=self._executor, **kwargs
+            )
+
+
+    async def runCommand(self, command: str, position: Optional[Vec3iLike]=None, syncWithBuffer=False) -> None:
+        """Executes one or multiple Minecraft commands (separated by newlines).\n
+        See :meth:`.Editor.runCommand`."""
+        if position is not None:
+            position = self.transform * position
+        await self.runCommandGlobal(command, position, syncWithBuffer)
+
+
+    async def runCommandGlobal(self, command: str, position: Optional[Vec3iLike]=None, syncWithBuffer=False) -> None:
+        """Executes one or multiple Minecraft commands (separated by newlines), ignoring :attr:`.transform`.\n
+        See :meth:`.Editor.runCommandGlobal`."""
+        if position is not None:
+            command = f"execute positioned {' '.join(str(c) for c in position)} run {command}"
+
+        if syncWithBuffer:
+            self._commandBuffer.append(command)
+            return
+        result = await self._request(async_interface.runCommand, command, dimension=self.dimension)
+        if not result[0][0]:
+            logger.error("Server returned error upon running command:\n  %s", result[0][1])
+
+
+    async def getBuildArea(self) -> Box:
+        """Returns the build area that was specified by ``/setbuildarea`` in-game.\n
+        The build area is always in **global coordinates**; :attr:`.transform` is ignored."""
+        return await self._request(async_interface.getBuildArea)
+
+
+    async def getBlock(self, position: Vec3iLike) -> Block:
+        """Returns the block at ``position``.\n
+        ``position`` is interpreted as local to the coordinate system defined by :attr:`.transform`.
+        The returned block's orientation is also from the perspective of :attr:`.transform`.\n
+        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``."""
+        block = await self.getBlockGlobal(self.transform * position)
+        invTransform = ~self.transform
+        return block.transformed(invTransform.rotation, invTransform.flip)
+
+
+    async def getBlockGlobal(self, position: Vec3iLike) -> Block:
+        """Returns the block at ``position``, ignoring :attr:`.transform`.\n
+        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``."""
+        _position = ivec3(*position)
+
+        block = self._localBlockGlobal(_position)
+        if block is not None:
+            return copy(block)
+
+        blocks = await self._request(async_interface.getBlocks, _position, dimension=self.dimension, includeState=True, includeData=True)
+        return blocks[0][1]
+
+
+    def _localBlockGlobal(self, position: ivec3) -> Optional[Block]:
+        """Returns the block at global ``position`` according to the buffer, the pending flushes
+        and the world slice, or None if it is not known locally. The block must not be modified."""
+        block = self._buffer.get(position)
+        if block is not None:
+            return block
+        for _, pendingBuffer in reversed(self._pendingFlushes):
+            block = pendingBuffer.get(position)
+            if block is not None:
+                return block
+        if self._worldSlice is not None and self._worldSlice.box.contains(position):
+            return self._worldSlice.getBlockGlobal(position)
+        return None
+
+
+    async def _getBlockIdsGlobal(self, positions: List[ivec3]) -> List[str]:
+        """Returns the ids of the blocks at the global ``positions``.\n
+        Blocks are taken from the buffer, the pending flushes and the world slice where possible.
+        All other blocks are retrieved with as few requests as possible, like
+        :class:`.Editor` does for replace filters. These requests run concurrently."""
+        ids: List[str] = [""] * len(positions)
+        unresolved: List[int] = []
+        for i, position in enumerate(positions):
+            block = self._localBlockGlobal(position)
+            if block is None:
+                unresolved.append(i)
+            else:
+                ids[i] = block.id
+        if not unresolved:
+            return ids
+
+        unresolvedPositions = np.array([tuple(positions[i]) for i in unresolved], dtype=np.int64)
+
+        async def readRegion(region: np.ndarray) -> None:
+            regionPositions = unresolvedPositions[region]
+            begin = regionPositions.min(axis=0)
+            size  = regionPositions.max(axis=0) - begin + 1
+            readPositions, readPalette, readIndices = await self._request(
+                async_interface.getBlocksAsArrays, begin.tolist(), size.tolist(), dimension=self.dimension,
+                includeState=False, includeData=False
+            )
+            # Positions the server returns nothing for (e.g. outside the world) are void air.
+            readIds = [block.id for block in readPalette] + ["minecraft:void_air"]
+            volume = np.full(tuple(size.tolist()), len(readIds) - 1, dtype=np.intp)
+            volume[tuple((readPositions - begin).T)] = readIndices
+            for i, index in zip(region.tolist(), volume[tuple((regionPositions - begin).T)].tolist()):
+                ids[unresolved[i]] = readIds[index]
+
+        await asyncio.gather(*(readRegion(region) for region in _batchedReadRegions(unresolvedPositions)))
+        return ids
+
+
+    async def getBiome(self, position: Vec3iLike) -> str:
+        """Returns the biome at ``position``.\n
+        ``position`` is interpreted as local to the coordinate system defined by :attr:`.transform`.\n
+        If the given coordinates are invalid, returns an empty string."""
+        return await self.getBiomeGlobal(self.transform * position)
+
+
+    async def getBiomeGlobal(self, position: Vec3iLike) -> str:
+        """Returns the biome at ``position``, ignoring :attr:`.transform`.\n
+        If the given coordinates are invalid, returns an empty string."""
+        if self._worldSlice is not None and self._worldSlice.box.contains(position):
+            return self._worldSlice.getBiomeGlobal(position)
+        biomes = await self._request(async_interface.getBiomes, position, dimension=self.dimension)
+        return biomes[0][1]
+
+
+    async def placeBlock(
+        self,
+        position: Union[Vec3iLike, Iterable[Vec3iLike]],
+        block:    Union[Block, Sequence[Block]],
+        replace:  Optional[Union[str, List[str]]] = None
+    ) -> None:
+        """Places ``block`` at ``position``.\n
+        ``position`` is interpreted as local to the coordinate system defined by :attr:`.transform`.\n
+        If ``position`` is iterable (e.g. a list), ``block`` is placed at all positions.\n
+        If ``block`` is a sequence (e.g. a list), blocks are sampled randomly.\n
+        The blocks are buffered; this only waits for the network if the buffer is full and
+        :attr:`.maxConcurrentRequests` requests are already in flight."""
+        globalPosition = self.transform * position if hasattr(position, "__len__") and len(position) == 3 and isinstance(position[0], Integral) else (self.transform * pos for pos in position)
+        globalBlock = transformedBlockOrPalette(block, self.transform.rotation, self.transform.flip)
+        await self.placeBlockGlobal(globalPosition, globalBlock, replace)
+
+
+    async def placeBlockGlobal(
+        self,
+        position: Union[Vec3iLike, Iterable[Vec3iLike]],
+        block:    Union[Block, Sequence[Block]],
+        replace:  Optional[Union[str, Iterable[str]]] = None
+    ) -> None:
+        """Places ``block`` at ``position``, ignoring :attr:`.transform`.\n
+        See :meth:`.placeBlock`."""
+        if hasattr(position, "__len__") and len(position) == 3 and isinstance(position[0], Integral):
+            positions = [ivec3(*position)]
+        else:
+            positions = [ivec3(*pos) for pos in position]
+
+        if replace is not None:
+            replace = {replace} if isinstance(replace, str) else set(replace)
+            currentIds = await self._getBlockIdsGlobal(positions)
+            positions = [pos for pos, currentId in zip(positions, currentIds) if currentId in replace]
+
+        for pos in positions:
+            chosenBlock = block if isinstance(block, Block) else random.choice(block)
+            if not chosenBlock.id:
+                continue
+            if len(self._buffer) >= self.bufferLimit:
+                await self.flushBuffer()
+            self._buffer.pop(pos, None) # Ensure the new block is added at the *end* of the buffer.
+            self._buffer[pos] = chosenBlock
+
+
+    async def flushBuffer(self) -> None:
+        """Starts flushing the block placement buffer in the background.\n
+        If :attr:`.maxConcurrentRequests` requests are already in flight, first waits until one of
+        them finishes. Meanwhile, the flushed blocks are already pending: they are visible to reads
+        and ordered before later flushes. If this is cancelled while waiting, they are put back into
+        the buffer. Use :meth:`.awaitBufferFlushes` to wait until the blocks are placed."""
+        if not self._buffer and not self._commandBuffer:
+            return
+
+        blockBuffer   = self._buffer
+        commandBuffer = self._commandBuffer
+        self._buffer        = {}
+        self._commandBuffer = []
+
+        # Writes to the same position must land in submission order.
+        predecessors = [
+            done for done, pendingBuffer in self._pendingFlushes
+            if commandBuffer or not pendingBuffer.keys().isdisjoint(blockBuffer.keys())
+        ]
+        doBlockUpdates = self._doBlockUpdates
+        spawnDrops     = self._spawnDrops
+
+        # The flush is registered before waiting for a request slot, so that reads and later
+        # flushes already take it into account.
+        done = asyncio.get_running_loop().create_future()
+        entry = (done, blockBuffer)
+        self._pendingFlushes.append(entry)
+
+        semaphore = self._getSemaphore()
+        try:
+            await semaphore.acquire()
+        except asyncio.CancelledError:
+            # Put the blocks back into the buffer, except the ones that later writes replaced.
+            index = self._pendingFlushes.index(entry)
+            later = [pendingBuffer for _, pendingBuffer in self._pendingFlushes[index + 1:]] + [self._buffer]
+            restored = {position: block for position, block in blockBuffer.items() if all(position not in pendingBuffer for pendingBuffer in later)}
+            restored.update(self._buffer)
+            self._buffer        = restored
+            self._commandBuffer = commandBuffer + self._commandBuffer
+            del self._pendingFlushes[index]
+            done.cancel()
+            raise
+
+        async def flush() -> None:
+            try:
+                if predecessors:
+                    await asyncio.wait(predecessors)
+                if blockBuffer:
+                    response = await async_interface.placeBlocks(
+                        list(blockBuffer.items()), dimension=self.dimension,
+                        doBlockUpdates=doBlockUpdates, spawnDrops=spawnDrops,
+                        retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host,
+                        session=self._session, metrics=self._metrics, executor=self._executor
+                    )
+                    placedBlocks = []
+                    for item, entry in zip(blockBuffer.items(), response):
+                        if entry[0]:
+                            placedBlocks.append(item)
+                        else:
+                            logger.error("Server returned error upon placing buffered block:\n  %s", entry[1])
+                    # Only confirmed blocks are written to the world slice; until then, reads use
+                    # the pending flush's buffer.
+                    if self._worldSlice is not None:
+                        box = self._worldSlice.box
+                        self._worldSlice.setBlocksGlobal((position, block) for position, block in placedBlocks if box.contains(position))
+                if commandBuffer:
+                    response = await async_interface.runCommand(
+                        "\n".join(commandBuffer), dimension=self.dimension,
+                        retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host,
+                        session=self._session, metrics=self._metrics, executor=self._executor
+                    )
+                    for entry in response:
+                        if not entry[0]:
+                            logger.error("Server returned error upon running buffered command:\n  %s", entry[1])
+            finally:
+                semaphore.release()
+
+        task = asyncio.ensure_future(flush())
+
+        def onDone(_) -> None:
+            self._pendingFlushes.remove(entry)
+            if not task.cancelled() and task.exception() is not None and self._flushError is None:
+                self._flushError = task.exception()
+            done.set_result(None)
+
+        task.add_done_callback(onDone)
+
+
+    async def awaitBufferFlushes(self) -> None:
+        """Waits until all started buffer flushes are done.\n
+        Raises the first exception that occurred in any buffer flush since the last call."""
+        flushes = [done for done, _ in self._pendingFlushes]
+        if flushes:
+            await asyncio.wait(flushes)
+        error, self._flushError = self._flushError, None
+        if error is not None:
+            raise error
+
+
+    async def loadWorldSlice(self, rect: Optional[Rect]=None, heightmapTypes: Optional[Iterable[str]] = None, cache=False, lazy=False, decodeWorkers: Optional[int] = None) -> WorldSlice:
+        """Loads the world slice for the given XZ-rectangle without blocking the event loop.\n
+        See :meth:`.Editor.loadWorldSlice`."""
+        if rect is None:
+            rect = (await self.getBuildArea()).toRect()
+        async with self._getSemaphore():
+            worldSlice = await async_interface.runInExecutor(
+                self._executor, WorldSlice, rect, dimension=self.dimension,
+                heightmapTypes=heightmapTypes, retries=self.retries, timeout=self.timeout,
+                deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics, lazy=lazy, decodeWorkers=decodeWorkers
+            )
+        if cache:
+            self._worldSlice = worldSlice
+        return worldSlice
+
+
+    async def getMinecraftVersion(self) -> str:
+        """Returns the Minecraft version as a string."""
+        return await self._request(async_interface.getVersion)
+
+
+    async def close(self) -> None:
+        """Flushes the buffer, waits for all buffer flushes and releases this editor's threads and
+        connections."""
+        try:
+            await self.flushBuffer()
+            await self.awaitBufferFlushes()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._sessionPool.close()
+
+
+    @contextmanager
+    def pushTransform(self, transformLike: Optional[TransformLike] = None) -> Generator[None, None, None]:
+        """Creates a context that reverts all changes to :attr:`.transform` on exit.
+        See :meth:`.Editor.pushTransform`."""
+        originalTransform = deepcopy(self.transform)
+        if transformLike is not None:
+            self.transform @= toTransform(transformLike)
+        try:
+            yield
+        finally:
+            self.transform = originalTransform
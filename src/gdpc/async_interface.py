@@ -0,0 +1,97 @@
+"""Provides awaitable wrappers for the endpoints of the GDMC HTTP interface.
+
+Each function in this module runs its counterpart from :mod:`.interface` on a worker thread, so the
+event loop stays free while the request is in flight. All arguments are passed through unchanged,
+except for ``executor``: the :class:`concurrent.futures.Executor` to run the request on. If it is
+``None``, the event loop's default executor is used.
+
+Like :mod:`.interface`, these functions are quite low-level. It is recommended to use the
+higher-level :class:`.async_editor.AsyncEditor` class instead.
+"""
+
+
+from typing import Any, Callable, List, Optional, Tuple, TypeVar, Union
+from concurrent.futures import Executor
+from functools import partial
+import asyncio
+
+import numpy as np
+from glm import ivec3
+
+from .vector_tools import Box
+from .block import Block
+from . import interface
+
+
+T = TypeVar("T")
+
+
+async def runInExecutor(executor: Optional[Executor], function: Callable[..., T], *args, **kwargs) -> T:
+    """Runs ``function(*args, **kwargs)`` on ``executor`` and awaits the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(function, *args, **kwargs))
+
+
+async def getBlocks(*args, executor: Optional[Executor] = None, **kwargs) -> List[Tuple[ivec3, Block]]:
+    """Awaitable version of :func:`.interface.getBlocks`."""
+    return await runInExecutor(executor, interface.getBlocks, *args, **kwargs)
+
+
+async def getBiomes(*args, executor: Optional[Executor] = None, **kwargs) -> List[Tuple[ivec3, str]]:
+    """Awaitable version of :func:`.interface.getBiomes`."""
+    return await runInExecutor(executor, interface.getBiomes, *args, **kwargs)
+
+
+async def getBlocksAsArrays(*args, executor: Optional[Executor] = None, **kwargs) -> Tuple[np.ndarray, List[Block], np.ndarray]:
+    """Awaitable version of :func:`.interface.getBlocksAsArrays`."""
+    return await runInExecutor(executor, interface.getBlocksAsArrays, *args, **kwargs)
+
+
+async def getBiomesAsArrays(*args, executor: Optional[Executor] = None, **kwargs) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Awaitable version of :func:`.interface.getBiomesAsArrays`."""
+    return await runInExecutor(executor, interface.getBiomesAsArrays, *args, **kwargs)
+
+
+async def placeBlocks(*args, executor: Optional[Executor] = None, **kwargs) -> List[Tuple[bool, Union[int, str]]]:
+    """Awaitable version of :func:`.interface.placeBlocks`."""
+    return await runInExecutor(executor, interface.placeBlocks, *args, **kwargs)
+
+
+async def runCommand(*args, executor: Optional[Executor] = None, **kwargs) -> List[Tuple[bool, Optional[str]]]:
+    """Awaitable version of :func:`.interface.runCommand`."""
+    return await runInExecutor(executor, interface.runCommand, *args, **kwargs)
+
+
+async def getBuildArea(*args, executor: Optional[Executor] = None, **kwargs) -> Box:
+    """Awaitable version of :func:`.interface.getBuildArea`."""
+    return await runInExecutor(executor, interface.getBuildArea, *args, **kwargs)
+
+
+async def getChunks(*args, executor: Optional[Executor] = None, **kwargs) -> Union[str, bytes]:
+    """Awaitable version of :func:`.interface.getChunks`."""
+    return await runInExecutor(executor, interface.getChunks, *args, **kwargs)
+
+
+async def placeStructure(*args, executor: Optional[Executor] = None, **kwargs) -> None:
+    """Awaitable version of :func:`.interface.placeStructure`."""
+    return await runInExecutor(executor, interface.placeStructure, *args, **kwargs)
+
+
+async def getStructure(*args, executor: Optional[Executor] = None, **kwargs) -> bytes:
+    """Awaitable version of :func:`.interface.getStructure`."""
+    return await runInExecutor(executor, interface.getStructure, *args, **kwargs)
+
+
+async def getEntities(*args, executor: Optional[Executor] = None, **kwargs) -> Any:
+    """Awaitable version of :func:`.interface.getEntities`."""
+    return await runInExecutor(executor, interface.getEntities, *args, **kwargs)
+
+
+async def getPlayers(*args, executor: Optional[Executor] = None, **kwargs) -> Any:
+    """Awaitable version of :func:`.interface.getPlayers`."""
+    return await runInExecutor(executor, interface.getPlayers, *args, **kwargs)
+
+
+async def getVersion(*args, executor: Optional[Executor] = None, **kwargs) -> str:
+    """Awaitable version of :func:`.interface.getVersion`."""
+    return await runInExecutor(executor, interface.getVersion, *args, **kwargs)
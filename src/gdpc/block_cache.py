@@ -0,0 +1,219 @@
+"""Provides :class:`.BlockCache`, the block cache used by :class:`.Editor`."""
+
+
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from glm import ivec3
+
+from .block import Block
+
+
+ENTRY_BYTES = 200
+"""Estimated memory use in bytes of a cache entry, excluding the block's NBT data.\n
+Blocks are usually shared between many positions, so their own size is not included."""
+
+_EVICTION_SLACK = 64
+"""When a cache exceeds a limit, it evicts until it is 1/_EVICTION_SLACK below that limit"""
+
+
+class BlockCache:
+    """A cache of blocks by position, with CLOCK (second-chance) eviction.
+
+    Each cached unit has a reference bit, which is set when one of its blocks is retrieved. When
+    the cache is full, a "clock hand" sweeps over the units: units with a set reference bit get a
+    second chance and have their bit cleared, and the first unit without one is evicted. This
+    approximates least-recently-used eviction, but a lookup only needs to set a bit.
+
+    The cache is limited to ``maxSize`` blocks (unless it is 0) and to an estimated ``maxBytes``
+    bytes of memory (unless it is ``None``).
+
+    If ``sectionGranularity`` is True, the cached units are 16x16x16 chunk sections instead of
+    single blocks: a retrieval marks the whole section as recently used, and eviction removes all
+    cached blocks of a section at once. This suits access patterns with spatial locality, such as
+    scanning a build area.
+    """
+
+    def __init__(self, maxSize = 8192, maxBytes: Optional[int] = None, sectionGranularity = False) -> None:
+        """Constructs an empty cache with the given limits."""
+        self._maxSize = maxSize
+        self._maxBytes = maxBytes
+        self._sectionGranularity = sectionGranularity
+
+        self._entries: Dict[ivec3, Tuple[Block, int]] = {} # position -> (block, slot)
+        self._slotUnits: List[Optional[Hashable]] = [] # The unit of each slot, or None if free
+        self._referenced = bytearray()
+        self._freeSlots: List[int] = []
+        self._unitSlots: Dict[Hashable, int] = {}
+        self._sectionPositions: Dict[Hashable, Set[ivec3]] = {}
+        self._hand = 0
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __repr__(self) -> str:
+        return f"BlockCache(maxSize={self._maxSize}, maxBytes={self._maxBytes}, sectionGranularity={self._sectionGranularity})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, position: ivec3) -> bool:
+        return position in self._entries
+
+    @property
+    def maxSize(self) -> int:
+        """Maximum amount of cached blocks, or 0 for no limit."""
+        return self._maxSize
+
+    @maxSize.setter
+    def maxSize(self, value: int) -> None:
+        self._maxSize = value
+        self._evict()
+
+    @property
+    def maxBytes(self) -> Optional[int]:
+        """Maximum estimated memory use in bytes, or ``None`` for no limit.\n
+        Each entry is estimated to use :data:`.ENTRY_BYTES` bytes, plus the length of its block's
+        NBT data."""
+        return self._maxBytes
+
+    @maxBytes.setter
+    def maxBytes(self, value: Optional[int]) -> None:
+        self._maxBytes = value
+        self._evict()
+
+    @property
+    def sectionGranularity(self) -> bool:
+        """Whether cached blocks are grouped by chunk section for eviction.\n
+        Changing this clears the cache."""
+        return self._sectionGranularity
+
+    @sectionGranularity.setter
+    def sectionGranularity(self, value: bool) -> None:
+        if value != self._sectionGranularity:
+            self.clear()
+        self._sectionGranularity = value
+
+    @property
+    def bytes(self) -> int:
+        """The estimated memory use of the cached blocks in bytes."""
+        return self._bytes
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Statistics of this cache, as a dict with the keys ``"hits"``, ``"misses"``,
+        ``"evictions"`` (the amount of blocks evicted because the cache was full), ``"size"`` and
+        ``"bytes"``."""
+        return {
+            "hits":      self._hits,
+            "misses":    self._misses,
+            "evictions": self._evictions,
+            "size":      len(self._entries),
+            "bytes":     self._bytes,
+        }
+
+    def get(self, position: ivec3) -> Optional[Block]:
+        """Returns the cached block at ``position``, or ``None`` if there is none.\n
+        Counts as a use of the block for eviction purposes, and as a hit or a miss."""
+        entry = self._entries.get(position)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._referenced[entry[1]] = 1
+        return entry[0]
+
+    def __getitem__(self, position: ivec3) -> Block:
+        block = self.get(position)
+        if block is None:
+            raise KeyError(position)
+        return block
+
+    def __setitem__(self, position: ivec3, block: Block) -> None:
+        entry = self._entries.get(position)
+        if entry is not None:
+            slot = entry[1]
+            self._bytes -= _entryBytes(entry[0])
+            self._referenced[slot] = 1
+        elif self._sectionGranularity:
+            unit = (position.x >> 4, position.y >> 4, position.z >> 4)
+            slot = self._unitSlots.get(unit)
+            if slot is None:
+                slot = self._allocateSlot(unit)
+                self._unitSlots[unit] = slot
+                self._sectionPositions[unit] = {position}
+            else:
+                self._sectionPositions[unit].add(position)
+        elif self._freeSlots:
+            slot = self._freeSlots.pop()
+            self._slotUnits[slot] = position
+            self._referenced[slot] = 0
+        else:
+            slot = self._allocateSlot(position)
+
+        self._entries[position] = (block, slot)
+        self._bytes += _entryBytes(block)
+        if (self._maxSize > 0 and len(self._entries) > self._maxSize) or (self._maxBytes is not None and self._bytes > self._maxBytes):
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes all cached blocks. Statistics are kept."""
+        self._entries.clear()
+        self._slotUnits.clear()
+        self._referenced = bytearray()
+        self._freeSlots.clear()
+        self._unitSlots.clear()
+        self._sectionPositions.clear()
+        self._hand = 0
+        self._bytes = 0
+
+    def _allocateSlot(self, unit: Hashable) -> int:
+        """Returns a slot for ``unit``, reusing a free slot if there is one."""
+        if self._freeSlots:
+            slot = self._freeSlots.pop()
+            self._slotUnits[slot] = unit
+            self._referenced[slot] = 0
+            return slot
+        self._slotUnits.append(unit)
+        self._referenced.append(0)
+        return len(self._slotUnits) - 1
+
+    def _evict(self) -> None:
+        """Evicts units until the cache is within its limits.\n
+        To spread the cost of sweeping, eviction continues until the cache is a fraction
+        :data:`_EVICTION_SLACK` below its limits."""
+        maxSize  = self._maxSize  - self._maxSize // _EVICTION_SLACK if self._maxSize > 0 else 0
+        maxBytes = self._maxBytes - self._maxBytes // _EVICTION_SLACK if self._maxBytes is not None else None
+        entries    = self._entries
+        slotUnits  = self._slotUnits
+        referenced = self._referenced
+        slotCount  = len(slotUnits)
+        hand       = self._hand
+        while (
+            ((maxSize > 0 and len(entries) > maxSize) or (maxBytes is not None and self._bytes > maxBytes)) and
+            slotCount > len(self._freeSlots)
+        ):
+            if hand >= slotCount:
+                hand = 0
+            slot = hand
+            hand += 1
+            unit = slotUnits[slot]
+            if unit is None:
+                continue
+            if referenced[slot]:
+                referenced[slot] = 0
+                continue
+
+            positions = self._sectionPositions.pop(unit) if self._sectionGranularity else (unit,)
+            for position in positions:
+                self._bytes -= _entryBytes(entries.pop(position)[0])
+            self._evictions += len(positions)
+            slotUnits[slot] = None
+            self._unitSlots.pop(unit, None)
+            self._freeSlots.append(slot)
+        self._hand = hand
+
+
+def _entryBytes(block: Block) -> int:
+    return ENTRY_BYTES + (len(block.data) if block.data else 0)
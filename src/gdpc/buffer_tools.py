@@ -0,0 +1,248 @@
+"""Provides tools for encoding buffered block placements into compact requests.
+
+These are used by :class:`.Editor` when it flushes its block buffer, but they can also be used
+directly with the functions from :mod:`.interface`.
+"""
+
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from functools import lru_cache
+import gzip
+import json
+import struct
+
+import numpy as np
+from glm import ivec3
+
+from .vector_tools import Box
+from .block import Block
+
+
+STRUCTURE_DATA_VERSION = 3465
+"""Data version written into generated structure files (Minecraft 1.20.1)"""
+
+FILL_LIMIT = 32768
+"""Maximum volume of a ``fill`` command in vanilla Minecraft"""
+
+FILL_MIN_VOLUME = 8
+"""Default minimum volume of the boxes that :func:`.coalesceBoxes` returns"""
+
+DENSE_CELL_SIZE = 16
+"""Edge length of the cubic cells in which :func:`.splitDenseCells` looks for dense regions"""
+
+DENSE_MIN_BLOCKS = 256
+"""Minimum amount of blocks in a cell for :func:`.splitDenseCells` to consider it dense"""
+
+DENSE_MIN_DENSITY = 0.5
+"""Minimum fraction of its bounding box that the blocks in a cell must fill for
+:func:`.splitDenseCells` to consider it dense"""
+
+
+# Every entry of a structure's "blocks" list has the same binary layout:
+# TAG_List "pos" of 3 TAG_Ints, TAG_Int "state", TAG_End.
+_BLOCK_ENTRY_TEMPLATE = (
+    b"\x09" + struct.pack(">H", 3) + b"pos" + b"\x03" + struct.pack(">i", 3) + bytes(12) +
+    b"\x03" + struct.pack(">H", 5) + b"state" + bytes(4) +
+    b"\x00"
+)
+_BLOCK_ENTRY_POS_OFFSET   = 11
+_BLOCK_ENTRY_STATE_OFFSET = 31
+
+
+_COORDINATES_SIZE_ESTIMATE = len('{"x":-1234,"y":123,"z":-1234,')
+
+
+@lru_cache(maxsize=4096)
+def _placementSize(blockId: str, stateItems: Tuple[Tuple[str, str], ...], data: Optional[str]) -> int:
+    size = _COORDINATES_SIZE_ESTIMATE + len(blockId) + 8
+    if stateItems:
+        size += len(json.dumps(dict(stateItems), separators=(",", ":"))) + 9
+    if data is not None:
+        size += len(repr(data)) + 8
+    return size
+
+
+def placementSize(block: Block) -> int:
+    """Returns an estimate of the size in bytes of the entry of ``block`` in the body of a
+    :func:`.interface.placeBlocks` request."""
+    return _placementSize(block.id, tuple(block.states.items()), block.data)
+
+
+def splitDenseCells(
+    blocks: Iterable[Tuple[ivec3, Block]],
+    cellSize = DENSE_CELL_SIZE,
+    minBlocks = DENSE_MIN_BLOCKS,
+    minDensity = DENSE_MIN_DENSITY,
+) -> Tuple[List[List[Tuple[ivec3, Block]]], List[Tuple[ivec3, Block]]]:
+    """Splits ``blocks`` into dense regions and remaining sparse blocks.
+
+    The blocks are grouped by cubic cells of size ``cellSize``. A cell is dense if it contains at
+    least ``minBlocks`` blocks that fill at least a fraction ``minDensity`` of their bounding box.
+    Blocks with NBT data are never part of a dense region.
+
+    Returns a tuple (denseCells, sparseBlocks), where denseCells is a list with the blocks of each
+    dense cell."""
+    cells: Dict[Tuple[int, int, int], List[Tuple[ivec3, Block]]] = {}
+    sparseBlocks: List[Tuple[ivec3, Block]] = []
+    for position, block in blocks:
+        if block.data is not None:
+            sparseBlocks.append((position, block))
+            continue
+        key = (position[0] // cellSize, position[1] // cellSize, position[2] // cellSize)
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [(position, block)]
+        else:
+            cell.append((position, block))
+
+    denseCells: List[List[Tuple[ivec3, Block]]] = []
+    for cell in cells.values():
+        if len(cell) >= minBlocks and len(cell) >= minDensity * Box.bounding(position for position, _ in cell).volume:
+            denseCells.append(cell)
+        else:
+            sparseBlocks += cell
+    return denseCells, sparseBlocks
+
+
+def coalesceBoxes(
+    blocks: Iterable[Tuple[ivec3, Block]],
+    minVolume = FILL_MIN_VOLUME,
+    fillLimit = FILL_LIMIT,
+) -> Tuple[List[Tuple[Box, Block]], List[Tuple[ivec3, Block]]]:
+    """Greedily merges ``blocks`` into axis-aligned boxes of identical blocks.
+
+    Starting from the lowest remaining position, each box is grown as far as possible along x,
+    then z, then y, without exceeding a volume of ``fillLimit``. Boxes with a volume smaller than
+    ``minVolume`` are discarded.
+
+    Returns a tuple (boxes, remainingBlocks), where boxes is a list of (box, block)-tuples, and
+    remainingBlocks contains the blocks that are not part of any box."""
+    groups: Dict[Tuple, Set[Tuple[int, int, int]]] = {}
+    representatives: Dict[Tuple, Block] = {}
+    for position, block in blocks:
+        key = (block.id, tuple(block.states.items()), block.data)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = set()
+            representatives[key] = block
+        group.add((position[0], position[1], position[2]))
+
+    boxes: List[Tuple[Box, Block]] = []
+    remainingBlocks: List[Tuple[ivec3, Block]] = []
+    for key, remaining in groups.items():
+        block = representatives[key]
+        for start in sorted(remaining, key=lambda p: (p[1], p[2], p[0])):
+            if start not in remaining:
+                continue
+            x0, y0, z0 = start
+            x1 = x0 + 1
+            while x1 - x0 < fillLimit and (x1, y0, z0) in remaining:
+                x1 += 1
+            z1 = z0 + 1
+            while (x1 - x0) * (z1 + 1 - z0) <= fillLimit and all((x, y0, z1) in remaining for x in range(x0, x1)):
+                z1 += 1
+            y1 = y0 + 1
+            while (x1 - x0) * (z1 - z0) * (y1 + 1 - y0) <= fillLimit and all((x, y1, z) in remaining for x in range(x0, x1) for z in range(z0, z1)):
+                y1 += 1
+
+            box = Box((x0, y0, z0), (x1 - x0, y1 - y0, z1 - z0))
+            if box.volume >= minVolume:
+                remaining.difference_update((x, y, z) for x in range(x0, x1) for y in range(y0, y1) for z in range(z0, z1))
+                boxes.append((box, block))
+            else:
+                remaining.discard(start)
+                remainingBlocks.append((ivec3(*start), block))
+    return boxes, remainingBlocks
+
+
+def groupAnchors(
+    blocks: Sequence[Tuple[ivec3, Block]],
+    groups: Sequence[Iterable[ivec3]],
+) -> List[Optional[int]]:
+    """Determines where each group of ``blocks`` can be placed at once without observably
+    changing the order in which ``blocks`` are placed.
+
+    ``groups`` contains the positions of disjoint groups of ``blocks``, such as the boxes of
+    :func:`.coalesceBoxes` or the cells of :func:`.splitDenseCells`. A group that is placed at
+    once is placed at the index of its last block in ``blocks``, which delays its earlier blocks
+    past the other blocks in between. That is only unobservable if none of those other blocks lies
+    in or next to the bounding box of the group.
+
+    Returns, for every group, the index in ``blocks`` at which it can be placed, or ``None`` if
+    placing it at once could change the outcome of block updates."""
+    if not groups:
+        return []
+    indices = {position: i for i, (position, _) in enumerate(blocks)}
+    positions = np.array([tuple(position) for position, _ in blocks], dtype=np.int64).reshape(-1, 3)
+    groupOf = np.full(len(blocks), -1, dtype=np.int64)
+    members = []
+    for g, group in enumerate(groups):
+        groupIndices = np.fromiter((indices[ivec3(position)] for position in group), dtype=np.int64)
+        groupOf[groupIndices] = g
+        members.append(groupIndices)
+
+    anchors: List[Optional[int]] = []
+    for g, groupIndices in enumerate(members):
+        first, last = int(groupIndices.min()), int(groupIndices.max())
+        groupPositions = positions[groupIndices]
+        low  = groupPositions.min(axis=0) - 1
+        high = groupPositions.max(axis=0) + 1
+        between = positions[first:last + 1]
+        touching = np.all((between >= low) & (between <= high), axis=1) & (groupOf[first:last + 1] != g)
+        anchors.append(None if touching.any() else last)
+    return anchors
+
+
+def _nbtString(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return struct.pack(">H", len(encoded)) + encoded
+
+
+def blocksToStructure(blocks: List[Tuple[ivec3, Block]], compress = True) -> Tuple[ivec3, bytes]:
+    """Encodes ``blocks`` as a palette-compressed structure file, the format of the in-game
+    structure blocks and of :func:`.interface.placeStructure`.
+
+    Positions inside the bounding box of ``blocks`` that do not hold a block are left unchanged
+    when the structure is placed. NBT data of blocks is not included.
+
+    Returns a tuple (origin, structureData), where origin is the position at which the structure
+    must be placed. If ``compress`` is True, structureData is gzip-compressed."""
+    positions = np.array([tuple(position) for position, _ in blocks], dtype=np.int64).reshape(-1, 3)
+    origin = positions.min(axis=0) if len(positions) else np.zeros(3, dtype=np.int64)
+    size   = positions.max(axis=0) - origin + 1 if len(positions) else np.zeros(3, dtype=np.int64)
+
+    palette: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+    states = np.empty(len(blocks), dtype=np.int64)
+    for i, (_, block) in enumerate(blocks):
+        states[i] = palette.setdefault((block.id, tuple(block.states.items())), len(palette))
+
+    data = bytearray(b"\x0a" + _nbtString("")) # Root compound
+    data += b"\x03" + _nbtString("DataVersion") + struct.pack(">i", STRUCTURE_DATA_VERSION)
+    data += b"\x09" + _nbtString("size") + b"\x03" + struct.pack(">iiii", 3, *size.tolist())
+
+    data += b"\x09" + _nbtString("palette") + b"\x0a" + struct.pack(">i", len(palette))
+    for blockId, stateItems in palette:
+        data += b"\x08" + _nbtString("Name") + _nbtString(blockId)
+        if stateItems:
+            data += b"\x0a" + _nbtString("Properties")
+            for name, value in stateItems:
+                data += b"\x08" + _nbtString(name) + _nbtString(str(value))
+            data += b"\x00"
+        data += b"\x00"
+
+    entries = np.frombuffer(_BLOCK_ENTRY_TEMPLATE, dtype=np.uint8)
+    entries = np.tile(entries, (len(blocks), 1))
+    entries[:, _BLOCK_ENTRY_POS_OFFSET : _BLOCK_ENTRY_POS_OFFSET + 12] = (
+        (positions - origin).astype(">i4").view(np.uint8).reshape(-1, 12)
+    )
+    entries[:, _BLOCK_ENTRY_STATE_OFFSET : _BLOCK_ENTRY_STATE_OFFSET + 4] = (
+        states.astype(">i4").view(np.uint8).reshape(-1, 4)
+    )
+    data += b"\x09" + _nbtString("blocks") + b"\x0a" + struct.pack(">i", len(blocks))
+    data += entries.tobytes()
+
+    data += b"\x09" + _nbtString("entities") + b"\x0a" + struct.pack(">i", 0)
+    data += b"\x00"
+
+    structureData = gzip.compress(bytes(data), compresslevel=1) if compress else bytes(data)
+    return ivec3(*origin.tolist()), structureData
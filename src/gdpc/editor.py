@@ -4,28 +4,103 @@ Minecraft world through the GDMC HTTP interface."""
 
 from __future__ import annotations
 
-from typing import Dict, Sequence, Union, Optional, List, Iterable, Generator
+from typing import Dict, FrozenSet, Sequence, Set, Union, Optional, List, Iterable, Generator, Tuple
 from numbers import Integral
 from contextlib import contextmanager
-from copy import copy, deepcopy
+from itertools import starmap
+from copy import deepcopy
 import random
+import time
 from concurrent import futures
 import logging
 
 import numpy as np
 from glm import ivec3
+import requests
 
-from .utils import eagerAll, OrderedByLookupDict
-from .vector_tools import Vec3iLike, Rect, Box, dropY
+from .utils import eagerAll
+from .vector_tools import Vec3iLike, Rect, Box
 from .transform import Transform, TransformLike, toTransform
 from .block import Block, transformedBlockOrPalette
-from . import interface
+from . import interface, buffer_tools
 from .world_slice import WorldSlice
+from .block_cache import BlockCache
+from .metrics import MetricsRegistry
+from .exceptions import InterfaceInternalError, InterfaceTimeoutError
 
 
 logger = logging.getLogger(__name__)
 
 
+_MAX_RESUBMISSION_FAILURES = 32
+"""How many failed sub-batch requests a single buffer flush tolerates before giving up"""
+
+_ADAPTIVE_BUFFER_LIMIT_MIN = 64
+"""Lower bound of an adaptive buffer limit"""
+
+_ADAPTIVE_BUFFER_LIMIT_MAX = 65536
+"""Upper bound of an adaptive buffer limit"""
+
+_FLUSH_STATS_SMOOTHING = 0.3
+"""Weight of the newest measurement in the moving averages of buffer flush statistics"""
+
+_BATCHED_READ_MIN_VOLUME = 4096
+"""Volume up to which a batched block retrieval always reads the bounding box of its positions"""
+
+_BATCHED_READ_MAX_SPARSENESS = 8
+"""Maximum ratio between the volume of the bounding box read by a batched block retrieval and its
+amount of positions"""
+
+
+def _copyBlock(block: Block) -> Block:
+    """Returns a copy of ``block`` that does not share its states dict with ``block``."""
+    return Block(block.id, dict(block.states), block.data)
+
+
+def _sameBlock(block1: Block, block2: Block) -> bool:
+    """Returns whether placing ``block2`` where ``block1`` is would change nothing.\n
+    Blocks with NBT data are never considered the same, since equivalent SNBT can be formatted in
+    different ways."""
+    if not block1.id or not block2.id or block1.data is not None or block2.data is not None:
+        return False
+    id1 = block1.id if ":" in block1.id else f"minecraft:{block1.id}"
+    id2 = block2.id if ":" in block2.id else f"minecraft:{block2.id}"
+    return id1 == id2 and block1.states == block2.states
+
+
+def _batchedReadRegions(positions: np.ndarray) -> List[np.ndarray]:
+    """Groups the (N,3) ``positions`` into regions whose bounding boxes can each be retrieved with
+    a single request, and returns the indices of the positions in each region.\n
+    All positions form a single region, unless their bounding box is much larger than the amount
+    of positions: then, they are grouped by chunk section."""
+    if np.prod(positions.max(axis=0) - positions.min(axis=0) + 1) <= max(_BATCHED_READ_MIN_VOLUME, _BATCHED_READ_MAX_SPARSENESS * len(positions)):
+        return [np.arange(len(positions))]
+    _, sections = np.unique(positions // 16, axis=0, return_inverse=True)
+    sections = sections.ravel()
+    order = np.argsort(sections, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(sections[order])) + 1)
+
+
+def _lastOccurrenceMask(positions: np.ndarray) -> np.ndarray:
+    """Returns a boolean array indicating for each of the (N,3) ``positions`` whether it does not
+    occur again later in the array."""
+    mask = np.zeros(len(positions), dtype=bool)
+    if len(positions) > 0:
+        _, reversedFirst = np.unique(positions[::-1], axis=0, return_index=True)
+        mask[len(positions) - 1 - reversedFirst] = True
+    return mask
+
+
+def _volumeToArrays(box: Box, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Converts a 3D palette index array covering ``box`` to an (N,3) array of positions and an
+    (N,) array of palette indices, leaving out negative indices."""
+    indices = np.asarray(indices)
+    if indices.shape != tuple(box.size):
+        raise ValueError(f"The shape of the palette index array {indices.shape} does not match the size of the box {tuple(box.size)}.")
+    relative = np.argwhere(indices >= 0)
+    return relative + np.array(box.offset), indices[tuple(relative.T)]
+
+
 class Editor:
     """Provides high-level functions to interact with the Minecraft world through the GDMC HTTP
     interface.
@@ -40,22 +115,45 @@ class Editor:
         dimension: Optional[str] = None,
         buffering             = False,
         bufferLimit           = 1024,
+        bufferByteLimit       = None,
+        adaptiveBufferLimit   = False,
+        targetFlushDuration   = 0.5,
         caching               = False,
         cacheLimit            = 8192,
+        cacheByteLimit        = None,
+        cacheBySection        = False,
+        skipUnchanged         = False,
         multithreading        = False,
         multithreadingWorkers = 1,
+        maxPendingFlushes     = 4,
         retries               = 4,
         timeout               = None,
+        deadline              = None,
         host                  = interface.DEFAULT_HOST,
+        connectionPoolSize    = interface.DEFAULT_POOL_SIZE,
+        compressionThreshold  = None,
+        fillThreshold         = None,
+        fillLimit             = buffer_tools.FILL_LIMIT,
+        structureFlushing     = False,
+        metrics               = None,
     ) -> None:
         """Constructs an Editor instance with the specified transform and settings.
 
         All settings specified here can be accessed and modified through properties with the same
         name. For more information on each setting, see the documentation for the corresponding
         property."""
-        self._retries = retries
-        self._timeout = timeout
-        self._host    = host
+        self._retries  = retries
+        self._timeout  = timeout
+        self._deadline = deadline
+        self._host     = host
+
+        self._connectionPoolSize = connectionPoolSize
+        self._sessionPool = interface.SessionPool(connectionPoolSize)
+        self._compressionThreshold = compressionThreshold
+        self._fillThreshold = fillThreshold
+        self._fillLimit = fillLimit
+        self._structureFlushing = structureFlushing
+        self._metrics = MetricsRegistry() if metrics is None else metrics
 
         self._transform = Transform() if transformLike is None else toTransform(transformLike)
 
@@ -63,16 +161,29 @@ class Editor:
 
         self._buffering = buffering
         self._bufferLimit = bufferLimit
+        self._bufferByteLimit = bufferByteLimit
+        self._bufferBytes = 0 # Estimated size of the buffer as a placeBlocks request body
+        self._adaptiveBufferLimit = adaptiveBufferLimit
+        self._targetFlushDuration = targetFlushDuration
+        self._flushThroughput: Optional[float] = None
+        self._flushDuration:   Optional[float] = None
         self._buffer: Dict[ivec3,Block] = {}
         self._commandBuffer: List[str] = []
 
         self._caching = caching
-        self._cache = OrderedByLookupDict[ivec3,Block](cacheLimit)
+        self._cache = BlockCache(cacheLimit, cacheByteLimit, cacheBySection)
+
+        self._skipUnchanged = skipUnchanged
+        self._skippedWrites = 0
 
         self._multithreading = False
         self._multithreadingWorkers = multithreadingWorkers
+        self._maxPendingFlushes = maxPendingFlushes
+        # Buffer flushes that may still be running, as (future, blockBuffer, hasCommands)-tuples.
+        self._pendingFlushes: List[Tuple[futures.Future, Dict[ivec3,Block], bool]] = []
+        self._flushError: Optional[BaseException] = None
         self.multithreading = multithreading # The property setter initializes the multithreading system.
-        self._bufferFlushFutures: List[futures.Future] = []
+        self._updateSessionPoolSize()
 
         self._doBlockUpdates = True
         self._spawnDrops     = False
@@ -80,19 +191,22 @@ class Editor:
         self._bufferSpawnDrops     = self._spawnDrops
 
         self._worldSlice: Optional[WorldSlice] = None
-        self._worldSliceDecay: Optional[np.ndarray] = None
 
 
     def __del__(self) -> None:
         """Cleans up this Editor instance."""
         # awaits any pending buffer flush futures and shuts down the buffer flush executor
-        self.multithreading = False
+        try:
+            self.multithreading = False
+        except Exception as e: # pylint: disable=broad-except
+            logger.error("A buffer flush failed: %s", e)
         # Flush any remaining blocks in the buffer.
         # This is purposefully done *after* disabling multithreading! This __del__ may be called at
         # interpreter shutdown, and it appears that scheduling a new future at that point fails with
         # "RuntimeError: cannot schedule new futures after shutdown" even if the executor has not
         # actually shut down yet. For safety, the last buffer flush must be done on the main thread.
         self.flushBuffer()
+        self._sessionPool.close()
 
 
     @property
@@ -138,9 +252,9 @@ class Editor:
     def dimension(self, value: Optional[str]) -> None:
         if value != self._dimension:
             self.flushBuffer()
+            self.awaitBufferFlushes()
             self._cache.clear()
-            self._worldSlice      = None
-            self._worldSliceDecay = None
+            self._worldSlice = None
         self._dimension = value
 
     @property
@@ -183,14 +297,73 @@ class Editor:
         if len(self._buffer) >= self.bufferLimit:
             self.flushBuffer()
 
+    @property
+    def bufferByteLimit(self) -> Optional[int]:
+        """Maximum estimated size in bytes of a block buffer flush request, or ``None`` for no
+        limit.
+
+        When the block buffer would exceed this size, it is flushed, even if it holds fewer than
+        :attr:`.bufferLimit` blocks. This keeps requests with large block states or NBT data from
+        growing too large. The size is estimated from the JSON entries of the buffered blocks (see
+        :func:`.buffer_tools.placementSize`)."""
+        return self._bufferByteLimit
+
+    @bufferByteLimit.setter
+    def bufferByteLimit(self, value: Optional[int]) -> None:
+        self._bufferByteLimit = value
+        if value is not None and self._bufferBytes >= value:
+            self.flushBuffer()
+
+    @property
+    def adaptiveBufferLimit(self) -> bool:
+        """Whether :attr:`.bufferLimit` is tuned automatically.
+
+        If ``True``, the duration of every buffer flush that places at least half of
+        :attr:`.bufferLimit` blocks is measured, and :attr:`.bufferLimit` is scaled so that the next
+        flush takes about :attr:`.targetFlushDuration` seconds. The initial value of
+        :attr:`.bufferLimit` is used as a starting point. A fast local server will then get large
+        requests, while a slow or remote server gets smaller ones, which keeps requests clear of
+        timeouts and keeps the buffer from holding blocks back for long.\n
+        The measured throughput and duration are available as :attr:`.flushThroughput` and
+        :attr:`.flushDuration`. Combine this with :attr:`.bufferByteLimit` to also bound requests
+        by size."""
+        return self._adaptiveBufferLimit
+
+    @adaptiveBufferLimit.setter
+    def adaptiveBufferLimit(self, value: bool) -> None:
+        self._adaptiveBufferLimit = value
+
+    @property
+    def targetFlushDuration(self) -> float:
+        """The duration in seconds that buffer flushes should take when
+        :attr:`.adaptiveBufferLimit` is enabled."""
+        return self._targetFlushDuration
+
+    @targetFlushDuration.setter
+    def targetFlushDuration(self, value: float) -> None:
+        self._targetFlushDuration = value
+
+    @property
+    def flushThroughput(self) -> Optional[float]:
+        """Moving average of the amount of blocks placed per second by recent buffer flushes, or
+        ``None`` if no blocks were flushed yet."""
+        return self._flushThroughput
+
+    @property
+    def flushDuration(self) -> Optional[float]:
+        """Moving average of the duration in seconds of recent buffer flushes that placed blocks,
+        or ``None`` if no blocks were flushed yet."""
+        return self._flushDuration
+
     @property
     def caching(self) -> bool:
         """Whether caching placed and retrieved blocks is enabled.
 
-        When caching is enabled, the last :attr:`cacheLimit` placed and retrieved blocks and their
-        positions are cached in this ``Editor`` object. If a block at a cached position is accessed
-        (such as with :meth:`.getBlock`), the block is retrieved from the cache, and no HTTP request
-        is sent.
+        When caching is enabled, up to :attr:`cacheLimit` recently placed and retrieved blocks and
+        their positions are cached in this ``Editor`` object. If a block at a cached position is
+        accessed (such as with :meth:`.getBlock`), the block is retrieved from the cache, and no
+        HTTP request is sent. When the cache is full, blocks that were not used recently are
+        evicted first. The cache can also be limited by memory use (:attr:`.cacheByteLimit`).
 
         If both buffering (see :attr:`buffering`) and caching are enabled, the buffer supersedes the
         cache for block retrieval.
@@ -207,38 +380,107 @@ class Editor:
 
     @property
     def cacheLimit(self) -> int:
-        """Size of the block cache (see :attr:`.caching`)."""
+        """Maximum amount of blocks in the block cache, or 0 for no limit (see :attr:`.caching`)."""
         return self._cache.maxSize
 
     @cacheLimit.setter
     def cacheLimit(self, value: int) -> None:
         self._cache.maxSize = value
 
+    @property
+    def cacheByteLimit(self) -> Optional[int]:
+        """Maximum estimated memory use of the block cache in bytes, or ``None`` for no limit (see
+        :attr:`.caching`).\n
+        Each cached block is estimated to use :data:`.block_cache.ENTRY_BYTES` bytes, plus the
+        length of its NBT data. This limit applies in addition to :attr:`.cacheLimit`; set that to
+        0 to limit the cache by memory only."""
+        return self._cache.maxBytes
+
+    @cacheByteLimit.setter
+    def cacheByteLimit(self, value: Optional[int]) -> None:
+        self._cache.maxBytes = value
+
+    @property
+    def cacheBySection(self) -> bool:
+        """Whether the block cache tracks usage and evicts blocks per chunk section (16x16x16)
+        instead of per block (see :attr:`.caching`).\n
+        This suits code that accesses blocks close to each other, such as area scans.
+        Changing this setting clears the cache."""
+        return self._cache.sectionGranularity
+
+    @cacheBySection.setter
+    def cacheBySection(self, value: bool) -> None:
+        self._cache.sectionGranularity = value
+
+    @property
+    def cacheStats(self) -> Dict[str, int]:
+        """Statistics of the block cache (see :attr:`.caching`), as a dict with the following keys:
+
+        - ``"hits"``: the amount of cache lookups that found a block.
+        - ``"misses"``: the amount of cache lookups that did not.
+        - ``"evictions"``: the amount of blocks that were removed from the cache because it was full.
+        - ``"size"``: the amount of blocks currently in the cache.
+        - ``"bytes"``: the estimated memory use of the cache in bytes.
+        """
+        return self._cache.stats
+
+    @property
+    def skipUnchanged(self) -> bool:
+        """Whether to skip placing blocks that are already known to be in the world.
+
+        When enabled, each block to be placed is compared with the block at its position according
+        to the buffer, the cache (see :attr:`.caching`) and the world slice (see
+        :meth:`.loadWorldSlice`). If they are the same, the block is not placed. This avoids
+        resending blocks when a generator is re-run on the same area, or when it places the same
+        block repeatedly. Positions whose current block is not known locally are always placed.\n
+        Blocks are only considered the same if their ids (ignoring the ``minecraft:`` namespace)
+        and their block states are equal, and neither has NBT data. Note that a world slice
+        contains all block states, so a block given with only some of its states does not match
+        it.\n
+        Like caching, this assumes that the world is not changed by anything other than this
+        ``Editor``. The amount of skipped blocks is counted in :attr:`.skippedWrites`."""
+        return self._skipUnchanged
+
+    @skipUnchanged.setter
+    def skipUnchanged(self, value: bool) -> None:
+        self._skipUnchanged = value
+
+    @property
+    def skippedWrites(self) -> int:
+        """The amount of block placements that were skipped by :attr:`.skipUnchanged`."""
+        return self._skippedWrites
+
     @property
     def multithreading(self) -> bool:
-        """Whether multithreaded buffer flushing is enabled."""
+        """Whether multithreaded buffer flushing is enabled.
+
+        When multithreaded buffer flushing is enabled, :meth:`.flushBuffer` hands the buffer to a
+        worker thread and returns immediately, so the program can continue generating blocks while
+        the previous ones are being placed.
+
+        Buffer flushes that place blocks at overlapping positions, and buffer flushes that run
+        commands, are always executed in the order in which they were started, so the world ends
+        up the same as without multithreading. Other flushes may run concurrently on the
+        :attr:`.multithreadingWorkers` worker threads.
+
+        At most :attr:`.maxPendingFlushes` flushes can be pending at the same time; further flushes
+        wait until one finishes. If a flush fails, its exception is raised by the next call to
+        :meth:`.flushBuffer` or :meth:`.awaitBufferFlushes`, or when multithreading is disabled.
+        """
         return self._multithreading
 
     @multithreading.setter
     def multithreading(self, value: bool) -> None:
         if not self._multithreading and value:
             self._bufferFlushExecutor = futures.ThreadPoolExecutor(self._multithreadingWorkers)
-            if self._multithreadingWorkers > 1:
-                logger.warning(
-                    "Multithreading with more than one worker thread.\n"
-                    "An editor has been set to use multithreaded buffer flushing with more than one\n"
-                    "worker thread.\n"
-                    "The editor can no longer guarantee that blocks will be placed in the same order\n"
-                    "as they were sent. If buffering or caching is used, this can also cause the\n"
-                    "caches to become inconsistent with the actual world.\n"
-                    "Multithreading with more than one worker thread can speed up block placement on\n"
-                    "some machines, which can be nice during development, but it is NOT RECOMMENDED\n"
-                    "for production code."
-                )
+            self._multithreading = True
         elif self._multithreading and not value:
-            self._bufferFlushExecutor.shutdown(wait=True)
-            del self._bufferFlushExecutor
-        self._multithreading = value
+            try:
+                self.awaitBufferFlushes()
+            finally:
+                self._bufferFlushExecutor.shutdown(wait=True)
+                del self._bufferFlushExecutor
+                self._multithreading = False
 
     @property
     def multithreadingWorkers(self) -> int:
@@ -252,6 +494,21 @@ class Editor:
         if restartExecutor:
             self.multithreading = False
             self.multithreading = True
+        self._updateSessionPoolSize()
+
+    @property
+    def maxPendingFlushes(self) -> int:
+        """The maximum amount of multithreaded buffer flushes that can be pending at the same time
+        (see :attr:`.multithreading`).
+
+        When this amount is reached, :meth:`.flushBuffer` waits until a pending flush finishes.
+        This keeps a program that generates blocks faster than the server can place them from
+        piling up buffers in memory."""
+        return self._maxPendingFlushes
+
+    @maxPendingFlushes.setter
+    def maxPendingFlushes(self, value: int) -> None:
+        self._maxPendingFlushes = value
 
     @property
     def doBlockUpdates(self) -> bool:
@@ -301,8 +558,11 @@ class Editor:
     def retries(self) -> int:
         """The amount of retries for requests to the GDMC HTTP interface.
 
-        If a request to the interface fails, it will be retried this many times
-        (1 + this value in total) before an exception is thrown.
+        If a request to the interface fails to connect, times out or receives a server error, it
+        will be retried this many times (1 + this value in total) before an exception is thrown.
+        The delay between retries grows exponentially and is randomized. Commands and structure
+        placements are only retried if they failed to connect, since the server may already have
+        executed them (see :mod:`.interface`).
         """
         return self._retries
 
@@ -323,6 +583,19 @@ class Editor:
     def timeout(self, value) -> None:
         self._timeout = value
 
+    @property
+    def deadline(self) -> Optional[float]:
+        """The maximum total time in seconds for a request to the GDMC HTTP interface, including all
+        retries, or ``None`` for no limit.
+
+        Unlike :attr:`.timeout`, which applies to each attempt separately, the deadline bounds the
+        time spent on a request as a whole."""
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, value: Optional[float]) -> None:
+        self._deadline = value
+
     @property
     def host(self) -> str:
         """The address (hostname+port) of the GDMC HTTP interface to use.\n
@@ -336,10 +609,106 @@ class Editor:
             self.flushBuffer()
             self.awaitBufferFlushes()
             self._cache.clear()
-            self._worldSlice      = None
-            self._worldSliceDecay = None
+            self._worldSlice = None
         self._host = value
 
+    @property
+    def connectionPoolSize(self) -> int:
+        """The maximum amount of keep-alive connections to the GDMC HTTP interface.
+
+        The editor reuses open connections for its requests instead of opening a new connection for
+        each one, which saves a significant amount of time when many requests are sent.
+        At least :attr:`.multithreadingWorkers` + 1 connections are always kept, so that the buffer
+        flush worker threads and the main thread never have to wait for each other's connections.\n
+        Changing this closes all open connections."""
+        return self._connectionPoolSize
+
+    @connectionPoolSize.setter
+    def connectionPoolSize(self, value: int) -> None:
+        self._connectionPoolSize = value
+        self._updateSessionPoolSize()
+
+    @property
+    def compressionThreshold(self) -> Optional[int]:
+        """The minimum size in bytes of block placement and command requests that are sent
+        gzip-compressed, or ``None`` to never compress them.
+
+        Large block buffers consist mostly of repeated block ids, so compressing them can
+        significantly reduce the amount of data sent to a remote server. Small requests are not
+        worth the compression time. Responses to block, biome and chunk reads are always
+        requested compressed.\n
+        Note that request compression requires a GDMC HTTP interface that accepts gzip-encoded
+        request bodies. The saved bytes are counted in :data:`.interface.compressionStats`."""
+        return self._compressionThreshold
+
+    @compressionThreshold.setter
+    def compressionThreshold(self, value: Optional[int]) -> None:
+        self._compressionThreshold = value
+
+    @property
+    def fillThreshold(self) -> Optional[int]:
+        """The minimum volume of uniform boxes in the block buffer that are placed with a ``fill``
+        command, or ``None`` to place all buffered blocks individually.
+
+        Walls, floors and other cuboids are placed one block at a time (for example by
+        :func:`.geometry.placeCuboid`), but if this is not ``None``, buffer flushes merge identical
+        buffered blocks into boxes (see :func:`.buffer_tools.coalesceBoxes`) and place every box
+        of at least this many blocks with a single ``fill`` command. The remaining blocks are
+        placed as usual. Boxes are at most :attr:`.fillLimit` blocks large.\n
+        Each box is filled at the position of its last block in the buffer, between the requests
+        for the other blocks. A box is only merged if none of the blocks buffered in between lies
+        next to it, so that the order in which neighbouring blocks are placed, which block updates
+        can observe, is preserved.\n
+        ``fill`` commands always cause block updates, so boxes are only merged while
+        :attr:`.doBlockUpdates` is ``True``. If :attr:`.spawnDrops` is ``True``, the ``destroy``
+        mode is used. If a ``fill`` command fails, its blocks are placed individually instead."""
+        return self._fillThreshold
+
+    @fillThreshold.setter
+    def fillThreshold(self, value: Optional[int]) -> None:
+        self._fillThreshold = value
+
+    @property
+    def fillLimit(self) -> int:
+        """The maximum volume of a ``fill`` command used for buffer flushes (see
+        :attr:`.fillThreshold`).\n
+        This should not exceed the server's ``commandModificationBlockLimit`` game rule, which is
+        32768 by default."""
+        return self._fillLimit
+
+    @fillLimit.setter
+    def fillLimit(self, value: int) -> None:
+        self._fillLimit = value
+
+    @property
+    def structureFlushing(self) -> bool:
+        """Whether dense regions of the block buffer are placed as structures.
+
+        If ``True``, buffer flushes look for 16x16x16 cells that contain many blocks filling most
+        of their bounding box (see :func:`.buffer_tools.splitDenseCells`). Such cells are sent
+        to the GDMC HTTP interface as palette-compressed structure files instead of as one JSON
+        object per block, which greatly reduces the request size and the parsing work of the
+        server for foundations, floors, walls and terrain fills. The remaining blocks are placed
+        as usual.\n
+        Like the boxes of :attr:`.fillThreshold`, a dense region is only placed as a structure if
+        that does not change the order in which neighbouring blocks are placed.
+        Blocks with NBT data are always placed individually. If placing a structure fails, its
+        blocks are placed individually as well."""
+        return self._structureFlushing
+
+    @structureFlushing.setter
+    def structureFlushing(self, value: bool) -> None:
+        self._structureFlushing = value
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """The registry in which this editor records metrics about its requests to the GDMC HTTP
+        interface, such as the amount, duration and size of requests per endpoint.\n
+        Export it at the end of a build with :meth:`.MetricsRegistry.writePrometheusTextfile` or
+        :meth:`.MetricsRegistry.writeJson`. Requests are also recorded in
+        :data:`.interface.requestMetrics`."""
+        return self._metrics
+
     @property
     def worldSlice(self) -> Optional[WorldSlice]:
         """The cached WorldSlice (see :meth:`.loadWorldSlice`)."""
@@ -348,14 +717,31 @@ class Editor:
     @property
     def worldSliceDecay(self) -> Optional[np.ndarray]:
         """3D boolean array indicating whether the block at the specified position in the cached
-        worldSlice is still valid.\n
+        worldSlice was changed by this editor since the world slice was loaded.\n
+        Blocks are written through to the cached world slice (see
+        :meth:`.WorldSlice.setBlockGlobal`) once the server has confirmed their placement, so it
+        stays valid for block retrieval. This array is computed from :attr:`.WorldSlice.overlay`.\n
         Note that the lowest Y-layer is at ``[:,0,:]``, despite Minecraft's negative Y coordinates.
         If :attr:`.worldSlice` is ``None``, this property will also be ``None``."""
-        if self._worldSliceDecay is None:
+        if self._worldSlice is None:
             return None
-        view: np.ndarray = self._worldSliceDecay.view()
-        view.flags.writeable = False
-        return view
+        decay = np.zeros(tuple(self._worldSlice.box.size), dtype=bool)
+        if self._worldSlice.overlay:
+            local = np.array([tuple(position) for position in self._worldSlice.overlay], dtype=np.int64) - np.array(self._worldSlice.box.offset)
+            decay[tuple(local.T)] = True
+        decay.flags.writeable = False
+        return decay
+
+
+    @property
+    def _session(self) -> requests.Session:
+        """The keep-alive session for the current :attr:`.host`."""
+        return self._sessionPool.get(self._host)
+
+
+    def _updateSessionPoolSize(self) -> None:
+        """Ensures the session pool can serve all buffer flush worker threads at once."""
+        self._sessionPool.poolSize = max(self._connectionPoolSize, self._multithreadingWorkers + 1)
 
 
     def runCommand(self, command: str, position: Optional[Vec3iLike]=None, syncWithBuffer=False) -> None:
@@ -395,7 +781,7 @@ class Editor:
         if self.buffering and syncWithBuffer:
             self._commandBuffer.append(command)
             return
-        result = interface.runCommand(command, dimension=self.dimension, retries=self.retries, timeout=self.timeout, host=self.host)
+        result = interface.runCommand(command, dimension=self.dimension, compressionThreshold=self.compressionThreshold, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
         if not result[0][0]:
             logger.error("Server returned error upon running command:\n  %s", result[0][1])
 
@@ -403,7 +789,7 @@ class Editor:
     def getBuildArea(self) -> Box:
         """Returns the build area that was specified by ``/setbuildarea`` in-game.\n
         The build area is always in **global coordinates**; :attr:`.transform` is ignored."""
-        return interface.getBuildArea(retries=self.retries, timeout=self.timeout, host=self.host)
+        return interface.getBuildArea(retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
 
 
     def setBuildArea(self, buildArea: Box) -> Box:
@@ -413,47 +799,142 @@ class Editor:
         return self.getBuildArea()
 
 
-    def getBlock(self, position: Vec3iLike) -> Block:
+    def getBlock(self, position: Vec3iLike, readOnly=False) -> Block:
         """Returns the block at ``position``.\n
         ``position`` is interpreted as local to the coordinate system defined by :attr:`.transform`.
         The returned block's orientation is also from the perspective of :attr:`.transform`.\n
-        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``."""
-        block = self.getBlockGlobal(self.transform * position)
+        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``.\n
+        If ``readOnly`` is True, the returned block may be shared with the cache or the buffer, and
+        must not be modified. This avoids copying it."""
+        block = self.getBlockGlobal(self.transform * position, readOnly=True)
         invTransform = ~self.transform
-        block.transform(invTransform.rotation, invTransform.flip)
-        return block
+        if invTransform.rotation == 0 and not any(invTransform.flip):
+            return block if readOnly else _copyBlock(block)
+        return block.transformed(invTransform.rotation, invTransform.flip)
 
 
-    def getBlockGlobal(self, position: Vec3iLike) -> Block:
+    def getBlockGlobal(self, position: Vec3iLike, readOnly=False) -> Block:
         """Returns the block at ``position``, ignoring :attr:`.transform`.\n
-        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``."""
+        If the given coordinates are invalid, returns ``Block("minecraft:void_air")``.\n
+        If ``readOnly`` is True, the returned block may be shared with the cache or the buffer, and
+        must not be modified. This avoids copying it."""
         _position = ivec3(*position)
 
         if self.caching:
             block = self._cache.get(_position)
             if block is not None:
-                return copy(block)
+                return block if readOnly else _copyBlock(block)
 
-        if self.buffering:
-            block = self._buffer.get(_position)
-            if block is not None:
-                return copy(block)
+        block = self._bufferedBlockGlobal(_position)
+        if block is not None:
+            return block if readOnly else _copyBlock(block)
 
-        if (
-            self._worldSlice is not None and
-            self._worldSlice.box.contains(_position) and
-            not self._worldSliceDecay[tuple(_position - self._worldSlice.box.offset)]
-        ):
+        if self._worldSlice is not None and self._worldSlice.box.contains(_position):
             block = self._worldSlice.getBlockGlobal(_position)
         else:
-            block = interface.getBlocks(_position, dimension=self.dimension, includeState=True, includeData=True, retries=self.retries, timeout=self.timeout, host=self.host)[0][1]
+            block = interface.getBlocks(_position, dimension=self.dimension, includeState=True, includeData=True, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)[0][1]
 
         if self.caching:
-            self._cache[_position] = copy(block)
+            self._cache[_position] = block
+            return block if readOnly else _copyBlock(block)
 
         return block
 
 
+    def getBlockArray(self, box: Box, states=False, data=False) -> Tuple[List[Block], np.ndarray]:
+        """Returns the blocks in ``box`` as a tuple (palette, indices).\n
+        ``box`` is interpreted as local to the coordinate system defined by :attr:`.transform`.
+        The orientations of the palette blocks are also from the perspective of :attr:`.transform`.\n
+        ``indices`` is a 3D integer array of shape ``box.size``, where the entry at ``[x,y,z]`` is
+        the index in ``palette`` of the block at ``box.offset + (x,y,z)``.\n
+        If ``states`` is False, the palette blocks have no block states, and if ``data`` is False,
+        they have no NBT data. Leaving these out makes retrieval cheaper and the palette smaller.\n
+        Blocks are taken from the cache, the buffer and the world slice where possible, like
+        :meth:`.getBlock` does. All other blocks are retrieved with as few requests as possible."""
+        positions = np.indices(tuple(box.size)).reshape(3, -1).T + np.array(box.offset)
+        palette, indices = self._getBlocksGlobalArray(self.transform.applyToArray(positions), states, data)
+        invTransform = ~self.transform
+        palette = [block.transformed(invTransform.rotation, invTransform.flip) for block in palette]
+        return palette, indices.reshape(tuple(box.size))
+
+
+    def getBlockArrayGlobal(self, box: Box, states=False, data=False) -> Tuple[List[Block], np.ndarray]:
+        """Returns the blocks in ``box`` as a tuple (palette, indices), ignoring :attr:`.transform`.\n
+        See :meth:`.getBlockArray` for details."""
+        positions = np.indices(tuple(box.size)).reshape(3, -1).T + np.array(box.offset)
+        palette, indices = self._getBlocksGlobalArray(positions, states, data)
+        return palette, indices.reshape(tuple(box.size))
+
+
+    def _getBlocksGlobalArray(self, positions: np.ndarray, states: bool, data: bool, retrieve=True) -> Tuple[List[Block], np.ndarray]:
+        """Returns the blocks at the global ``positions``, an (N,3) integer array, as a tuple
+        (palette, indices), where ``indices`` is an (N,) array with the palette index of the block
+        at each position.\n
+        Blocks are taken from the cache, the buffers and the world slice where possible. All other
+        blocks are retrieved with as few requests as possible, or, if ``retrieve`` is False, get
+        index -1. Block states and NBT data are only included if ``states`` and ``data`` are True,
+        respectively."""
+        palette: List[Block] = []
+        paletteIndices: Dict[Tuple, int] = {}
+
+        def paletteIndex(blockId: str, stateItems: Tuple[Tuple[str, str], ...], blockData: Optional[str]) -> int:
+            key = (blockId, stateItems if states else (), blockData if data else None)
+            index = paletteIndices.get(key)
+            if index is None:
+                index = paletteIndices[key] = len(palette)
+                palette.append(Block(key[0], dict(key[1]), key[2]))
+            return index
+
+        indices    = np.full(len(positions), -1, dtype=np.intp)
+        unresolved = np.ones (len(positions), dtype=bool)
+
+        if (self.caching and self._cache) or (self.buffering and self._buffer) or self._pendingFlushes:
+            blockIndices: Dict[int, int] = {} # Blocks are often shared between positions.
+            for i, key in enumerate(starmap(ivec3, positions.tolist())):
+                block = self._cache.get(key) if self.caching else None
+                if block is None:
+                    block = self._bufferedBlockGlobal(key)
+                if block is not None:
+                    index = blockIndices.get(id(block))
+                    if index is None:
+                        index = blockIndices[id(block)] = paletteIndex(block.id, tuple(block.states.items()), block.data)
+                    indices[i] = index
+                    unresolved[i] = False
+
+        if self._worldSlice is not None:
+            local = positions - np.array(self._worldSlice.box.offset)
+            inSlice = unresolved & np.all((local >= 0) & (local < np.array(self._worldSlice.box.size)), axis=1)
+            overlay = self._worldSlice.overlay
+            tagIndices: Dict[int, int] = {} # Block state tags are shared within a chunk section.
+            for i in np.flatnonzero(inSlice).tolist():
+                position = ivec3(*positions[i].tolist())
+                block = overlay.get(position) if overlay else None
+                if block is not None:
+                    indices[i] = paletteIndex(block.id, tuple(block.states.items()), block.data)
+                    continue
+                blockStateTag = self._worldSlice.getBlockStateTagGlobal(position)
+                if blockStateTag is None:
+                    indices[i] = paletteIndex("minecraft:void_air", (), None)
+                    continue
+                if data and self._worldSlice._getBlockEntityTagGlobal(position) is not None: # pylint: disable=protected-access
+                    block = self._worldSlice.getBlockGlobal(position)
+                    indices[i] = paletteIndex(block.id, tuple(block.states.items()), block.data)
+                    continue
+                index = tagIndices.get(id(blockStateTag))
+                if index is None:
+                    block = Block.fromBlockStateTag(blockStateTag) if states else Block(str(blockStateTag["Name"]))
+                    index = tagIndices[id(blockStateTag)] = paletteIndex(block.id, tuple(block.states.items()), None)
+                indices[i] = index
+            unresolved &= ~inSlice
+
+        if retrieve and unresolved.any():
+            readPalette, readIndices = self._getBlocksGlobalBatched(positions[unresolved], states, data)
+            paletteMap = np.array([paletteIndex(block.id, tuple(block.states.items()), block.data) for block in readPalette], dtype=np.intp)
+            indices[unresolved] = paletteMap[readIndices]
+
+        return palette, indices
+
+
     def getBiome(self, position: Vec3iLike) -> str:
         """Returns the biome at ``position``.\n
         ``position`` is interpreted as local to the coordinate system defined by :attr:`.transform`.\n
@@ -464,14 +945,10 @@ class Editor:
     def getBiomeGlobal(self, position: Vec3iLike) -> str:
         """Returns the biome at ``position``, ignoring :attr:`.transform`.\n
         If the given coordinates are invalid, returns an empty string."""
-        if (
-            self._worldSlice is not None and
-            self._worldSlice.box.contains(position) and
-            not self._worldSliceDecay[tuple(ivec3(position) - self._worldSlice.box.offset)]
-        ):
+        if self._worldSlice is not None and self._worldSlice.box.contains(position):
             return self._worldSlice.getBiomeGlobal(position)
 
-        return interface.getBiomes(position, dimension=self.dimension, retries=self.retries, timeout=self.timeout, host=self.host)[0][1]
+        return interface.getBiomes(position, dimension=self.dimension, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)[0][1]
 
 
     def placeBlock(
@@ -500,13 +977,18 @@ class Editor:
     ) -> bool:
         """Places ``block`` at ``position``, ignoring :attr:`.transform`.\n
         If ``position`` is iterable (e.g. a list), ``block`` is placed at all positions.
-        In this case, buffering is temporarily enabled for better performance.\n
+        In this case, buffering is temporarily enabled for better performance, and if ``replace``
+        is given, the blocks at all positions are retrieved at once before any block is placed.\n
         If ``block`` is a sequence (e.g. a list), blocks are sampled randomly.\n
         Returns whether the placement succeeded fully."""
 
         if hasattr(position, "__len__") and len(position) == 3 and isinstance(position[0], Integral):
             return self._placeSingleBlockGlobal(position, block, replace)
 
+        if replace is not None:
+            positions = np.array([tuple(pos) for pos in position], dtype=np.int64).reshape(-1, 3)
+            return self.placeBlockArrayGlobal(positions, block, replace=replace)
+
         oldBuffering = self.buffering
         self.buffering = True
         success = eagerAll(self._placeSingleBlockGlobal(ivec3(*pos), block, replace) for pos in position)
@@ -514,6 +996,216 @@ class Editor:
         return success
 
 
+    def placeBlockArray(
+        self,
+        positions:      np.ndarray,
+        block:          Union[Block, Sequence[Block]],
+        indices:        Optional[np.ndarray] = None,
+        replace:        Optional[Union[str, Iterable[str]]] = None
+    ) -> bool:
+        """Places blocks at ``positions``, an (N,3) integer array.\n
+        ``positions`` is interpreted as local to the coordinate system defined by :attr:`.transform`.\n
+        If ``block`` is a sequence (e.g. a list), it is used as a palette: ``indices`` should then
+        be an (N,) integer array with the index of the palette entry to place at each position.
+        Negative indices place nothing. If ``indices`` is ``None``, blocks are sampled randomly.\n
+        This is equivalent to calling :meth:`.placeBlock` with a list of positions, but the
+        transform, the buffer insertion and the cache updates are performed as array operations,
+        which is much faster for large amounts of blocks.
+        Buffering is temporarily enabled.\n
+        Returns whether the placement succeeded fully."""
+        globalPositions = self.transform.applyToArray(positions)
+        globalBlock = transformedBlockOrPalette(block, self.transform.rotation, self.transform.flip)
+        return self.placeBlockArrayGlobal(globalPositions, globalBlock, indices, replace)
+
+
+    def placeBlockArrayGlobal(
+        self,
+        positions:      np.ndarray,
+        block:          Union[Block, Sequence[Block]],
+        indices:        Optional[np.ndarray] = None,
+        replace:        Optional[Union[str, Iterable[str]]] = None
+    ) -> bool:
+        """Places blocks at ``positions``, an (N,3) integer array, ignoring :attr:`.transform`.\n
+        See :meth:`.placeBlockArray` for details.\n
+        Returns whether the placement succeeded fully."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        palette = [block] if isinstance(block, Block) else list(block)
+
+        if indices is None:
+            if len(palette) == 1:
+                indices = np.zeros(len(positions), dtype=np.intp)
+            else:
+                indices = np.array(random.choices(range(len(palette)), k=len(positions)), dtype=np.intp)
+        else:
+            indices = np.asarray(indices, dtype=np.intp).ravel()
+            if len(indices) != len(positions):
+                raise ValueError(f"Got {len(positions)} positions, but {len(indices)} palette indices.")
+
+        # Negative indices and blocks without an id place nothing. The extra entry at the end of
+        # placeable is selected by negative indices.
+        placeable = np.array([bool(paletteBlock.id) for paletteBlock in palette] + [False])
+        keep = placeable[np.where(indices >= 0, indices, len(palette))]
+
+        if replace is not None:
+            keep[keep] = self._replaceMask(positions[keep], frozenset([replace] if isinstance(replace, str) else replace))
+
+        if self._skipUnchanged:
+            # Only the last write to a position determines its final block, so earlier writes to
+            # the same position must not be compared against the world on their own.
+            keep[keep] = _lastOccurrenceMask(positions[keep])
+            keep[keep] = ~self._unchangedMask(positions[keep], palette, indices[keep])
+
+        positions = positions[keep]
+        indices   = indices[keep]
+        if len(positions) == 0:
+            return True
+
+        oldBuffering = self.buffering
+        self.buffering = True
+        self._placeBlockArrayGlobalBuffered(positions, palette, indices)
+        self.buffering = oldBuffering
+        return True
+
+
+    def placeBlockVolume(
+        self,
+        box:            Box,
+        palette:        Sequence[Block],
+        indices:        np.ndarray,
+        replace:        Optional[Union[str, Iterable[str]]] = None
+    ) -> bool:
+        """Places the blocks described by ``indices`` in ``box``.\n
+        ``box`` is interpreted as local to the coordinate system defined by :attr:`.transform`.\n
+        ``indices`` is a 3D integer array of shape ``box.size``, where the entry at ``[x,y,z]`` is
+        the index in ``palette`` of the block to place at ``box.offset + (x,y,z)``. Negative indices
+        place nothing.\n
+        See :meth:`.placeBlockArray` for details.\n
+        Returns whether the placement succeeded fully."""
+        positions, indices = _volumeToArrays(box, indices)
+        return self.placeBlockArray(positions, palette, indices, replace)
+
+
+    def placeBlockVolumeGlobal(
+        self,
+        box:            Box,
+        palette:        Sequence[Block],
+        indices:        np.ndarray,
+        replace:        Optional[Union[str, Iterable[str]]] = None
+    ) -> bool:
+        """Places the blocks described by ``indices`` in ``box``, ignoring :attr:`.transform`.\n
+        See :meth:`.placeBlockVolume` for details.\n
+        Returns whether the placement succeeded fully."""
+        positions, indices = _volumeToArrays(box, indices)
+        return self.placeBlockArrayGlobal(positions, palette, indices, replace)
+
+
+    def _unchangedMask(self, positions: np.ndarray, palette: List[Block], indices: np.ndarray) -> np.ndarray:
+        """Returns a boolean array indicating for each of the global ``positions`` whether the block
+        from ``palette`` selected by ``indices`` is already known to be there, and counts those
+        positions in :attr:`.skippedWrites`."""
+        knownPalette, knownIndices = self._getBlocksGlobalArray(positions, states=True, data=True, retrieve=False)
+        same = np.array(
+            [[_sameBlock(knownBlock, block) for block in palette] for knownBlock in knownPalette] + [[False] * len(palette)],
+            dtype=bool
+        )
+        unchanged = same[knownIndices, indices] # Index -1 selects the extra row of False
+        self._skippedWrites += int(np.count_nonzero(unchanged))
+        return unchanged
+
+
+    def _replaceMask(self, positions: np.ndarray, replace: FrozenSet[str]) -> np.ndarray:
+        """Returns a boolean array indicating for each of the global ``positions`` whether the
+        block there has an id in ``replace``."""
+        palette, indices = self._getBlocksGlobalArray(positions, states=False, data=False)
+        return np.array([block.id in replace for block in palette], dtype=bool)[indices]
+
+
+    def _getBlocksGlobalBatched(self, positions: np.ndarray, states: bool, data: bool) -> Tuple[List[Block], np.ndarray]:
+        """Retrieves the blocks at the global ``positions`` from the server, ignoring the cache, the
+        buffer and the world slice. Block states and NBT data are only requested if ``states`` and
+        ``data`` are True, respectively.\n
+        The bounding box of ``positions`` is retrieved with a single request, unless it is much
+        larger than the amount of positions: then, the positions are grouped by chunk section.
+        If caching is enabled and both block states and NBT data are requested, the retrieved blocks
+        are added to the cache.\n
+        Returns a tuple (palette, indices), where ``indices`` is an (N,) array with the palette
+        index of the block at each position."""
+        regions = _batchedReadRegions(positions)
+
+        palette: List[Block] = []
+        paletteIndices: Dict[Tuple, int] = {}
+        indices = np.empty(len(positions), dtype=np.intp)
+        for region in regions:
+            regionPositions = positions[region]
+            begin = regionPositions.min(axis=0)
+            size  = regionPositions.max(axis=0) - begin + 1
+            readPositions, readPalette, readIndices = interface.getBlocksAsArrays(begin.tolist(), size.tolist(), dimension=self.dimension, includeState=states, includeData=data, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
+
+            # Positions the server returns nothing for (e.g. outside the world) are void air.
+            readPalette = readPalette + [Block("minecraft:void_air")]
+            paletteMap = np.empty(len(readPalette), dtype=np.intp)
+            for i, block in enumerate(readPalette):
+                key = (block.id, tuple(block.states.items()), block.data)
+                index = paletteIndices.get(key)
+                if index is None:
+                    index = paletteIndices[key] = len(palette)
+                    palette.append(block)
+                paletteMap[i] = index
+
+            volume = np.full(tuple(size.tolist()), len(readPalette) - 1, dtype=np.intp)
+            volume[tuple((readPositions - begin).T)] = readIndices
+            indices[region] = paletteMap[volume[tuple((regionPositions - begin).T)]]
+
+        if self.caching and states and data:
+            cacheCount = self._cache.maxSize if self._cache.maxSize > 0 else len(positions)
+            for key, index in zip(starmap(ivec3, positions[-cacheCount:].tolist()), indices[-cacheCount:].tolist()):
+                self._cache[key] = palette[index]
+
+        return palette, indices
+
+
+    def _placeBlockArrayGlobalBuffered(self, positions: np.ndarray, palette: List[Block], indices: np.ndarray) -> None:
+        """Adds the blocks from ``palette`` selected by ``indices`` at the global ``positions`` to the
+        buffer, flushing it whenever it is full, and updates the cache.\n
+        Assumes buffering is enabled."""
+        keys = list(starmap(ivec3, positions.tolist()))
+        blocks = [palette[i] for i in indices.tolist()]
+
+        # Cumulative estimated request sizes, for the byte limit
+        cumulativeBytes = None
+        if self._bufferByteLimit is not None:
+            paletteBytes = np.array([buffer_tools.placementSize(paletteBlock) for paletteBlock in palette])
+            cumulativeBytes = np.cumsum(paletteBytes[indices])
+
+        start = 0
+        while start < len(keys):
+            startBytes = int(cumulativeBytes[start - 1]) if cumulativeBytes is not None and start > 0 else 0
+            if len(self._buffer) >= self._bufferLimit or (
+                cumulativeBytes is not None and self._buffer and
+                self._bufferBytes + int(cumulativeBytes[start]) - startBytes > self._bufferByteLimit
+            ):
+                self.flushBuffer()
+
+            end = min(len(keys), start + self._bufferLimit - len(self._buffer))
+            if cumulativeBytes is not None:
+                fitting = int(np.searchsorted(cumulativeBytes, startBytes + self._bufferByteLimit - self._bufferBytes, side="right"))
+                end = min(end, max(start + 1, fitting))
+                self._bufferBytes += int(cumulativeBytes[end - 1]) - startBytes
+
+            chunk = keys[start:end]
+            if self._buffer:
+                # Ensure overwritten blocks are moved to the *end* of the buffer.
+                for key in self._buffer.keys() & chunk:
+                    del self._buffer[key]
+            self._buffer.update(zip(chunk, blocks[start:end]))
+            start = end
+
+        if self.caching:
+            cacheCount = self._cache.maxSize if self._cache.maxSize > 0 else len(keys)
+            for key, block in zip(keys[-cacheCount:], blocks[-cacheCount:]):
+                self._cache[key] = block
+
+
     def _placeSingleBlockGlobal(
         self,
         position:       ivec3,
@@ -528,7 +1220,7 @@ class Editor:
         if replace is not None:
             if isinstance(replace, str):
                 replace = [replace]
-            if self.getBlockGlobal(position).id not in replace:
+            if self.getBlockGlobal(position, readOnly=True).id not in replace:
                 return True
 
         # Select block from palette
@@ -537,10 +1229,19 @@ class Editor:
         if not block.id:
             return True
 
+        if self._skipUnchanged:
+            knownBlock = self._knownBlockGlobal(position)
+            if knownBlock is not None and _sameBlock(knownBlock, block):
+                self._skippedWrites += 1
+                return True
+
+        # Buffered blocks are written to the world slice once their flush is confirmed.
         if self._buffering:
             success = self._placeSingleBlockGlobalBuffered(position, block)
         else:
             success = self._placeSingleBlockGlobalDirect(position, block)
+            if success:
+                self._updateWorldSlice([(position, block)])
 
         if not success:
             return False
@@ -548,16 +1249,50 @@ class Editor:
         if self.caching:
             self._cache[position] = block
 
-        if self._worldSlice is not None and self._worldSlice.rect.contains(dropY(position)):
-            self._worldSliceDecay[tuple(position - self._worldSlice.box.offset)] = True
-
         return True
 
 
+    def _knownBlockGlobal(self, position: ivec3) -> Optional[Block]:
+        """Returns the block at ``position`` according to the buffers, the cache or the world slice,
+        or ``None`` if it is not known without a request. The returned block must not be modified."""
+        block = self._bufferedBlockGlobal(position)
+        if block is not None:
+            return block
+        if self.caching:
+            block = self._cache.get(position)
+            if block is not None:
+                return block
+        if self._worldSlice is not None and self._worldSlice.box.contains(position):
+            block = self._worldSlice.overlay.get(position)
+            return block if block is not None else self._worldSlice.getBlockGlobal(position)
+        return None
+
+
+    def _bufferedBlockGlobal(self, position: ivec3) -> Optional[Block]:
+        """Returns the block that is buffered or being flushed at ``position``, or ``None``.
+        The returned block must not be modified."""
+        if self.buffering:
+            block = self._buffer.get(position)
+            if block is not None:
+                return block
+        for _, pendingBuffer, _ in reversed(self._pendingFlushes):
+            block = pendingBuffer.get(position)
+            if block is not None:
+                return block
+        return None
+
+
+    def _updateWorldSlice(self, blocks: Iterable[Tuple[ivec3, Block]]) -> None:
+        """Writes the placed ``blocks`` that lie inside the cached world slice to it, if there is one."""
+        if self._worldSlice is not None:
+            box = self._worldSlice.box
+            self._worldSlice.setBlocksGlobal((position, block) for position, block in blocks if box.contains(position))
+
+
     def _placeSingleBlockGlobalDirect(self, position: ivec3, block: Block) -> bool:
         """Place a single block in the world directly.\n
         Returns whether the placement succeeded."""
-        result = interface.placeBlocks([(position, block)], dimension=self.dimension, doBlockUpdates=self.doBlockUpdates, spawnDrops=self.spawnDrops, retries=self.retries, timeout=self.timeout, host=self.host)
+        result = interface.placeBlocks([(position, block)], dimension=self.dimension, doBlockUpdates=self.doBlockUpdates, spawnDrops=self.spawnDrops, compressionThreshold=self.compressionThreshold, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
         if not result[0][0]:
             logger.error("Server returned error upon placing block:\n  %s", result[0][1])
             return False
@@ -567,74 +1302,291 @@ class Editor:
     def _placeSingleBlockGlobalBuffered(self, position: ivec3, block: Block) -> bool:
         """Place a block in the buffer and send once limit is exceeded.\n
         Returns whether placement succeeded."""
-        if len(self._buffer) >= self.bufferLimit:
-            self.flushBuffer()
+        if self._bufferByteLimit is None:
+            if len(self._buffer) >= self._bufferLimit:
+                self.flushBuffer()
+        else:
+            size = buffer_tools.placementSize(block)
+            if len(self._buffer) >= self._bufferLimit or (self._buffer and self._bufferBytes + size > self._bufferByteLimit):
+                self.flushBuffer()
+            self._bufferBytes += size
         self._buffer.pop(position, None) # Ensure the new block is added at the *end* of the buffer.
         self._buffer[position] = block
         return True
 
 
+    def _finishFlush(self, blockCount: int, seconds: float, placedBlocks: List[Tuple[ivec3, Block]]) -> None:
+        """Records the duration of a finished buffer flush and writes the blocks it placed to the
+        world slice.\n
+        Must be called on the thread that uses this editor, not on a flush worker thread."""
+        self._recordFlush(blockCount, seconds)
+        self._updateWorldSlice(placedBlocks)
+
+
+    def _recordFlush(self, blockCount: int, seconds: float) -> None:
+        """Updates the buffer flush statistics and, if enabled, the adaptive buffer limit.\n
+        Must be called on the thread that uses this editor, not on a flush worker thread."""
+        if seconds <= 0:
+            return
+        throughput = blockCount / seconds
+        if self._flushThroughput is None or self._flushDuration is None:
+            self._flushThroughput, self._flushDuration = throughput, seconds
+        else:
+            self._flushThroughput += _FLUSH_STATS_SMOOTHING * (throughput - self._flushThroughput)
+            self._flushDuration   += _FLUSH_STATS_SMOOTHING * (seconds    - self._flushDuration)
+
+        # Small flushes (e.g. manual ones) are dominated by the request overhead, so they say
+        # little about the throughput of a full buffer.
+        if self._adaptiveBufferLimit and blockCount >= self._bufferLimit // 2:
+            scale = min(2.0, max(0.5, self._targetFlushDuration / seconds))
+            self._bufferLimit = min(_ADAPTIVE_BUFFER_LIMIT_MAX, max(_ADAPTIVE_BUFFER_LIMIT_MIN, round(self._bufferLimit * scale)))
+
+
     def flushBuffer(self) -> None:
         """Flushes the block placement buffer.\n
         If multithreaded buffer flushing is enabled, the worker threads can be awaited with
         :meth:`.awaitBufferFlushes`."""
 
-        def flush(blockBuffer: Dict[ivec3, Block], commandBuffer: List[str]):
+        # Multithreaded flushes keep their buffers intact, since later flushes compare positions
+        # with them. They may run on a worker thread, so they do not change the editor's state:
+        # they return (blockCount, seconds, placedBlocks), which is applied on the calling thread
+        # by _finishFlush. placedBlocks are the blocks the server confirmed.
+        def flush(
+            blockBuffer: Dict[ivec3, Block], commandBuffer: List[str], clear: bool
+        ) -> Optional[Tuple[int, float, List[Tuple[ivec3, Block]]]]:
+            result = None
+
             # Flush block buffer
             if blockBuffer:
-                response = interface.placeBlocks(blockBuffer.items(), dimension=self.dimension, doBlockUpdates=self._bufferDoBlockUpdates, spawnDrops=self.spawnDrops, retries=self.retries, timeout=self.timeout, host=self.host)
-                blockBuffer.clear()
-
-                for entry in response:
-                    if not entry[0]:
-                        logger.error("Server returned error upon placing buffered block:\n  %s", entry[1])
+                startTime = time.perf_counter()
+                failedPositions = self._placeBufferedBlocks(list(blockBuffer.items()), self._bufferDoBlockUpdates)
+                seconds = time.perf_counter() - startTime
+                placedBlocks = [item for item in blockBuffer.items() if item[0] not in failedPositions]
+                result = (len(blockBuffer), seconds, placedBlocks)
+                if clear:
+                    blockBuffer.clear()
 
             # Flush command buffer
             if commandBuffer:
-                response = interface.runCommand("\n".join(commandBuffer), dimension=self.dimension, retries=self.retries, timeout=self.timeout, host=self.host)
-                commandBuffer.clear()
+                response = interface.runCommand("\n".join(commandBuffer), dimension=self.dimension, compressionThreshold=self.compressionThreshold, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
+                if clear:
+                    commandBuffer.clear()
 
                 for entry in response:
                     if not entry[0]:
                         logger.error("Server returned error upon running buffered command:\n  %s", entry[1])
 
+            return result
+
         if self._multithreading:
-            # Clean up finished buffer flush futures
-            self._bufferFlushFutures = [
-                future for future in self._bufferFlushFutures if not future.done()
+            self._collectFinishedFlushes()
+            while len(self._pendingFlushes) >= max(1, self._maxPendingFlushes):
+                futures.wait([future for future, _, _ in self._pendingFlushes], return_when=futures.FIRST_COMPLETED)
+                self._collectFinishedFlushes()
+            self._raiseFlushError()
+
+            blockBuffer   = self._buffer
+            commandBuffer = self._commandBuffer
+            if not blockBuffer and not commandBuffer:
+                return
+            hasCommands = bool(commandBuffer)
+
+            # Flushes must wait for earlier flushes that write to the same positions. Commands can
+            # affect any position, so flushes with commands wait for (and block) all other flushes.
+            predecessors = [
+                future for future, otherBlockBuffer, otherHasCommands in self._pendingFlushes
+                if hasCommands or otherHasCommands or not blockBuffer.keys().isdisjoint(otherBlockBuffer)
             ]
-
-            # Shallow copies are good enough here
-            blockBufferCopy   = self._buffer
-            commandBufferCopy = self._commandBuffer
             def task():
-                flush(blockBufferCopy, commandBufferCopy)
+                if predecessors:
+                    futures.wait(predecessors)
+                return flush(blockBuffer, commandBuffer, clear=False)
 
             # Submit the task
             future = self._bufferFlushExecutor.submit(task)
-            self._bufferFlushFutures.append(future)
+            self._pendingFlushes.append((future, blockBuffer, hasCommands))
 
-            # Empty the buffers (the thread has copies of the references)
+            # Empty the buffers (the task has the references)
             self._buffer = {}
             self._commandBuffer = []
 
         else: # No multithreading
-            flush(self._buffer, self._commandBuffer)
+            result = flush(self._buffer, self._commandBuffer, clear=True)
+            if result is not None:
+                self._finishFlush(*result)
+
+        self._bufferBytes = 0
+
+
+    def _placeBufferedBlocks(self, blocks: List[Tuple[ivec3, Block]], doBlockUpdates: bool) -> Set[ivec3]:
+        """Places ``blocks`` in order, using ``fill`` commands and structures where
+        :attr:`.fillThreshold` and :attr:`.structureFlushing` allow it.\n
+        A box or dense cell is placed at the position of its last block in ``blocks``, and only if
+        none of the blocks in between lies next to it (see :func:`.buffer_tools.groupAnchors`).
+        The individual blocks are batched between them.\n
+        Returns the positions of the blocks that the server failed to place."""
+        boxAnchors:  Dict[int, Tuple[Box, Block]] = {}
+        cellAnchors: Dict[int, List[Tuple[ivec3, Block]]] = {}
+        grouped: Set[ivec3] = set()
+
+        if self._fillThreshold is not None and doBlockUpdates:
+            boxes, _ = buffer_tools.coalesceBoxes(blocks, self._fillThreshold, self._fillLimit)
+            boxPositions = [list(box) for box, _ in boxes]
+            for box, positions, anchor in zip(boxes, boxPositions, buffer_tools.groupAnchors(blocks, boxPositions)):
+                if anchor is not None:
+                    boxAnchors[anchor] = box
+                    grouped.update(positions)
+
+        if self._structureFlushing:
+            denseCells, _ = buffer_tools.splitDenseCells(item for item in blocks if item[0] not in grouped)
+            cellPositions = [[position for position, _ in cell] for cell in denseCells]
+            for cell, positions, anchor in zip(denseCells, cellPositions, buffer_tools.groupAnchors(blocks, cellPositions)):
+                if anchor is not None:
+                    cellAnchors[anchor] = cell
+                    grouped.update(positions)
+
+        failedPositions: Set[ivec3] = set()
+        batch: List[Tuple[ivec3, Block]] = []
+        pendingBoxes: List[Tuple[Box, Block]] = []
+
+        # Consecutive boxes share a single request.
+        def placeBoxes() -> None:
+            if pendingBoxes:
+                batch.extend(self._fillBoxes(pendingBoxes))
+                pendingBoxes.clear()
+
+        def placeBatch() -> None:
+            if batch:
+                response = self._placeBlocksResubmitting(batch, doBlockUpdates)
+                for (position, _), entry in zip(batch, response):
+                    if not entry[0]:
+                        failedPositions.add(position)
+                        logger.error("Server returned error upon placing buffered block:\n  %s", entry[1])
+                batch.clear()
+
+        for i, item in enumerate(blocks):
+            if item[0] not in grouped:
+                placeBoxes()
+                batch.append(item)
+            if i in boxAnchors:
+                placeBatch()
+                pendingBoxes.append(boxAnchors[i])
+            elif i in cellAnchors:
+                placeBoxes()
+                placeBatch()
+                if not self._placeStructureCell(cellAnchors[i], doBlockUpdates):
+                    batch.extend(cellAnchors[i])
+        placeBoxes()
+        placeBatch()
+        return failedPositions
+
+
+    def _placeBlocksResubmitting(self, blocks: List[Tuple[ivec3, Block]], doBlockUpdates: bool) -> List[Tuple[bool, Union[int, str]]]:
+        """Places ``blocks`` with a single request, like :func:`.interface.placeBlocks`.\n
+        If the request still fails with a server error or a timeout after all retries, the blocks
+        are resubmitted in two halves, recursively, so that a single problematic block or an
+        oversized batch does not cause the whole batch to be lost. Sub-batches are not retried.
+        Blocks that fail on their own are reported as failed placements. If more than
+        ``_MAX_RESUBMISSION_FAILURES`` requests fail, the last error is raised."""
+        failures = 0
+
+        def place(batch: List[Tuple[ivec3, Block]], retries: int) -> List[Tuple[bool, Union[int, str]]]:
+            nonlocal failures
+            try:
+                return interface.placeBlocks(batch, dimension=self.dimension, doBlockUpdates=doBlockUpdates, spawnDrops=self.spawnDrops, compressionThreshold=self.compressionThreshold, retries=retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
+            except (InterfaceInternalError, InterfaceTimeoutError) as e:
+                failures += 1
+                if failures > _MAX_RESUBMISSION_FAILURES:
+                    raise
+                if len(batch) == 1:
+                    return [(False, f"{e} (block {batch[0][1]} at {tuple(batch[0][0])})")]
+                logger.warning("Placing a batch of %i blocks failed (%s). Resubmitting it in two halves.", len(batch), e)
+                middle = len(batch) // 2
+                return place(batch[:middle], 0) + place(batch[middle:], 0)
+
+        return place(blocks, self.retries)
+
+
+    def _fillBoxes(self, boxes: List[Tuple[Box, Block]]) -> List[Tuple[ivec3, Block]]:
+        """Places each (box, block) in ``boxes`` with a ``fill`` command, in a single request.\n
+        Returns the blocks of the boxes that could not be filled."""
+        if not boxes:
+            return []
+        mode = " destroy" if self.spawnDrops else ""
+        commands = "\n".join(f"fill {b.begin.x} {b.begin.y} {b.begin.z} {b.last.x} {b.last.y} {b.last.z} {block}{mode}" for b, block in boxes)
+        try:
+            response = interface.runCommand(commands, dimension=self.dimension, compressionThreshold=self.compressionThreshold, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
+        except (InterfaceInternalError, InterfaceTimeoutError) as e:
+            logger.warning("Filling %i boxes failed (%s). Placing their blocks individually instead.", len(boxes), e)
+            response = [(False, str(e))] * len(boxes)
+        failedBlocks: List[Tuple[ivec3, Block]] = []
+        for (box, block), (success, _) in zip(boxes, response):
+            if not success:
+                failedBlocks += [(position, block) for position in box]
+        return failedBlocks
+
+
+    def _placeStructureCell(self, cell: List[Tuple[ivec3, Block]], doBlockUpdates: bool) -> bool:
+        """Places the blocks of ``cell`` as a single structure.\n
+        Returns whether this succeeded. On failure, none or all of the blocks may have been placed."""
+        origin, structureData = buffer_tools.blocksToStructure(cell)
+        try:
+            interface.placeStructure(structureData, origin, dimension=self.dimension, doBlockUpdates=doBlockUpdates, spawnDrops=self.spawnDrops, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
+        except (InterfaceInternalError, InterfaceTimeoutError) as e:
+            logger.warning("Placing a dense region of %i blocks at %s as a structure failed (%s). Placing its blocks individually instead.", len(cell), tuple(origin), e)
+            return False
+        return True
+
+
+    def _collectFinishedFlushes(self) -> None:
+        """Removes finished flushes from the pending flushes, finishes the successful ones (see
+        :meth:`._finishFlush`), and stores the first exception that occurred in any of them.\n
+        This runs on the calling thread, so it is safe to update the buffer settings here."""
+        stillPending = []
+        for entry in self._pendingFlushes:
+            future = entry[0]
+            if not future.done():
+                stillPending.append(entry)
+                continue
+            error = future.exception()
+            if error is not None:
+                if self._flushError is None:
+                    self._flushError = error
+                else:
+                    logger.error("Another buffer flush failed as well: %s", error)
+            elif future.result() is not None:
+                self._finishFlush(*future.result())
+        self._pendingFlushes = stillPending
+
+
+    def _raiseFlushError(self) -> None:
+        """Raises the stored exception of a failed buffer flush, if any."""
+        error, self._flushError = self._flushError, None
+        if error is not None:
+            raise error
 
 
     def awaitBufferFlushes(self, timeout: Optional[float] = None) -> None:
         """Awaits all pending buffer flushes.\n
         If ``timeout`` is not ``None``, waits for at most ``timeout`` seconds.\n
+        Raises the first exception that occurred in a buffer flush since the last call to this
+        method or :meth:`.flushBuffer`.\n
         Does nothing if no buffer flushes have occured while multithreaded buffer flushing was
         enabled."""
-        self._bufferFlushFutures = futures.wait(self._bufferFlushFutures, timeout).not_done
+        futures.wait([future for future, _, _ in self._pendingFlushes], timeout)
+        self._collectFinishedFlushes()
+        self._raiseFlushError()
 
 
-    def loadWorldSlice(self, rect: Optional[Rect]=None, heightmapTypes: Optional[Iterable[str]] = None, cache=False) -> WorldSlice:
+    def loadWorldSlice(self, rect: Optional[Rect]=None, heightmapTypes: Optional[Iterable[str]] = None, cache=False, lazy=False, decodeWorkers: Optional[int] = None) -> WorldSlice:
         """Loads the world slice for the given XZ-rectangle.\n
         The rectangle must be given in **global coordinates**; :attr:`.transform` is ignored.\n
         If ``rect`` is None, the world slice of the current build area is loaded.\n
         If ``heightmapTypes`` is None, all heightmaps are loaded.\n
+        If ``lazy`` is ``True``, the chunk data is decoded on first access instead of while loading
+        (see :class:`.WorldSlice`).\n
+        If ``decodeWorkers`` is set, the chunk data is decoded in a pool of that many processes
+        (see :class:`.WorldSlice`).\n
         If ``cache`` is ``True``, the loaded worldSlice is cached in this editor. It can then be
         accessed through :attr:`.worldSlice`.
         If a world slice was already cached, it is replaced.
@@ -644,33 +1596,32 @@ class Editor:
         cached world slice."""
         if rect is None:
             rect = self.getBuildArea().toRect()
-        worldSlice = WorldSlice(rect, dimension=self.dimension, heightmapTypes=heightmapTypes, retries=self.retries, timeout=self.timeout, host=self.host)
+        worldSlice = WorldSlice(rect, dimension=self.dimension, heightmapTypes=heightmapTypes, retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics, lazy=lazy, decodeWorkers=decodeWorkers)
         if cache:
-            self._worldSlice      = worldSlice
-            self._worldSliceDecay = np.zeros(self._worldSlice.box.size, dtype=bool)
+            self._worldSlice = worldSlice
         return worldSlice
 
 
     def updateWorldSlice(self) -> WorldSlice:
         """Updates the cached world slice.\n
-        Loads and caches new world slice for the same area and with the same heightmaps as the
-        currently cached one.
+        Loads and caches new world slice for the same area, with the same heightmaps and decoded in
+        the same way as the currently cached one.
         Raises a :exc:`RuntimeError` if no world slice is cached.
         """
         if self._worldSlice is None:
             raise RuntimeError("No world slice is cached. Call .loadWorldSlice() with cache=True first.")
-        return self.loadWorldSlice(self._worldSlice.rect, self._worldSlice.heightmaps.keys(), cache=True)
+        return self.loadWorldSlice(self._worldSlice.rect, list(self._worldSlice.heightmaps.keys()), cache=True, lazy=self._worldSlice.lazy, decodeWorkers=self._worldSlice.decodeWorkers)
 
 
     def getMinecraftVersion(self) -> str:
         """Returns the Minecraft version as a string."""
-        return interface.getVersion(retries=self.retries, timeout=self.timeout, host=self.host)
+        return interface.getVersion(retries=self.retries, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
 
 
     def checkConnection(self) -> None:
         """Raises an :exc:`InterfaceConnectionError` if the GDMC HTTP interface cannot be reached.\n
         Does not perform any retries."""
-        interface.getVersion(retries=0, timeout=self.timeout, host=self.host)
+        interface.getVersion(retries=0, timeout=self.timeout, deadline=self.deadline, host=self.host, session=self._session, metrics=self._metrics)
 
 
     @contextmanager
@@ -77,7 +77,7 @@ def flood_search_3D(
 
         visited.add(point)
 
-        if editor.getBlock(point).id not in search_block_ids:
+        if editor.getBlock(point, readOnly=True).id not in search_block_ids:
             return
 
         result.add(point)
@@ -140,7 +140,7 @@ def placeContainerBlock(
     if inventorySize is None:
         raise ValueError(f'"{block}" is not a known container block. Make sure you are using its namespaced ID.')
 
-    if not replace and editor.getBlock(position).id != block.id:
+    if not replace and editor.getBlock(position, readOnly=True).id != block.id:
         return
 
     editor.placeBlock(position, block)
@@ -159,7 +159,7 @@ def placeContainerBlock(
 
 def setContainerItem(editor: Editor, position: Vec3iLike, itemPosition: Vec2iLike, item: str, amount: int = 1) -> None:
     """Sets the item at ``itemPosition`` in the container block at ``position`` to the item with id ``item``."""
-    blockId = editor.getBlock(position).id
+    blockId = editor.getBlock(position, readOnly=True).id
     inventorySize = lookup.CONTAINER_BLOCK_TO_INVENTORY_SIZE.get(blockId)
     if inventorySize is None:
         raise ValueError(f'The block at {tuple(position)} is "{blockId}", which is not a known container block.')
@@ -173,7 +173,7 @@ def getOptimalFacingDirection(editor: Editor, pos: Vec3iLike) -> List[str]:
     Ranks directions by obtrusiveness first, and by obtrusiveness of the opposite direction second."""
     directions = ["north", "east", "south", "west"]
     obtrusivenesses = np.array([
-        getObtrusiveness(editor.getBlock(ivec3(*pos) + facingToVector(direction)))
+        getObtrusiveness(editor.getBlock(ivec3(*pos) + facingToVector(direction), readOnly=True))
         for direction in directions
     ])
     candidates              = np.nonzero(obtrusivenesses == np.min(obtrusivenesses))[0]
@@ -9,8 +9,12 @@ class InterfaceConnectionError(InterfaceError):
     """An error occured when trying to connect to the GDMC HTTP interface"""
 
 
+class InterfaceTimeoutError(InterfaceError):
+    """A request to the GDMC HTTP interface timed out"""
+
+
 class InterfaceInternalError(InterfaceError):
-    """The GDMC HTTP interface reported an internal server error (500)"""
+    """The GDMC HTTP interface reported an internal server error (5xx)"""
 
 
 class BuildAreaNotSetError(InterfaceError):
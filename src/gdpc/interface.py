@@ -2,48 +2,266 @@
 
 These functions are quite low-level. It is recommended to use the higher-level
 :class:`.editor.Editor` class instead.
+
+Every endpoint function accepts an optional ``session``. If it is given, the request is sent
+through that :class:`requests.Session`, which reuses keep-alive connections. Otherwise, a new
+connection is opened for the request. See :class:`.SessionPool`.
+
+Requests that fail to connect, time out or receive a server error (5xx) are retried up to
+``retries`` times, with a randomized exponentially growing delay between attempts (see
+:func:`.utils.exponentialBackoff`). A request that times out or fails on the server after it was
+sent may still have been (partly) executed, so timeouts and server errors are only retried for
+idempotent requests (see :data:`.IDEMPOTENT_METHODS`); commands and structure placements are only
+retried if they failed to connect. If ``deadline`` is given, the request including all retries
+is given up after about that many seconds: no retry is started if its delay would pass the
+deadline, and the ``timeout`` of each attempt is shortened to the remaining time.
+
+Every request is recorded in :data:`.requestMetrics`. If an endpoint function is given a
+:class:`.MetricsRegistry` as ``metrics``, the request is recorded there as well.
 """
 
 
-from typing import Sequence, Tuple, Optional, List, Dict, Any, Union
-from functools import partial
+from typing import Sequence, Tuple, Optional, List, Dict, Any, Union, Generator, Hashable
+from functools import lru_cache
+from array import array
 import time
+import threading
 from urllib.parse import urlparse
 import logging
 import json
+import gzip
 import io
+import re
 
+import numpy as np
 from glm import ivec3
 from nbt import nbt
 import requests
-from requests.exceptions import ConnectionError as RequestConnectionError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestConnectionError, Timeout as RequestTimeout
 
 from . import __url__
-from .utils import withRetries
+from .utils import withRetries, exponentialBackoff
 from .vector_tools import Vec2iLike, Vec3iLike, Box
 from .block import Block
 from . import exceptions
+from .metrics import MetricsRegistry
 
 
 DEFAULT_HOST = "http://localhost:9000"
 """Default host"""
 
+DEFAULT_POOL_SIZE = 10
+"""Default maximum amount of keep-alive connections per host of a :class:`.SessionPool`"""
+
+RETRY_BACKOFF_BASE = 0.5
+"""Maximum delay in seconds before the first retry of a failed request. It doubles with each retry."""
+
+RETRY_BACKOFF_MAX = 10.0
+"""Upper bound in seconds for the maximum delay between retries of a failed request"""
+
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT"})
+"""HTTP methods of the requests that are retried when they time out or receive a server error.\n
+Sending these requests twice has the same effect as sending them once. This includes block
+placement (``PUT /blocks``), which places the same blocks again."""
+
+COMPRESSION_LEVEL = 1
+"""gzip level used to compress request bodies.\n
+Block and command batches are highly repetitive, so the fastest level already compresses them well."""
+
 
 logger = logging.getLogger(__name__)
 
 
-def _onRequestRetry(e: Exception, retriesLeft: int) -> None:
-    logger.warning(
-        "HTTP request failed! I'll retry in a bit (%i retries left).",
-        retriesLeft
-    )
-    time.sleep(3)
+class CompressionStats:
+    """Counts the bytes of gzip-compressed request and response bodies.
+
+    Only bodies that were actually transferred compressed are counted. The counters are safe to
+    update from multiple threads. The module-level instance :data:`.compressionStats` counts all
+    requests made through this module.
+    """
+
+    def __init__(self) -> None:
+        """Constructs a CompressionStats instance with all counters at zero."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"CompressionStats(bytesSaved={self.bytesSaved})"
+
+    def reset(self) -> None:
+        """Sets all counters to zero."""
+        with self._lock:
+            self.requestBytesUncompressed  = 0 #: Uncompressed size of compressed request bodies
+            self.requestBytesSent          = 0 #: Compressed size of compressed request bodies
+            self.responseBytesUncompressed = 0 #: Uncompressed size of compressed response bodies
+            self.responseBytesReceived     = 0 #: Compressed size of compressed response bodies
+
+    def addRequest(self, uncompressedSize: int, compressedSize: int) -> None:
+        """Records a compressed request body."""
+        with self._lock:
+            self.requestBytesUncompressed += uncompressedSize
+            self.requestBytesSent         += compressedSize
+
+    def addResponse(self, uncompressedSize: int, compressedSize: int) -> None:
+        """Records a compressed response body."""
+        with self._lock:
+            self.responseBytesUncompressed += uncompressedSize
+            self.responseBytesReceived     += compressedSize
+
+    @property
+    def bytesSaved(self) -> int:
+        """The total amount of bytes that compression kept off the wire."""
+        return (
+            self.requestBytesUncompressed  - self.requestBytesSent +
+            self.responseBytesUncompressed - self.responseBytesReceived
+        )
+
+
+compressionStats = CompressionStats()
+"""Compression counters for all requests made through this module"""
+
+requestMetrics = MetricsRegistry()
+"""Metrics of all requests made through this module"""
+
+
+class SessionPool:
+    """Keeps one keep-alive :class:`requests.Session` per host.
+
+    Passing a session from this pool to the endpoint functions of this module makes them reuse open
+    TCP connections instead of opening a new one for every request. Each session keeps up to
+    :attr:`.poolSize` connections to its host alive, so up to that many threads can use the same
+    session concurrently without opening extra connections.
 
+    :class:`.editor.Editor` owns a ``SessionPool`` and passes the session for its current host to
+    every request it makes.
+    """
+
+    def __init__(self, poolSize: int = DEFAULT_POOL_SIZE) -> None:
+        """Constructs an empty SessionPool."""
+        self._poolSize = poolSize
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"SessionPool(poolSize={self._poolSize})"
+
+    @property
+    def poolSize(self) -> int:
+        """The maximum amount of keep-alive connections per host.\n
+        Changing this closes all open sessions. New sessions are created on demand."""
+        return self._poolSize
+
+    @poolSize.setter
+    def poolSize(self, value: int) -> None:
+        if value != self._poolSize:
+            self.close()
+        self._poolSize = value
+
+    def get(self, host: str) -> requests.Session:
+        """Returns the session for ``host``, creating it if it does not exist yet."""
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._poolSize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def close(self) -> None:
+        """Closes all sessions and their connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class _ServerError(Exception):
+    """Raised internally for 5xx responses, so that they are retried."""
+
+    def __init__(self, response: requests.Response) -> None:
+        super().__init__(f"status {response.status_code}")
+        self.response = response
+
+
+def _timeoutWithinDeadline(timeout, deadline: Optional[float], startTime: float):
+    """Returns ``timeout`` shortened to the time left until ``deadline`` seconds after ``startTime``."""
+    if deadline is None:
+        return timeout
+    remaining = max(0.001, deadline - (time.monotonic() - startTime))
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
+
+
+def _compressBody(body: Union[bytes, bytearray], compressionThreshold: Optional[int]) -> Tuple[Union[bytes, bytearray], Dict[str, str]]:
+    """Gzips ``body`` if it is at least ``compressionThreshold`` bytes long.\n
+    Returns the (possibly compressed) body and the headers to send with it."""
+    if compressionThreshold is None or len(body) < compressionThreshold:
+        return body, {}
+    compressedBody = gzip.compress(body, compresslevel=COMPRESSION_LEVEL)
+    compressionStats.addRequest(len(body), len(compressedBody))
+    return compressedBody, {"Content-Encoding": "gzip"}
+
+
+def _acceptEncoding(compressResponse: bool) -> Dict[str, str]:
+    """Returns the headers that request a gzip-compressed response, or an uncompressed one."""
+    return {"Accept-Encoding": "gzip" if compressResponse else "identity"}
+
+
+def _metricsRegistries(metrics: Optional[MetricsRegistry]) -> Tuple[MetricsRegistry, ...]:
+    """Returns the registries a request should be recorded in."""
+    return (requestMetrics,) if metrics is None or metrics is requestMetrics else (requestMetrics, metrics)
+
+
+def _recordBlocks(metrics: Optional[MetricsRegistry], method: str, endpoint: str, blockCount: int, phase: str, seconds: float) -> None:
+    """Records the amount of blocks in a request and the time spent on encoding or decoding them."""
+    for registry in _metricsRegistries(metrics):
+        registry.recordBlocks(method, endpoint, blockCount)
+        registry.recordProcessing(method, endpoint, phase, seconds)
+
+
+def _request(method: str, url: str, *args, retries: int, timeout=None, deadline: Optional[float] = None, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None, **kwargs) -> requests.Response:
+    requestFunction = requests.request if session is None else session.request
+    startTime = time.monotonic()
+    retryCount = 0
+
+    def attempt() -> requests.Response:
+        response = requestFunction(method, url, *args, timeout=_timeoutWithinDeadline(timeout, deadline, startTime), **kwargs)
+        if response.status_code >= 500:
+            raise _ServerError(response)
+        return response
+
+    def onRetry(e: Exception, retriesLeft: int) -> None:
+        nonlocal retryCount
+        retryCount += 1
+        delay = exponentialBackoff(retries - retriesLeft, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+        if deadline is not None and time.monotonic() - startTime + delay >= deadline:
+            raise e
+        logger.warning(
+            "HTTP request failed (%s)! I'll retry in %.1f seconds (%i retries left).",
+            type(e).__name__ if not isinstance(e, _ServerError) else e, delay, retriesLeft
+        )
+        time.sleep(delay)
 
-def _request(method: str, url: str, *args, retries: int, **kwargs) -> requests.Response:
+    outcome = "error"
+    response: Optional[requests.Response] = None
     try:
-        response = withRetries(partial(requests.request, method, url, *args, **kwargs), RequestConnectionError, retries=retries, onRetry=_onRequestRetry)
+        # ConnectTimeout is a RequestConnectionError: the request was never sent, so it is always
+        # safe to retry. Read timeouts and server errors are only retried if sending the request
+        # again is harmless.
+        retryOn = (RequestConnectionError, RequestTimeout, _ServerError) if method in IDEMPOTENT_METHODS else (RequestConnectionError,)
+        response = withRetries(attempt, retryOn, retries=retries, onRetry=onRetry)
+        outcome = "client_error" if response.status_code >= 400 else "success"
     except RequestConnectionError as e:
+        outcome = "connection_error"
         u = urlparse(url)
         raise exceptions.InterfaceConnectionError(
             f"Could not connect to the GDMC HTTP interface at {u.scheme}://{u.netloc}.\n"
@@ -51,18 +269,38 @@ def _request(method: str, url: str, *args, retries: int, **kwargs) -> requests.R
              "For example, by running Minecraft with the GDMC HTTP mod installed.\n"
             f"See {__url__}/README.md for more information."
         ) from e
+    except RequestTimeout as e:
+        outcome = "timeout"
+        u = urlparse(url)
+        raise exceptions.InterfaceTimeoutError(
+            f"A request to the GDMC HTTP interface at {u.scheme}://{u.netloc}{u.path} timed out."
+        ) from e
+    except _ServerError as e:
+        outcome = "server_error"
+        raise exceptions.InterfaceInternalError(
+            f"The GDMC HTTP interface reported an internal server error ({e.response.status_code})"
+        ) from e
+    finally:
+        seconds = time.monotonic() - startTime
+        requestBytes = len(kwargs.get("data") or b"")
+        # raw.tell() counts the bytes pulled over the wire, before decompression.
+        responseBytes = None if response is None else response.raw.tell()
+        for registry in _metricsRegistries(metrics):
+            registry.recordRequest(method, urlparse(url).path, outcome, seconds, requestBytes, responseBytes, retryCount)
 
-    if response.status_code == 500:
-        raise exceptions.InterfaceInternalError("The GDMC HTTP interface reported an internal server error (500)")
+    if response.headers.get("Content-Encoding") == "gzip":
+        compressionStats.addResponse(len(response.content), responseBytes)
 
     return response
 
 
-def getBlocks(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, includeState=True, includeData=True, retries=0, timeout=None, host=DEFAULT_HOST) -> List[Tuple[ivec3, Block]]:
+def getBlocks(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, includeState=True, includeData=True, compressResponse=True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> List[Tuple[ivec3, Block]]:
     """Returns the blocks in the specified region.
 
     ``dimension`` can be one of {"overworld", "the_nether", "the_end"} (default "overworld").
 
+    If ``compressResponse`` is True, the response is requested gzip-compressed.
+
     Returns a list of (position, block)-tuples.
 
     If a set of coordinates is invalid, the returned block ID will be "minecraft:void_air".
@@ -81,16 +319,21 @@ def getBlocks(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension:
         'includeData':  True if includeData  else None,
         'dimension': dimension
     }
-    response = _request("GET", url, params=parameters, retries=retries, timeout=timeout)
+    response = _request("GET", url, params=parameters, headers=_acceptEncoding(compressResponse), retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
+    startTime = time.perf_counter()
     blockDicts: List[Dict[str, Any]] = response.json()
-    return [(ivec3(b["x"], b["y"], b["z"]), Block(b["id"], b.get("state", {}), b.get("data") if b.get("data") != "{}" else None)) for b in blockDicts]
+    result = [(ivec3(b["x"], b["y"], b["z"]), Block(b["id"], b.get("state", {}), b.get("data") if b.get("data") != "{}" else None)) for b in blockDicts]
+    _recordBlocks(metrics, "GET", "/blocks", len(result), "decode", time.perf_counter() - startTime)
+    return result
 
 
-def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST) -> List[Tuple[ivec3, str]]:
+def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, compressResponse=True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> List[Tuple[ivec3, str]]:
     """Returns the biomes in the specified region.
 
     ``dimension`` can be one of {"overworld", "the_nether", "the_end"} (default "overworld").
 
+    If ``compressResponse`` is True, the response is requested gzip-compressed.
+
     Returns a list of (position, biome id)-tuples.
 
     If a set of coordinates is invalid, the returned biome ID will be an empty string.
@@ -107,12 +350,134 @@ def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension:
         'dz': dz,
         'dimension': dimension
     }
-    response = _request("GET", url, params=parameters, retries=retries, timeout=timeout)
+    response = _request("GET", url, params=parameters, headers=_acceptEncoding(compressResponse), retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     biomeDicts: List[Dict[str, Any]] = response.json()
     return [(ivec3(b["x"], b["y"], b["z"]), str(b["id"])) for b in biomeDicts]
 
 
-def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", retries=0, timeout=None, host=DEFAULT_HOST) -> List[Tuple[bool, Union[int, str]]]:
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _iterJsonArray(text: str) -> Generator[Any, None, None]:
+    """Yields the elements of the JSON array in ``text`` one at a time.\n
+    Unlike ``json.loads()``, this never holds all decoded elements in memory at once."""
+    decoder = json.JSONDecoder()
+    skipWhitespace = _JSON_WHITESPACE.match
+    index = skipWhitespace(text, 0).end()
+    if text[index:index+1] != "[":
+        raise ValueError("Expected a JSON array")
+    index = skipWhitespace(text, index + 1).end()
+    if text[index:index+1] == "]":
+        return
+    while True:
+        element, index = decoder.raw_decode(text, index)
+        yield element
+        index = skipWhitespace(text, index).end()
+        separator = text[index:index+1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' at position {index} of JSON array")
+        index = skipWhitespace(text, index + 1).end()
+
+
+def _toColumns(entries: Generator[Tuple[int, int, int, Hashable], None, None]) -> Tuple[np.ndarray, List[Hashable], np.ndarray]:
+    """Packs (x, y, z, value)-tuples into a positions array, a palette of distinct values and a
+    palette index array."""
+    coordinates = array("i")
+    indices     = array("I")
+    paletteIndices: Dict[Hashable, int] = {}
+    for x, y, z, value in entries:
+        coordinates.extend((x, y, z))
+        index = paletteIndices.get(value)
+        if index is None:
+            index = paletteIndices[value] = len(paletteIndices)
+        indices.append(index)
+    positions = np.frombuffer(coordinates, dtype=np.int32).reshape(-1, 3)
+    indexType = np.uint16 if len(paletteIndices) <= 1 << 16 else np.uint32
+    return positions, list(paletteIndices), np.frombuffer(indices, dtype=np.uint32).astype(indexType)
+
+
+def getBlocksAsArrays(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, includeState=True, includeData=True, compressResponse=True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Tuple[np.ndarray, List[Block], np.ndarray]:
+    """Returns the blocks in the specified region in columnar form.
+
+    Takes the same arguments as :func:`.getBlocks`, but instead of one (position, block)-tuple
+    per block, returns a tuple (positions, palette, indices):
+
+    - ``positions`` is an (N,3) int32 array of block positions.
+    - ``palette`` is a list of the distinct blocks in the region.
+    - ``indices`` is an (N,) array with the palette index of each block. Its dtype is uint16 unless
+      the palette is too large for that, in which case it is uint32.
+
+    The response is decoded one block at a time, so this needs much less memory than
+    :func:`.getBlocks` for large regions, and creates no per-block Python objects.
+    """
+    url = f"{host}/blocks"
+    x, y, z = position
+    dx, dy, dz = (None, None, None) if size is None else size
+    parameters = {
+        'x': x,
+        'y': y,
+        'z': z,
+        'dx': dx,
+        'dy': dy,
+        'dz': dz,
+        'includeState': True if includeState else None,
+        'includeData':  True if includeData  else None,
+        'dimension': dimension
+    }
+    response = _request("GET", url, params=parameters, headers=_acceptEncoding(compressResponse), retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
+
+    def entries():
+        for b in _iterJsonArray(response.text):
+            states = b.get("state")
+            data = b.get("data")
+            yield b["x"], b["y"], b["z"], (b["id"], tuple(states.items()) if states else (), data if data != "{}" else None)
+
+    startTime = time.perf_counter()
+    positions, blockKeys, indices = _toColumns(entries())
+    palette = [Block(blockId, dict(states), data) for blockId, states, data in blockKeys]
+    _recordBlocks(metrics, "GET", "/blocks", len(indices), "decode", time.perf_counter() - startTime)
+    return positions, palette, indices
+
+
+def getBiomesAsArrays(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, compressResponse=True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Returns the biomes in the specified region in columnar form.
+
+    Takes the same arguments as :func:`.getBiomes`, but returns a tuple (positions, palette,
+    indices) like :func:`.getBlocksAsArrays`, where ``palette`` is a list of distinct biome ids.
+    """
+    url = f"{host}/biomes"
+    x, y, z = position
+    dx, dy, dz = (None, None, None) if size is None else size
+    parameters = {
+        'x': x,
+        'y': y,
+        'z': z,
+        'dx': dx,
+        'dy': dy,
+        'dz': dz,
+        'dimension': dimension
+    }
+    response = _request("GET", url, params=parameters, headers=_acceptEncoding(compressResponse), retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
+    positions, palette, indices = _toColumns((b["x"], b["y"], b["z"], str(b["id"])) for b in _iterJsonArray(response.text))
+    return positions, palette, indices
+
+
+@lru_cache(maxsize=4096)
+def _blockJsonFragment(blockId: str, stateItems: Tuple[Tuple[str, str], ...], data: Optional[str]) -> bytes:
+    """Returns the id, state and data part of a :func:`.placeBlocks` JSON entry, including the
+    closing brace and a trailing comma."""
+    return bytes(
+        f'"id":"{blockId}"' +
+        (f',"state":{json.dumps(dict(stateItems), separators=(",",":"))}' if stateItems else '') +
+        (f',"data":{repr(data)}' if data is not None else '') +
+        '},',
+        "utf-8"
+    )
+
+
+def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", compressionThreshold: Optional[int] = None, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> List[Tuple[bool, Union[int, str]]]:
     """Places blocks in the world.
 
     Each element of ``blocks`` should be a tuple (position, block). Empty blocks (blocks without an
@@ -123,6 +488,9 @@ def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[s
     The ``doBlockUpdates``, ``spawnDrops`` and ``customFlags`` parameters control block update
     behavior. See the GDMC HTTP API documentation for more info.
 
+    If ``compressionThreshold`` is not None, request bodies of at least that many bytes are sent
+    gzip-compressed.
+
     Returns a list of (success, result)-tuples, one for each block. If a block placement was
     successful, result will be 1 if the block changed, or 0 otherwise. If a block placement failed,
     result will be the error message.
@@ -137,49 +505,59 @@ def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[s
     parameters = {"dimension": dimension}
     parameters.update(blockUpdateParams)
 
-    body = (
-        "[" +
-        ",".join(
-            '{' +
-            f'"x":{pos[0]},"y":{pos[1]},"z":{pos[2]},"id":"{block.id}"' +
-            (f',"state":{json.dumps(block.states, separators=(",",":"))}' if block.states else '') +
-            (f',"data":{repr(block.data)}' if block.data is not None else '') +
-            '}'
-            for pos, block in blocks
-        ) +
-        "]"
-    )
+    # A build typically uses few distinct blocks many times, so the id/state/data part of each
+    # entry is serialized once per Block object, and only the coordinates are formatted per entry.
+    startTime = time.perf_counter()
+    fragments: Dict[int, bytes] = {}
+    body = bytearray(b"[")
+    for pos, block in blocks:
+        fragment = fragments.get(id(block))
+        if fragment is None:
+            fragment = _blockJsonFragment(block.id, tuple(block.states.items()), block.data)
+            fragments[id(block)] = fragment
+        body += b'{"x":%d,"y":%d,"z":%d,' % (pos[0], pos[1], pos[2])
+        body += fragment
+    if len(body) > 1:
+        body[-1:] = b"]" # Replaces the trailing comma
+    else:
+        body += b"]"
 
-    response = _request("PUT", url, data=bytes(body, "utf-8"), params=parameters, retries=retries, timeout=timeout)
+    data, headers = _compressBody(body, compressionThreshold)
+    _recordBlocks(metrics, "PUT", "/blocks", len(blocks), "encode", time.perf_counter() - startTime)
+    response = _request("PUT", url, data=data, params=parameters, headers=headers, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
 
     result: List[Tuple[bool, Union[int, str]]] = [("message" not in entry, entry.get("message", int(entry["status"]))) for entry in response.json()]
     return result
 
 
-def runCommand(command: str, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST) -> List[Tuple[bool, Optional[str]]]:
+def runCommand(command: str, dimension: Optional[str] = None, compressionThreshold: Optional[int] = None, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> List[Tuple[bool, Optional[str]]]:
     """Executes one or multiple Minecraft commands (separated by newlines).
 
     The leading "/" must be omitted.
 
     ``dimension`` can be one of {"overworld", "the_nether", "the_end"} (default "overworld").
 
+    If ``compressionThreshold`` is not None, request bodies of at least that many bytes are sent
+    gzip-compressed.
+
     Returns a list of (success, result)-tuples, one for each command. If a command was succesful,
     result is its return value (if any). Otherwise, it is the error message.
     """
     url = f"{host}/command"
-    response = _request("POST", url, data=bytes(command, "utf-8"), params={'dimension': dimension}, retries=retries, timeout=timeout)
+    data, headers = _compressBody(bytes(command, "utf-8"), compressionThreshold)
+    response = _request("POST", url, data=data, params={'dimension': dimension}, headers=headers, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     result: List[Tuple[bool, Optional[str]]] = [(bool(entry["status"]), entry.get("message")) for entry in response.json()]
     return result
 
 
-def getBuildArea(retries=0, timeout=None, host=DEFAULT_HOST) -> Box:
+def getBuildArea(retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Box:
     """Retrieves the build area that was specified with /setbuildarea in-game.
 
     Raises a :exc:`.BuildAreaNotSetError` if the build area was not specified yet.
 
     If a build area was specified, result is the box describing the build area.
     """
-    response = _request("GET", f"{host}/buildarea", retries=retries, timeout=timeout)
+    response = _request("GET", f"{host}/buildarea", retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
 
     if not response.ok or response.json() == -1:
         raise exceptions.BuildAreaNotSetError(
@@ -202,7 +580,7 @@ def getBuildArea(retries=0, timeout=None, host=DEFAULT_HOST) -> Box:
     return Box.between(fromPoint, toPoint)
 
 
-def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension: Optional[str] = None, asBytes=False, retries=0, timeout=None, host=DEFAULT_HOST) -> Union[str, bytes]:
+def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension: Optional[str] = None, asBytes=False, compressResponse=True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Union[str, bytes]:
     """Returns raw chunk data.
 
     ``position`` specifies the position in chunk coordinates, and ``size`` specifies how many chunks
@@ -212,6 +590,9 @@ def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension:
     If ``asBytes`` is True, returns raw binary data. Otherwise, returns a human-readable
     representation.
 
+    If ``compressResponse`` is True, the response is requested gzip-compressed. It is decompressed
+    before it is returned.
+
     On error, returns the error message instead.
     """
     url = f"{host}/chunks"
@@ -225,11 +606,12 @@ def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension:
         "dimension": dimension,
     }
     acceptType = "application/octet-stream" if asBytes else "text/plain"
-    response = _request("GET", url, params=parameters, headers={"Accept": acceptType}, retries=retries, timeout=timeout)
+    headers = {"Accept": acceptType, **_acceptEncoding(compressResponse)}
+    response = _request("GET", url, params=parameters, headers=headers, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     return response.content if asBytes else response.text
 
 
-def placeStructure(structureData: Union[bytes, nbt.NBTFile], position: Vec3iLike, mirror: Optional[Vec2iLike] = None, rotate: Optional[int] = None, pivot: Optional[Vec3iLike] = None, includeEntities: Optional[bool] = None, dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", retries=0, timeout=None, host=DEFAULT_HOST) -> None:
+def placeStructure(structureData: Union[bytes, nbt.NBTFile], position: Vec3iLike, mirror: Optional[Vec2iLike] = None, rotate: Optional[int] = None, pivot: Optional[Vec3iLike] = None, includeEntities: Optional[bool] = None, dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> None:
     """Places a structure defined using the Minecraft structure format in the world.
 
     ``structureData`` should be a string of bytes in the Minecraft structure file format, the format used by the
@@ -281,11 +663,11 @@ def placeStructure(structureData: Union[bytes, nbt.NBTFile], position: Vec3iLike
         parameters['doBlockUpdates'] = doBlockUpdates
         parameters['spawnDrops'] = spawnDrops
 
-    response = _request(method="POST", url=url, data=structureData, params=parameters, retries=retries, timeout=timeout)
+    response = _request(method="POST", url=url, data=structureData, params=parameters, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     return response.json()
 
 
-def getStructure(position: Vec3iLike, size: Vec3iLike, dimension: Optional[str] = None, includeEntities: Optional[bool] = None, returnCompressed: Optional[bool] = True, retries=0, timeout=None, host=DEFAULT_HOST) -> bytes:
+def getStructure(position: Vec3iLike, size: Vec3iLike, dimension: Optional[str] = None, includeEntities: Optional[bool] = None, returnCompressed: Optional[bool] = True, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> bytes:
     """Returns the specified area in the Minecraft structure file format (an NBT byte string).
 
     The Minecraft structure file format is the format used by the in-game structure blocks. Structures in this format
@@ -312,32 +694,32 @@ def getStructure(position: Vec3iLike, size: Vec3iLike, dimension: Optional[str]
     }
     headers = {'Accept-Encoding': 'gzip'} if returnCompressed is True else None
 
-    response = _request(method="GET", url=url, params=parameters, headers=headers, retries=retries, timeout=timeout)
+    response = _request(method="GET", url=url, params=parameters, headers=headers, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     return response.content
 
 
-def getEntities(selector: Optional[str] = None, includeData: bool = True, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST) -> Any:
+def getEntities(selector: Optional[str] = None, includeData: bool = True, dimension: Optional[str] = None, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Any:
     url = f'{host}/entities'
     parameters = {
         'selector': selector,
         'dimension': dimension,
         'includeData': includeData,
     }
-    response = _request(method='GET', url=url, params=parameters, retries=retries, timeout=timeout)
+    response = _request(method='GET', url=url, params=parameters, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     return response.json()
 
 
-def getPlayers(selector: Optional[str] = None, includeData: bool = True, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST) -> Any:
+def getPlayers(selector: Optional[str] = None, includeData: bool = True, dimension: Optional[str] = None, retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> Any:
     url = f'{host}/players'
     parameters = {
         'selector': selector,
         'dimension': dimension,
         'includeData': includeData,
     }
-    response = _request(method='GET', url=url, params=parameters, retries=retries, timeout=timeout)
+    response = _request(method='GET', url=url, params=parameters, retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics)
     return response.json()
 
 
-def getVersion(retries=0, timeout=None, host=DEFAULT_HOST) -> str:
+def getVersion(retries=0, timeout=None, deadline: Optional[float] = None, host=DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None) -> str:
     """Returns the Minecraft version as a string."""
-    return _request("GET", f"{host}/version", retries=retries, timeout=timeout).text
+    return _request("GET", f"{host}/version", retries=retries, timeout=timeout, deadline=deadline, session=session, metrics=metrics).text
@@ -0,0 +1,253 @@
+"""Provides :class:`.MetricsRegistry`, which records how many requests, bytes, retries and seconds
+each endpoint of the GDMC HTTP interface costs.
+
+All requests made through :mod:`.interface` are recorded in :data:`.interface.requestMetrics`.
+Each :class:`.Editor` additionally records its own requests in :attr:`.Editor.metrics`.
+
+A registry can be exported as a Prometheus text file (for the node exporter's textfile
+collector) or as JSON:
+
+.. code-block:: python
+
+    editor.metrics.writePrometheusTextfile("gdpc.prom")
+    editor.metrics.writeJson("gdpc.json")
+"""
+
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import json
+import os
+import threading
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Default histogram bucket bounds for durations, in seconds"""
+
+SIZE_BUCKETS = tuple(float(4**i) for i in range(4, 14))
+"""Default histogram bucket bounds for payload sizes, in bytes (256 B to 64 MiB)"""
+
+COUNT_BUCKETS = tuple(float(4**i) for i in range(0, 10))
+"""Default histogram bucket bounds for item counts (1 to 262144)"""
+
+
+class Histogram:
+    """A histogram with fixed bucket bounds, like a Prometheus histogram.\n
+    Not thread-safe on its own: :class:`.MetricsRegistry` guards its histograms with a lock."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        """Constructs an empty histogram with the given (upper, inclusive) bucket bounds."""
+        self.buckets = tuple(sorted(buckets))
+        self.bucketCounts = [0] * (len(self.buckets) + 1) # The last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def __repr__(self) -> str:
+        return f"Histogram(count={self.count}, sum={self.sum})"
+
+    def observe(self, value: float) -> None:
+        """Adds ``value`` to the histogram."""
+        self.bucketCounts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @property
+    def mean(self) -> float:
+        """The mean of all observed values, or 0 if there are none."""
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulativeCounts(self) -> List[Tuple[float, int]]:
+        """Returns (bound, count)-tuples with the amount of values that are at most bound,
+        ending with (inf, count)."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucketCounts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _formatBound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _escapeLabel(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Records metrics about requests to the GDMC HTTP interface, per endpoint.
+
+    The following metrics are recorded. Endpoints are identified by HTTP method and path, for
+    example ``("PUT", "/blocks")``.
+
+    - The amount of requests, per outcome (``"success"``, ``"client_error"``, ``"server_error"``,
+      ``"timeout"`` or ``"connection_error"``).
+    - The amount of retries.
+    - A histogram of request durations in seconds, including retries.
+    - Histograms of request and response body sizes in bytes, as transferred.
+    - A histogram of the amount of blocks per request, for endpoints that place or get blocks.
+    - Histograms of the time spent encoding request bodies and decoding response bodies on the
+      client, per phase (``"encode"`` or ``"decode"``).
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        latencyBuckets: Sequence[float] = LATENCY_BUCKETS,
+        sizeBuckets:    Sequence[float] = SIZE_BUCKETS,
+        countBuckets:   Sequence[float] = COUNT_BUCKETS,
+    ) -> None:
+        """Constructs an empty registry with the given histogram bucket bounds."""
+        self._latencyBuckets = latencyBuckets
+        self._sizeBuckets    = sizeBuckets
+        self._countBuckets   = countBuckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"MetricsRegistry(requests={self.requestCount()})"
+
+    def reset(self) -> None:
+        """Discards all recorded metrics."""
+        with self._lock:
+            self._requests:         Dict[Tuple[str, str, str], int]       = {}
+            self._retries:          Dict[Tuple[str, str], int]            = {}
+            self._latency:          Dict[Tuple[str, str], Histogram]      = {}
+            self._requestBytes:     Dict[Tuple[str, str], Histogram]      = {}
+            self._responseBytes:    Dict[Tuple[str, str], Histogram]      = {}
+            self._blocksPerRequest: Dict[Tuple[str, str], Histogram]      = {}
+            self._processing:       Dict[Tuple[str, str, str], Histogram] = {}
+
+    @staticmethod
+    def _histogram(histograms: Dict[Any, Histogram], key: Any, buckets: Sequence[float]) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(buckets)
+            histograms[key] = histogram
+        return histogram
+
+    def recordRequest(self, method: str, endpoint: str, outcome: str, seconds: float, requestBytes: int, responseBytes: Optional[int], retries: int) -> None:
+        """Records a request. ``responseBytes`` should be ``None`` if there was no response."""
+        with self._lock:
+            self._requests[(method, endpoint, outcome)] = self._requests.get((method, endpoint, outcome), 0) + 1
+            self._retries[(method, endpoint)] = self._retries.get((method, endpoint), 0) + retries
+            self._histogram(self._latency,      (method, endpoint), self._latencyBuckets).observe(seconds)
+            self._histogram(self._requestBytes, (method, endpoint), self._sizeBuckets).observe(requestBytes)
+            if responseBytes is not None:
+                self._histogram(self._responseBytes, (method, endpoint), self._sizeBuckets).observe(responseBytes)
+
+    def recordBlocks(self, method: str, endpoint: str, count: int) -> None:
+        """Records the amount of blocks in a request."""
+        with self._lock:
+            self._histogram(self._blocksPerRequest, (method, endpoint), self._countBuckets).observe(count)
+
+    def recordProcessing(self, method: str, endpoint: str, phase: str, seconds: float) -> None:
+        """Records client-side processing time of a request, like encoding or decoding."""
+        with self._lock:
+            self._histogram(self._processing, (method, endpoint, phase), self._latencyBuckets).observe(seconds)
+
+    def requestCount(self, method: Optional[str] = None, endpoint: Optional[str] = None, outcome: Optional[str] = None) -> int:
+        """Returns the amount of recorded requests, optionally filtered by method, endpoint and
+        outcome."""
+        with self._lock:
+            return sum(
+                count for (m, e, o), count in self._requests.items()
+                if method in (None, m) and endpoint in (None, e) and outcome in (None, o)
+            )
+
+    def requestSeconds(self, method: Optional[str] = None, endpoint: Optional[str] = None) -> float:
+        """Returns the total duration of recorded requests, optionally filtered by method and
+        endpoint."""
+        with self._lock:
+            return sum(
+                histogram.sum for (m, e), histogram in self._latency.items()
+                if method in (None, m) and endpoint in (None, e)
+            )
+
+    def toDict(self) -> Dict[str, Any]:
+        """Returns all metrics as a JSON-serializable dict."""
+
+        def histograms(items: Dict[Tuple[str, ...], Histogram], labelNames: Tuple[str, ...]) -> List[Dict[str, Any]]:
+            return [
+                {
+                    **dict(zip(labelNames, labels)),
+                    "count": histogram.count,
+                    "sum":   histogram.sum,
+                    "buckets": {_formatBound(bound): count for bound, count in histogram.cumulativeCounts()},
+                }
+                for labels, histogram in sorted(items.items())
+            ]
+
+        with self._lock:
+            return {
+                "requests": [
+                    {"method": m, "endpoint": e, "outcome": o, "count": count}
+                    for (m, e, o), count in sorted(self._requests.items())
+                ],
+                "retries": [
+                    {"method": m, "endpoint": e, "count": count}
+                    for (m, e), count in sorted(self._retries.items())
+                ],
+                "requestSeconds":    histograms(self._latency,          ("method", "endpoint")),
+                "requestBytes":      histograms(self._requestBytes,     ("method", "endpoint")),
+                "responseBytes":     histograms(self._responseBytes,    ("method", "endpoint")),
+                "blocksPerRequest":  histograms(self._blocksPerRequest, ("method", "endpoint")),
+                "processingSeconds": histograms(self._processing,       ("method", "endpoint", "phase")),
+            }
+
+    def toJson(self, indent: Optional[int] = 2) -> str:
+        """Returns all metrics as a JSON string (see :meth:`.toDict`)."""
+        return json.dumps(self.toDict(), indent=indent)
+
+    def toPrometheus(self, prefix = "gdpc") -> str:
+        """Returns all metrics in the Prometheus text exposition format.\n
+        Metric names start with ``prefix``."""
+        lines: List[str] = []
+
+        def labelString(labels: Dict[str, str]) -> str:
+            return "{" + ",".join(f'{name}="{_escapeLabel(value)}"' for name, value in labels.items()) + "}"
+
+        def counter(name: str, help: str, entries: List[Dict[str, Any]]) -> None: # pylint: disable=redefined-builtin
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for entry in entries:
+                labels = {k: v for k, v in entry.items() if k != "count"}
+                lines.append(f"{prefix}_{name}{labelString(labels)} {entry['count']}")
+
+        def histogram(name: str, help: str, entries: List[Dict[str, Any]]) -> None: # pylint: disable=redefined-builtin
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for entry in entries:
+                labels = {k: v for k, v in entry.items() if k not in ("count", "sum", "buckets")}
+                for bound, count in entry["buckets"].items():
+                    lines.append(f"{prefix}_{name}_bucket{labelString({**labels, 'le': bound})} {count}")
+                lines.append(f"{prefix}_{name}_sum{labelString(labels)} {entry['sum']}")
+                lines.append(f"{prefix}_{name}_count{labelString(labels)} {entry['count']}")
+
+        data = self.toDict()
+        counter(  "requests_total",           "Requests to the GDMC HTTP interface.",                         data["requests"])
+        counter(  "request_retries_total",    "Retries of requests to the GDMC HTTP interface.",              data["retries"])
+        histogram("request_duration_seconds", "Duration of requests, including retries.",                    data["requestSeconds"])
+        histogram("request_body_bytes",       "Size of request bodies as sent.",                             data["requestBytes"])
+        histogram("response_body_bytes",      "Size of response bodies as received.",                        data["responseBytes"])
+        histogram("blocks_per_request",       "Amount of blocks per request.",                               data["blocksPerRequest"])
+        histogram("processing_seconds",       "Client-side time spent encoding requests or decoding responses.", data["processingSeconds"])
+        return "\n".join(lines) + "\n"
+
+    def writePrometheusTextfile(self, path: str, prefix = "gdpc") -> None:
+        """Writes all metrics to ``path`` in the Prometheus text exposition format.\n
+        The file is replaced atomically, as required by the node exporter's textfile collector."""
+        self._writeAtomically(path, self.toPrometheus(prefix))
+
+    def writeJson(self, path: str, indent: Optional[int] = 2) -> None:
+        """Writes all metrics to ``path`` as JSON (see :meth:`.toDict`)."""
+        self._writeAtomically(path, self.toJson(indent))
+
+    @staticmethod
+    def _writeAtomically(path: str, text: str) -> None:
+        temporaryPath = f"{path}.{os.getpid()}.tmp"
+        with open(temporaryPath, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporaryPath, path)
@@ -0,0 +1,679 @@
+"""Provides :class:`.StandInServer`, a local stand-in for the GDMC HTTP interface.
+
+The stand-in server implements the endpoints that :mod:`.interface` uses on top of an in-memory
+voxel world, so that GDPC programs can be tested and benchmarked reproducibly without running
+Minecraft. It can optionally inject latency and server errors.
+
+It is *not* a Minecraft server. In particular:
+
+- There are no block updates, physics or entities.
+- The world is a flat plain of unlimited size, generated on demand.
+- Biomes are the same everywhere.
+- Heightmaps are approximations: they only distinguish air, fluids and leaves.
+- Block entity data is stored and returned by the ``/blocks`` endpoint, but it is not included in
+  chunk or structure data.
+- Only the ``setblock``, ``fill``, ``setbuildarea`` and ``execute positioned ... run`` commands are
+  supported.
+- Structures cannot be rotated or mirrored when placed.
+
+The server can be used from Python:
+
+.. code-block:: python
+
+    with StandInServer() as server:
+        editor = Editor(host=server.host)
+        ...
+
+or started from the command line with ``python -m gdpc.stand_in_server``.
+"""
+
+
+from typing import Any, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from math import ceil, log2
+import argparse
+import ast
+import gzip
+import io
+import json
+import random
+import re
+import threading
+import time
+
+import numpy as np
+from nbt import nbt
+
+from .vector_tools import Box
+from .nbt_tools import nbtToSnbt
+from .buffer_tools import STRUCTURE_DATA_VERSION, FILL_LIMIT
+
+
+WORLD_Y_BEGIN = -64
+"""Lowest block y coordinate of the stand-in world"""
+
+WORLD_Y_SIZE = 384
+"""Height of the stand-in world in blocks"""
+
+_AIR_IDS    = {"minecraft:air", "minecraft:cave_air", "minecraft:void_air"}
+_FLUID_IDS  = {"minecraft:water", "minecraft:lava"}
+_HEIGHTMAPS = ("MOTION_BLOCKING", "MOTION_BLOCKING_NO_LEAVES", "OCEAN_FLOOR", "WORLD_SURFACE")
+
+_BLOCK_STRING_PATTERN = re.compile(r"^([^\[\{\s]+)(?:\[([^\]]*)\])?(\{.*\})?$", re.DOTALL)
+
+
+def _namespaced(blockId: str) -> str:
+    return blockId if ":" in blockId else f"minecraft:{blockId}"
+
+
+def _blockKey(blockId: str, states: Optional[Dict[str, Any]] = None) -> str:
+    """Returns the canonical block state string, which the world uses as palette entry."""
+    blockId = _namespaced(blockId)
+    if not states:
+        return blockId
+    return f"{blockId}[{','.join(f'{k}={v}' for k, v in sorted(states.items()))}]"
+
+
+def _splitBlockKey(key: str) -> Tuple[str, Dict[str, str]]:
+    """Inverse of :func:`._blockKey`."""
+    if "[" not in key:
+        return key, {}
+    blockId, stateString = key[:-1].split("[", 1)
+    return blockId, dict(pair.split("=", 1) for pair in stateString.split(",") if pair)
+
+
+def _parseBlockString(blockString: str) -> Tuple[str, Optional[str]]:
+    """Parses a command block argument like ``oak_stairs[facing=north]{...}`` into a block key and
+    SNBT data."""
+    match = _BLOCK_STRING_PATTERN.match(blockString.strip())
+    if match is None:
+        raise ValueError(f"Invalid block: {blockString}")
+    blockId, stateString, data = match.groups()
+    states = dict(pair.split("=", 1) for pair in stateString.split(",") if pair) if stateString else {}
+    return _blockKey(blockId, states), data
+
+
+def _packLongs(values: np.ndarray, bitsPerEntry: int) -> List[int]:
+    """Packs ``values`` into signed 64-bit longs, Minecraft-style: entries do not span longs."""
+    entriesPerLong = 64 // bitsPerEntry
+    longCount = -(-len(values) // entriesPerLong)
+    padded = np.zeros(longCount * entriesPerLong, dtype=np.uint64)
+    padded[:len(values)] = values
+    shifts = np.arange(entriesPerLong, dtype=np.uint64) * np.uint64(bitsPerEntry)
+    longs = np.bitwise_or.reduce(padded.reshape(longCount, entriesPerLong) << shifts, axis=1)
+    return longs.view(np.int64).tolist()
+
+
+class StandInWorld:
+    """An in-memory voxel world, stored as palette indices in lazily generated chunks.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, groundHeight: int = 63, biome: str = "minecraft:plains") -> None:
+        """Constructs a flat world whose top (grass) layer is at y=``groundHeight``."""
+        self._groundHeight = groundHeight
+        self._biome = biome
+        self._palette: List[str] = []
+        self._paletteIndices: Dict[str, int] = {}
+        self._chunks: Dict[Tuple[int, int], np.ndarray] = {} # Arrays are indexed [y, z, x]
+        self._blockData: Dict[Tuple[int, int, int], str] = {}
+        self._lock = threading.RLock()
+
+        column = np.full(WORLD_Y_SIZE, self.paletteIndex("minecraft:air"), dtype=np.uint16)
+        ground = groundHeight - WORLD_Y_BEGIN
+        column[:max(0, ground - 3)]             = self.paletteIndex("minecraft:stone")
+        column[max(0, ground - 3):max(0, ground)] = self.paletteIndex("minecraft:dirt")
+        if 0 <= ground < WORLD_Y_SIZE:
+            column[ground] = self.paletteIndex("minecraft:grass_block")
+        column[0] = self.paletteIndex("minecraft:bedrock")
+        self._column = column
+
+    @property
+    def biome(self) -> str:
+        """The biome of every position in the world."""
+        return self._biome
+
+    def paletteIndex(self, key: str) -> int:
+        """Returns the palette index of the block state string ``key``, adding it if needed."""
+        index = self._paletteIndices.get(key)
+        if index is None:
+            with self._lock:
+                index = self._paletteIndices.get(key)
+                if index is None:
+                    index = len(self._palette)
+                    self._palette.append(key)
+                    self._paletteIndices[key] = index
+        return index
+
+    def paletteKey(self, index: int) -> str:
+        """Returns the block state string with palette index ``index``."""
+        return self._palette[index]
+
+    def chunk(self, chunkX: int, chunkZ: int) -> np.ndarray:
+        """Returns the [y, z, x] palette index array of a chunk, generating it if needed."""
+        chunk = self._chunks.get((chunkX, chunkZ))
+        if chunk is None:
+            with self._lock:
+                chunk = self._chunks.get((chunkX, chunkZ))
+                if chunk is None:
+                    chunk = np.repeat(self._column[:, None, None], 16, axis=1).repeat(16, axis=2)
+                    self._chunks[(chunkX, chunkZ)] = chunk
+        return chunk
+
+    def getBlock(self, x: int, y: int, z: int) -> Tuple[str, Optional[str]]:
+        """Returns the block state string and SNBT data at (x, y, z)."""
+        if not WORLD_Y_BEGIN <= y < WORLD_Y_BEGIN + WORLD_Y_SIZE:
+            return "minecraft:void_air", None
+        index = self.chunk(x >> 4, z >> 4)[y - WORLD_Y_BEGIN, z & 15, x & 15]
+        return self._palette[index], self._blockData.get((x, y, z))
+
+    def setBlock(self, x: int, y: int, z: int, key: str, data: Optional[str] = None) -> bool:
+        """Sets the block at (x, y, z). Returns whether anything changed.\n
+        Raises a ValueError if y is outside the world."""
+        if not WORLD_Y_BEGIN <= y < WORLD_Y_BEGIN + WORLD_Y_SIZE:
+            raise ValueError(f"Position ({x}, {y}, {z}) is outside the world")
+        index = self.paletteIndex(key)
+        with self._lock:
+            chunk = self.chunk(x >> 4, z >> 4)
+            local = (y - WORLD_Y_BEGIN, z & 15, x & 15)
+            changed = chunk[local] != index or self._blockData.get((x, y, z)) != data
+            chunk[local] = index
+            if data is None:
+                self._blockData.pop((x, y, z), None)
+            else:
+                self._blockData[(x, y, z)] = data
+        return bool(changed)
+
+    def fill(self, box: Box, key: str, data: Optional[str] = None) -> int:
+        """Sets all blocks in ``box`` to ``key``. Returns the amount of blocks in the box.\n
+        Raises a ValueError if the box is not entirely inside the world."""
+        if box.begin.y < WORLD_Y_BEGIN or box.end.y > WORLD_Y_BEGIN + WORLD_Y_SIZE:
+            raise ValueError("Cannot place blocks outside of the world")
+        index = self.paletteIndex(key)
+        with self._lock:
+            for chunkX in range(box.begin.x >> 4, ((box.end.x - 1) >> 4) + 1):
+                for chunkZ in range(box.begin.z >> 4, ((box.end.z - 1) >> 4) + 1):
+                    x0, x1 = max(box.begin.x, chunkX << 4), min(box.end.x, (chunkX + 1) << 4)
+                    z0, z1 = max(box.begin.z, chunkZ << 4), min(box.end.z, (chunkZ + 1) << 4)
+                    self.chunk(chunkX, chunkZ)[
+                        box.begin.y - WORLD_Y_BEGIN : box.end.y - WORLD_Y_BEGIN,
+                        z0 & 15 : ((z1 - 1) & 15) + 1,
+                        x0 & 15 : ((x1 - 1) & 15) + 1,
+                    ] = index
+            for position in [p for p in self._blockData if box.contains(p)]:
+                del self._blockData[position]
+            if data is not None:
+                for position in box.inner:
+                    self._blockData[tuple(position)] = data
+        return box.volume
+
+    def chunkTag(self, chunkX: int, chunkZ: int) -> nbt.TAG_Compound:
+        """Returns the NBT data of a chunk, in the format of the GDMC HTTP ``/chunks`` endpoint."""
+        with self._lock:
+            chunk = self.chunk(chunkX, chunkZ).copy()
+            blockEntities = [(p, self._palette[chunk[p[1] - WORLD_Y_BEGIN, p[2] & 15, p[0] & 15]]) for p in self._blockData if p[0] >> 4 == chunkX and p[2] >> 4 == chunkZ]
+
+        chunkTag = nbt.TAG_Compound()
+        chunkTag.tags.append(nbt.TAG_Int(name="xPos", value=chunkX))
+        chunkTag.tags.append(nbt.TAG_Int(name="zPos", value=chunkZ))
+        chunkTag.tags.append(nbt.TAG_Int(name="yPos", value=WORLD_Y_BEGIN >> 4))
+        chunkTag.tags.append(nbt.TAG_String(name="Status", value="minecraft:full"))
+
+        sections = nbt.TAG_List(name="sections", type=nbt.TAG_Compound)
+        for sectionIndex in range(WORLD_Y_SIZE // 16):
+            sectionData = chunk[sectionIndex * 16 : (sectionIndex + 1) * 16].ravel()
+            paletteIndices, localIndices = np.unique(sectionData, return_inverse=True)
+
+            blockStates = nbt.TAG_Compound(name="block_states")
+            paletteTag = nbt.TAG_List(name="palette", type=nbt.TAG_Compound)
+            for index in paletteIndices:
+                blockId, states = _splitBlockKey(self._palette[index])
+                entry = nbt.TAG_Compound()
+                entry.tags.append(nbt.TAG_String(name="Name", value=blockId))
+                if states:
+                    properties = nbt.TAG_Compound(name="Properties")
+                    for name, value in states.items():
+                        properties.tags.append(nbt.TAG_String(name=name, value=value))
+                    entry.tags.append(properties)
+                paletteTag.tags.append(entry)
+            blockStates.tags.append(paletteTag)
+            if len(paletteIndices) > 1:
+                bitsPerEntry = max(4, ceil(log2(len(paletteIndices))))
+                dataTag = nbt.TAG_Long_Array(name="data")
+                dataTag.value = _packLongs(localIndices.ravel(), bitsPerEntry)
+                blockStates.tags.append(dataTag)
+
+            biomes = nbt.TAG_Compound(name="biomes")
+            biomePalette = nbt.TAG_List(name="palette", type=nbt.TAG_String)
+            biomePalette.tags.append(nbt.TAG_String(self._biome))
+            biomes.tags.append(biomePalette)
+
+            section = nbt.TAG_Compound()
+            section.tags.append(nbt.TAG_Byte(name="Y", value=(WORLD_Y_BEGIN >> 4) + sectionIndex))
+            section.tags.append(blockStates)
+            section.tags.append(biomes)
+            sections.tags.append(section)
+        chunkTag.tags.append(sections)
+
+        heightmaps = nbt.TAG_Compound(name="Heightmaps")
+        ids = [_splitBlockKey(key)[0] for key in self._palette[:int(chunk.max()) + 1]]
+        isAir   = np.array([i in _AIR_IDS for i in ids])
+        isFluid = np.array([i in _FLUID_IDS for i in ids])
+        isLeaf  = np.array([i.endswith("_leaves") for i in ids])
+        masks = {
+            "WORLD_SURFACE":             ~isAir,
+            "MOTION_BLOCKING":           ~isAir,
+            "MOTION_BLOCKING_NO_LEAVES": ~isAir & ~isLeaf,
+            "OCEAN_FLOOR":               ~isAir & ~isFluid,
+        }
+        hmBitsPerEntry = ceil(log2(WORLD_Y_SIZE + 1))
+        for name in _HEIGHTMAPS:
+            solid = masks[name][chunk] # [y, z, x]
+            heights = np.where(solid.any(axis=0), WORLD_Y_SIZE - np.argmax(solid[::-1], axis=0), 0)
+            hmTag = nbt.TAG_Long_Array(name=name)
+            hmTag.value = _packLongs(heights.ravel(), hmBitsPerEntry)
+            heightmaps.tags.append(hmTag)
+        chunkTag.tags.append(heightmaps)
+
+        blockEntitiesTag = nbt.TAG_List(name="block_entities", type=nbt.TAG_Compound)
+        for (x, y, z), key in blockEntities:
+            entity = nbt.TAG_Compound()
+            entity.tags.append(nbt.TAG_String(name="id", value=_splitBlockKey(key)[0]))
+            entity.tags.append(nbt.TAG_Int(name="x", value=x))
+            entity.tags.append(nbt.TAG_Int(name="y", value=y))
+            entity.tags.append(nbt.TAG_Int(name="z", value=z))
+            blockEntitiesTag.tags.append(entity)
+        chunkTag.tags.append(blockEntitiesTag)
+
+        return chunkTag
+
+
+def _axisRange(start: int, delta: Optional[int]) -> range:
+    """Returns the coordinates covered by a GDMC HTTP (x, dx)-style parameter pair."""
+    if delta is None:
+        delta = 1
+    return range(start, start + delta) if delta >= 0 else range(start + delta + 1, start + 1)
+
+
+def _axisBounds(start: int, delta: Optional[int]) -> Tuple[int, int]:
+    r = _axisRange(start, delta)
+    return r.start, len(r)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Enables keep-alive
+    disable_nagle_algorithm = True
+    server: "_HTTPServer"
+
+    # ----------------------------------------------------------------------------------------------
+    # Plumbing
+
+    def log_message(self, format: str, *args) -> None: # pylint: disable=redefined-builtin
+        if self.server.standIn.verbose:
+            super().log_message(format, *args)
+
+    def _query(self) -> Dict[str, str]:
+        return {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def _int(self, query: Dict[str, str], name: str, default: Optional[int] = None) -> Optional[int]:
+        return int(query[name]) if name in query else default
+
+    def _body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _reply(self, status: int, body: Any, contentType: str = "application/json") -> None:
+        if isinstance(body, bytes):
+            data = body
+        elif isinstance(body, str):
+            data = body.encode("utf-8")
+        else:
+            data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method: str) -> None:
+        standIn = self.server.standIn
+        with standIn._requestCountLock: # pylint: disable=protected-access
+            standIn.requestCount += 1
+        if standIn.latency > 0:
+            time.sleep(standIn.latency)
+        if standIn.errorRate > 0 and standIn.random.random() < standIn.errorRate:
+            self._body()
+            self._reply(500, {"message": "Injected error"})
+            return
+        route = getattr(self, f"_{method}_{urlparse(self.path).path.strip('/')}", None)
+        if route is None:
+            self._body()
+            self._reply(404, {"message": f"No such endpoint: {method} {urlparse(self.path).path}"})
+            return
+        try:
+            route()
+        except (ValueError, KeyError, TypeError, SyntaxError) as e:
+            self._reply(400, {"message": str(e)})
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    # ----------------------------------------------------------------------------------------------
+    # Endpoints
+
+    def _GET_version(self) -> None:
+        self._reply(200, self.server.standIn.minecraftVersion, "text/plain")
+
+    def _GET_buildarea(self) -> None:
+        buildArea = self.server.standIn.buildArea
+        if buildArea is None:
+            self._reply(404, -1)
+            return
+        self._reply(200, {
+            "xFrom": buildArea.begin.x, "yFrom": buildArea.begin.y, "zFrom": buildArea.begin.z,
+            "xTo":   buildArea.last.x,  "yTo":   buildArea.last.y,  "zTo":   buildArea.last.z,
+        })
+
+    def _GET_blocks(self) -> None:
+        query = self._query()
+        world = self.server.standIn.world
+        includeState = query.get("includeState", "").lower() == "true"
+        includeData  = query.get("includeData",  "").lower() == "true"
+        result = []
+        for x in _axisRange(int(query["x"]), self._int(query, "dx")):
+            for y in _axisRange(int(query["y"]), self._int(query, "dy")):
+                for z in _axisRange(int(query["z"]), self._int(query, "dz")):
+                    key, data = world.getBlock(x, y, z)
+                    blockId, states = _splitBlockKey(key)
+                    entry: Dict[str, Any] = {"x": x, "y": y, "z": z, "id": blockId}
+                    if includeState:
+                        entry["state"] = states
+                    if includeData:
+                        entry["data"] = data if data is not None else "{}"
+                    result.append(entry)
+        self._reply(200, result)
+
+    def _PUT_blocks(self) -> None:
+        body = self._body().decode("utf-8")
+        try:
+            entries = json.loads(body)
+        except json.JSONDecodeError:
+            # GDMC HTTP parses leniently, and some clients send single-quoted strings.
+            entries = ast.literal_eval(body)
+        world = self.server.standIn.world
+        result = []
+        for entry in entries:
+            try:
+                key = _blockKey(entry["id"], entry.get("state"))
+                changed = world.setBlock(int(entry["x"]), int(entry["y"]), int(entry["z"]), key, entry.get("data"))
+                result.append({"status": int(changed)})
+            except (ValueError, KeyError, TypeError) as e:
+                result.append({"status": 0, "message": str(e)})
+        self._reply(200, result)
+
+    def _GET_biomes(self) -> None:
+        query = self._query()
+        biome = self.server.standIn.world.biome
+        result = [
+            {"x": x, "y": y, "z": z, "id": biome if WORLD_Y_BEGIN <= y < WORLD_Y_BEGIN + WORLD_Y_SIZE else ""}
+            for x in _axisRange(int(query["x"]), self._int(query, "dx"))
+            for y in _axisRange(int(query["y"]), self._int(query, "dy"))
+            for z in _axisRange(int(query["z"]), self._int(query, "dz"))
+        ]
+        self._reply(200, result)
+
+    def _GET_chunks(self) -> None:
+        query = self._query()
+        x0, dx = _axisBounds(int(query["x"]), self._int(query, "dx"))
+        z0, dz = _axisBounds(int(query["z"]), self._int(query, "dz"))
+        world = self.server.standIn.world
+
+        root = nbt.NBTFile()
+        root.name = ""
+        root.tags.append(nbt.TAG_Int(name="ChunkX",  value=x0))
+        root.tags.append(nbt.TAG_Int(name="ChunkZ",  value=z0))
+        root.tags.append(nbt.TAG_Int(name="ChunkDX", value=dx))
+        root.tags.append(nbt.TAG_Int(name="ChunkDZ", value=dz))
+        chunks = nbt.TAG_List(name="Chunks", type=nbt.TAG_Compound)
+        for chunkZ in range(z0, z0 + dz):
+            for chunkX in range(x0, x0 + dx):
+                chunks.tags.append(world.chunkTag(chunkX, chunkZ))
+        root.tags.append(chunks)
+
+        if "application/octet-stream" in self.headers.get("Accept", ""):
+            buffer = io.BytesIO()
+            root.write_file(buffer=buffer)
+            self._reply(200, buffer.getvalue(), "application/octet-stream")
+        else:
+            self._reply(200, nbtToSnbt(root), "text/plain")
+
+    def _POST_command(self) -> None:
+        commands = self._body().decode("utf-8").splitlines()
+        self._reply(200, [self.server.standIn.runCommand(command) for command in commands if command.strip()])
+
+    def _POST_structure(self) -> None:
+        query = self._query()
+        if query.get("rotate", "0") not in ("0", "") or query.get("mirror"):
+            raise ValueError("The stand-in server does not support rotating or mirroring structures")
+        body = self._body()
+        if body[:2] == b"\x1f\x8b":
+            body = gzip.decompress(body)
+        structure = nbt.NBTFile(buffer=io.BytesIO(body))
+        offset = (int(query["x"]), int(query["y"]), int(query["z"]))
+        keys = [
+            _blockKey(str(entry["Name"].value), {str(tag.name): str(tag.value) for tag in entry["Properties"].tags} if "Properties" in entry else None)
+            for entry in structure["palette"]
+        ]
+        world = self.server.standIn.world
+        for blockTag in structure["blocks"]:
+            x, y, z = (offset[i] + int(blockTag["pos"][i].value) for i in range(3))
+            world.setBlock(x, y, z, keys[int(blockTag["state"].value)])
+        self._reply(200, {"status": 1})
+
+    def _GET_structure(self) -> None:
+        query = self._query()
+        x0, dx = _axisBounds(int(query["x"]), self._int(query, "dx"))
+        y0, dy = _axisBounds(int(query["y"]), self._int(query, "dy"))
+        z0, dz = _axisBounds(int(query["z"]), self._int(query, "dz"))
+        world = self.server.standIn.world
+
+        root = nbt.NBTFile()
+        root.name = ""
+        root.tags.append(nbt.TAG_Int(name="DataVersion", value=STRUCTURE_DATA_VERSION))
+        sizeTag = nbt.TAG_List(name="size", type=nbt.TAG_Int)
+        sizeTag.tags.extend(nbt.TAG_Int(v) for v in (dx, dy, dz))
+        root.tags.append(sizeTag)
+        palette: Dict[str, int] = {}
+        blocks = nbt.TAG_List(name="blocks", type=nbt.TAG_Compound)
+        for y in range(dy):
+            for z in range(dz):
+                for x in range(dx):
+                    key, _ = world.getBlock(x0 + x, y0 + y, z0 + z)
+                    blockTag = nbt.TAG_Compound()
+                    posTag = nbt.TAG_List(name="pos", type=nbt.TAG_Int)
+                    posTag.tags.extend(nbt.TAG_Int(v) for v in (x, y, z))
+                    blockTag.tags.append(posTag)
+                    blockTag.tags.append(nbt.TAG_Int(name="state", value=palette.setdefault(key, len(palette))))
+                    blocks.tags.append(blockTag)
+        paletteTag = nbt.TAG_List(name="palette", type=nbt.TAG_Compound)
+        for key in palette:
+            blockId, states = _splitBlockKey(key)
+            entry = nbt.TAG_Compound()
+            entry.tags.append(nbt.TAG_String(name="Name", value=blockId))
+            if states:
+                properties = nbt.TAG_Compound(name="Properties")
+                properties.tags.extend(nbt.TAG_String(name=k, value=v) for k, v in states.items())
+                entry.tags.append(properties)
+            paletteTag.tags.append(entry)
+        root.tags.append(paletteTag)
+        root.tags.append(blocks)
+        root.tags.append(nbt.TAG_List(name="entities", type=nbt.TAG_Compound))
+
+        buffer = io.BytesIO()
+        root.write_file(buffer=buffer)
+        self._reply(200, buffer.getvalue(), "application/octet-stream")
+
+    def _GET_entities(self) -> None:
+        self._reply(200, [])
+
+    def _GET_players(self) -> None:
+        self._reply(200, [])
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    standIn: "StandInServer"
+
+
+class StandInServer:
+    """A local stand-in for the GDMC HTTP interface, backed by a :class:`.StandInWorld`.
+
+    See the module documentation for what is and is not supported.
+
+    ``latency`` seconds are added to the handling time of every request, and a fraction
+    ``errorRate`` of all requests fails with an internal server error (500). ``seed`` seeds the
+    error injection.
+    """
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1",
+        port: int = 0,
+        buildArea: Optional[Box] = Box((0, WORLD_Y_BEGIN, 0), (128, WORLD_Y_SIZE, 128)),
+        groundHeight: int = 63,
+        latency: float = 0.0,
+        errorRate: float = 0.0,
+        seed: Optional[int] = None,
+        minecraftVersion: str = "1.20.2",
+        verbose: bool = False,
+    ) -> None:
+        """Constructs a stand-in server. If ``port`` is 0, a free port is chosen.\n
+        The server does not accept requests until :meth:`.start` is called."""
+        self.world            = StandInWorld(groundHeight)
+        self.buildArea        = buildArea
+        self.latency          = latency
+        self.errorRate        = errorRate
+        self.random           = random.Random(seed)
+        self.minecraftVersion = minecraftVersion
+        self.verbose          = verbose
+        self.requestCount     = 0 #: Amount of requests received so far
+        self._requestCountLock = threading.Lock() # Requests are handled on multiple threads
+        self._httpServer = _HTTPServer((address, port), _Handler)
+        self._httpServer.standIn = self
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return f"StandInServer({self.host!r})"
+
+    def __enter__(self) -> "StandInServer":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    @property
+    def host(self) -> str:
+        """The address of this server, in the form expected by the ``host`` parameters of GDPC."""
+        address, port = self._httpServer.server_address[:2]
+        return f"http://{address}:{port}"
+
+    def start(self) -> None:
+        """Starts serving requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpServer.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops serving requests and closes the server socket."""
+        if self._thread is not None:
+            self._httpServer.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpServer.server_close()
+
+    def serveForever(self) -> None:
+        """Serves requests on the calling thread until interrupted."""
+        self._httpServer.serve_forever()
+
+    def runCommand(self, command: str, origin: Tuple[int, int, int] = (0, 0, 0)) -> Dict[str, Any]:
+        """Runs a single command, and returns its result in the format of the ``/command``
+        endpoint."""
+        words = command.strip().lstrip("/").split(" ")
+
+        def coordinates(values: List[str]) -> Tuple[int, ...]:
+            return tuple(
+                origin[i] + (int(value[1:]) if value[1:] else 0) if value.startswith("~") else int(value)
+                for i, value in enumerate(values)
+            )
+
+        try:
+            if words[0] == "execute" and words[1] == "positioned" and words[5] == "run":
+                return self.runCommand(" ".join(words[6:]), coordinates(words[2:5]))
+
+            if words[0] == "setblock":
+                key, data = _parseBlockString(" ".join(words[4:5]))
+                if len(words) > 5 and words[5] == "keep" and self.world.getBlock(*coordinates(words[1:4]))[0] not in _AIR_IDS:
+                    return {"status": 0, "message": "Could not set the block"}
+                if not self.world.setBlock(*coordinates(words[1:4]), key, data):
+                    return {"status": 0, "message": "Could not set the block"}
+                return {"status": 1, "message": "Changed the block"}
+
+            if words[0] == "fill":
+                box = Box.between(coordinates(words[1:4]), coordinates(words[4:7]))
+                if box.volume > FILL_LIMIT:
+                    return {"status": 0, "message": f"Too many blocks in the specified area (maximum {FILL_LIMIT}, specified {box.volume})"}
+                if len(words) > 8 and words[8] not in ("replace", "destroy"):
+                    return {"status": 0, "message": f"Fill mode '{words[8]}' is not supported by the stand-in server"}
+                if len(words) > 9:
+                    return {"status": 0, "message": "Fill filters are not supported by the stand-in server"}
+                key, data = _parseBlockString(words[7])
+                count = self.world.fill(box, key, data)
+                return {"status": count, "message": f"Successfully filled {count} block(s)"}
+
+            if words[0] == "setbuildarea":
+                self.buildArea = Box.between(coordinates(words[1:4]), coordinates(words[4:7]))
+                return {"status": 1, "message": "Build area set"}
+
+        except (ValueError, IndexError) as e:
+            return {"status": 0, "message": str(e)}
+
+        return {"status": 0, "message": f"Unknown or unsupported command: {command}"}
+
+
+def main() -> None:
+    """Runs a stand-in server from the command line."""
+    parser = argparse.ArgumentParser(description="Runs a local stand-in for the GDMC HTTP interface.")
+    parser.add_argument("--address",   default="127.0.0.1")
+    parser.add_argument("--port",      type=int,   default=9000)
+    parser.add_argument("--ground",    type=int,   default=63,  help="y coordinate of the grass layer")
+    parser.add_argument("--latency",   type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--errorRate", type=float, default=0.0, help="fraction of requests that fail with a 500")
+    parser.add_argument("--seed",      type=int,   default=None)
+    parser.add_argument("--verbose",   action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = StandInServer(args.address, args.port, groundHeight=args.ground, latency=args.latency, errorRate=args.errorRate, seed=args.seed, verbose=args.verbose)
+    print(f"Serving a GDMC HTTP interface stand-in at {server.host}")
+    try:
+        server.serveForever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from __future__ import annotations
 from typing import Union
 from dataclasses import dataclass
 
+import numpy as np
 from glm import ivec3, bvec3
 
 from .vector_tools import Vec3iLike, Vec3bLike, rotate3D, flipRotation3D, flipToScale3D, rotateSize3D, Box, Tuple
@@ -77,6 +78,16 @@ class Transform:
         Equivalent to ``self * vec``. """
         return rotate3D(ivec3(*vec) * flipToScale3D(self._flip), self._rotation) + self._translation
 
+    def applyToArray(self, vecs: np.ndarray) -> np.ndarray:
+        """Applies this transform to each row of the (N,3) integer array ``vecs``.\n
+        Vectorized version of :meth:`.apply`."""
+        vecs = np.asarray(vecs).reshape(-1, 3) * np.array(flipToScale3D(self._flip))
+        x, y, z = vecs[:, 0], vecs[:, 1], vecs[:, 2]
+        if   self._rotation == 1: x, z = -z,  x
+        elif self._rotation == 2: x, z = -x, -z
+        elif self._rotation == 3: x, z =  z, -x
+        return np.stack((x, y, z), axis=1) + np.array(self._translation)
+
     def invApply(self, vec: Vec3iLike) -> ivec3:
         """Applies the inverse of this transform to ``vec``.\n
         Faster version of ``~self * vec``."""
@@ -1,7 +1,8 @@
 """Various generic utilities."""
 
-from typing import Any, Generator, Sequence, TypeVar, Generic, Callable, Iterable, OrderedDict, Union
+from typing import Any, Generator, Sequence, TypeVar, Generic, Callable, Iterable, OrderedDict, Union, Tuple
 import time
+import random
 from pathlib import Path
 
 from deprecated import deprecated
@@ -52,14 +53,16 @@ def normalized(a, order=2, axis=-1):
 
 def withRetries(
     function:      Callable[[], T],
-    exceptionType: type                             = Exception,
+    exceptionType: Union[type, Tuple[type, ...]]    = Exception,
     retries:       int                              = 1,
     onRetry:       Callable[[Exception, int], None] = lambda *_: time.sleep(1),
     reRaise:       bool                             = True
 ) -> Union[T, None]:
     """Retries ``function`` up to ``retries`` times if an exception occurs.\n
+    ``exceptionType`` may also be a tuple of exception types.\n
     Before retrying, calls ``onRetry(<last exception>, <remaining retries>)``.
-    The default callback sleeps for one second.\n
+    The default callback sleeps for one second. If the callback raises, no further retries are
+    made.\n
     If the retries have ran out and ``reRaise`` is ``True``, the last exception is re-raised."""
     while True:
         try:
@@ -73,6 +76,13 @@ def withRetries(
             retries -= 1
 
 
+def exponentialBackoff(attempt: int, base: float = 0.5, maximum: float = 10.0) -> float:
+    """Returns a random delay for retry number ``attempt`` (starting at 0), for use between retries.\n
+    The delay is drawn uniformly from [0, min(``maximum``, ``base`` * 2^``attempt``)] ("full
+    jitter"), which spreads out the retries of clients that failed at the same time."""
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
 def isIterable(value) -> bool:
     """Determine whether ``value`` is iterable."""
     try:
@@ -1,88 +1,325 @@
 """Provides the :class:`.WorldSlice` class"""
 
-from typing import Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Mapping, Optional, List, Set, Tuple
 from dataclasses import dataclass
 from io import BytesIO
-from math import floor, ceil, log2
+from math import ceil, log2
+from concurrent import futures
+from multiprocessing import resource_tracker, shared_memory
+import multiprocessing
+import logging
 
 from glm import ivec2, ivec3
 from nbt import nbt
 from nbt.nbt import TAG_Compound
 import numpy as np
+import requests
 
-from .vector_tools import Vec3iLike, addY, loop2D, loop3D, trueMod2D, Rect, Box
+from .vector_tools import Vec3iLike, addY, loop2D, trueMod2D, Rect, Box
 from .block import Block
 from . import interface
+from .metrics import MetricsRegistry
+from .exceptions import InterfaceTimeoutError
+
+
+logger = logging.getLogger(__name__)
 
 
 # Chunk format information:
 # https://minecraft.wiki/Chunk_format
 
 
-class _BitArray:
-    """Store an array of binary values and its metrics.
+DEFAULT_TILE_SIZE = 8
+"""Default width (in chunks) of the square tiles in which a :class:`.WorldSlice` is downloaded"""
 
-    Minecraft stores block and heightmap data in compacted arrays of longs (bitarrays).
-    This class performs index mapping and bit shifting to access the data.
-    """
+DEFAULT_DOWNLOAD_WORKERS = 4
+"""Default maximum amount of tiles a :class:`.WorldSlice` downloads at the same time"""
 
-    def __init__(self, bitsPerEntry: int, logicalArraySize: int, data) -> None:
-        """Initialise a BitArray."""
-        self._logicalArraySize = logicalArraySize
-        self._bitsPerEntry     = bitsPerEntry
-        self._entriesPerLong   = 64 // bitsPerEntry
-        self._maxEntryValue    = (1 << bitsPerEntry) - 1
-        if data is None:
-            self.longArray = []
-        else:
-            expectedLongCount = floor((logicalArraySize + self._entriesPerLong - 1) / self._entriesPerLong)
-            if len(data) != expectedLongCount:
-                raise ValueError(f"Invalid data length: got {len(data)} but expected {expectedLongCount}")
-            self.longArray = data
+DECODE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+"""Start method of the worker processes of a :class:`.WorldSlice` with ``decodeWorkers``.\n
+Tiles are submitted to the workers from download threads, and forking a process while other
+threads hold locks (of the HTTP session or of :mod:`logging`) can deadlock the child, so the
+``fork`` start method is not used."""
 
-    def __repr__(self) -> str:
-        """Represents the BitArray as a constructor."""
-        return f"BitArray{(self._bitsPerEntry, self._logicalArraySize, self.longArray)}"
-
-    def __getitem__(self, index: int) -> int:
-        """Returns the binary value stored at ``index``."""
-        # If longArray size is 0, this is because the corresponding palette
-        # only contains a single value.
-        if len(self.longArray) == 0:
-            return 0
-        longIndex = index // self._entriesPerLong
-        long = self.longArray[longIndex]
-        k = (index - longIndex * self._entriesPerLong) * self._bitsPerEntry
-        return long >> k & self._maxEntryValue
 
-    def __len__(self) -> int:
-        """Returns the logical array size."""
-        return self._logicalArraySize
+def _unpackBitArray(bitsPerEntry: int, entryCount: int, data) -> np.ndarray:
+    """Unpacks a Minecraft bitarray into a uint16 array of ``entryCount`` entries.\n
+    ``data`` is a sequence of signed 64-bit longs (such as a ``TAG_Long_Array``) in which each long
+    holds ``64 // bitsPerEntry`` entries, starting at the least significant bits. Since Minecraft
+    1.16, entries do not span multiple longs: the remaining high bits of each long are padding.\n
+    If ``data`` is None or empty, the corresponding palette only contains a single value, and an
+    array of zeros is returned."""
+    if data is None or len(data) == 0:
+        return np.zeros(entryCount, dtype=np.uint16)
+    entriesPerLong = 64 // bitsPerEntry
+    expectedLongCount = (entryCount + entriesPerLong - 1) // entriesPerLong
+    if len(data) != expectedLongCount:
+        raise ValueError(f"Invalid data length: got {len(data)} but expected {expectedLongCount}")
+    longs  = np.array(data, dtype=np.int64).view(np.uint64)
+    shifts = np.arange(0, entriesPerLong * bitsPerEntry, bitsPerEntry, dtype=np.uint64)
+    mask   = np.uint64((1 << bitsPerEntry) - 1)
+    entries = (longs[:, np.newaxis] >> shifts) & mask
+    return entries.reshape(-1)[:entryCount].astype(np.uint16)
 
 
 @dataclass
 class _ChunkSection:
-    """Represents a chunk section or sub-chunk (16x16x16)."""
+    """Represents a chunk section or sub-chunk (16x16x16).\n
+    ``blockStates`` holds the block palette index of each of the 4096 blocks, in YZX order.
+    ``biomes`` holds the biome palette index of each of the 64 4x4x4 groups, also in YZX order."""
 
-    blockPalette:        nbt.TAG_List
-    blockStatesBitArray: _BitArray
-    biomesPalette:       nbt.TAG_List
-    biomesBitArray:      _BitArray
+    blockPalette:  nbt.TAG_List
+    blockStates:   np.ndarray
+    biomesPalette: nbt.TAG_List
+    biomes:        np.ndarray
 
     def getBlockStateTagAtIndex(self, index) -> nbt.TAG_Compound:
-        return self.blockPalette[self.blockStatesBitArray[index]]
+        return self.blockPalette[self.blockStates[index]]
 
     def getBiomeAtIndex(self, index) -> nbt.TAG_String:
-        return self.biomesPalette[self.biomesBitArray[index]]
+        return self.biomesPalette[self.biomes[index]]
+
+
+def _blockEntityPosition(blockEntityTag: TAG_Compound) -> ivec3:
+    """Returns the global position of a block entity tag."""
+    return ivec3(
+        blockEntityTag['x'].value,
+        blockEntityTag['y'].value,
+        blockEntityTag['z'].value
+    )
+
+
+def _decodeChunkSection(sectionTag: TAG_Compound) -> _ChunkSection:
+    """Decodes a chunk section tag that has block states."""
+    blockPalette = sectionTag['block_states']['palette']
+    blockData = None
+    if 'data' in sectionTag['block_states']:
+        blockData = sectionTag['block_states']['data']
+    blockPaletteBitsPerEntry = max(4, ceil(log2(len(blockPalette))))
+    blockStates = _unpackBitArray(blockPaletteBitsPerEntry, 16*16*16, blockData)
+
+    biomesPalette = sectionTag['biomes']['palette']
+    biomesData = None
+    if 'data' in sectionTag['biomes']:
+        biomesData = sectionTag['biomes']['data']
+    biomesBitsPerEntry = max(1, ceil(log2(len(biomesPalette))))
+    biomes = _unpackBitArray(biomesBitsPerEntry, 64, biomesData)
+
+    return _ChunkSection(blockPalette, blockStates, biomesPalette, biomes)
+
+
+class _LazyMapping(Mapping):
+    """A read-only mapping with a fixed set of keys, of which each value is computed by
+    ``compute(key)`` on first access and then memoized."""
+
+    def __init__(self, keys: Iterable[Hashable], compute: Callable[[Hashable], Any]) -> None:
+        self._keys    = list(keys)
+        self._compute = compute
+        self._values: Dict[Hashable, Any] = {}
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self._values.get(key)
+        if value is None:
+            if key not in self._keys:
+                raise KeyError(key)
+            value = self._values[key] = self._compute(key)
+        return value
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"_LazyMapping({self._keys})"
+
+
+def _splitRect(rect: Rect) -> List[Rect]:
+    """Splits ``rect`` in half along each axis that is longer than 1."""
+    xSizes = [rect.size.x] if rect.size.x == 1 else [rect.size.x // 2, rect.size.x - rect.size.x // 2]
+    ySizes = [rect.size.y] if rect.size.y == 1 else [rect.size.y // 2, rect.size.y - rect.size.y // 2]
+    return [
+        Rect(rect.offset + ivec2(sum(xSizes[:i]), sum(ySizes[:j])), ivec2(xSize, ySize))
+        for j, ySize in enumerate(ySizes)
+        for i, xSize in enumerate(xSizes)
+    ]
+
+
+def _parseChunks(chunkBytes: bytes) -> nbt.NBTFile:
+    """Parses the body of a :func:`.interface.getChunks` response."""
+    return nbt.NBTFile(buffer=BytesIO(chunkBytes))
+
+
+def _downloadChunkTiles(chunkRect: Rect, tileSize: Optional[int], workers: int, process: Callable[[bytes], Any], **kwargs) -> List[Tuple[Rect, Any]]:
+    """Downloads the chunks in ``chunkRect`` in tiles of at most ``tileSize`` by ``tileSize``
+    chunks, using up to ``workers`` concurrent requests.\n
+    Returns a list of (tile, result)-tuples, where result is ``process`` applied to the response
+    body of the tile. ``process`` is called in the downloading thread.\n
+    If a tile times out, it is split into smaller tiles that are downloaded instead.\n
+    ``kwargs`` are passed to :func:`.interface.getChunks`."""
+
+    def download(tile: Rect) -> Any:
+        return process(interface.getChunks(tile.offset, tile.size, asBytes=True, **kwargs))
+
+    if tileSize is None or (chunkRect.size.x <= tileSize and chunkRect.size.y <= tileSize):
+        return [(chunkRect, download(chunkRect))]
+
+    tiles = [
+        Rect(chunkRect.offset + ivec2(x, z), ivec2(min(tileSize, chunkRect.size.x - x), min(tileSize, chunkRect.size.y - z)))
+        for z in range(0, chunkRect.size.y, tileSize)
+        for x in range(0, chunkRect.size.x, tileSize)
+    ]
+
+    results: List[Tuple[Rect, Any]] = []
+    with futures.ThreadPoolExecutor(workers) as executor:
+        pending = {executor.submit(download, tile): tile for tile in tiles}
+        while pending:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                tile = pending.pop(future)
+                try:
+                    results.append((tile, future.result()))
+                except InterfaceTimeoutError:
+                    if tile.area == 1:
+                        raise
+                    logger.warning("Chunk download for %s timed out; retrying it in smaller tiles.", tile)
+                    for subTile in _splitRect(tile):
+                        pending[executor.submit(download, subTile)] = subTile
+    return results
+
+
+def _tileChunkPositions(chunkRect: Rect, tile: Rect) -> List[ivec2]:
+    """Returns the positions relative to ``chunkRect`` of the chunks of ``tile``, in the order of
+    a :func:`.interface.getChunks` response (x-major, then z)."""
+    return [tile.offset - chunkRect.offset + ivec2(i % tile.size.x, i // tile.size.x) for i in range(tile.area)]
+
+
+def _mergeChunkTiles(chunkRect: Rect, tiles: List[Tuple[Rect, nbt.NBTFile]]) -> nbt.NBTFile:
+    """Merges the NBT files of the downloaded ``tiles`` of ``chunkRect`` into a single NBT file
+    with the same layout as a single :func:`.interface.getChunks` response."""
+    if len(tiles) == 1 and tiles[0][0] == chunkRect:
+        return tiles[0][1]
+
+    chunkTags: List[Optional[TAG_Compound]] = [None] * chunkRect.area
+    for tile, tileNbt in tiles:
+        for chunkPos, chunkTag in zip(_tileChunkPositions(chunkRect, tile), tileNbt["Chunks"]):
+            chunkTags[chunkPos.x + chunkPos.y * chunkRect.size.x] = chunkTag
+
+    merged = nbt.NBTFile()
+    firstTileNbt = next(tileNbt for tile, tileNbt in tiles if tile.offset == chunkRect.offset)
+    merged.name = firstTileNbt.name
+    for tag in firstTileNbt.tags:
+        if tag.name != "Chunks":
+            merged.tags.append(tag)
+    for name, value in (("ChunkX", chunkRect.offset.x), ("ChunkZ", chunkRect.offset.y), ("ChunkDX", chunkRect.size.x), ("ChunkDZ", chunkRect.size.y)):
+        if name in merged:
+            merged[name].value = value
+    chunksTag = nbt.TAG_List(name="Chunks", type=nbt.TAG_Compound)
+    chunksTag.tags.extend(chunkTags)
+    merged.tags.append(chunksTag)
+    return merged
+
+
+def _loadChunks(chunkRect: Rect, tileSize: Optional[int], workers: int, **kwargs) -> nbt.NBTFile:
+    """Downloads the chunks in ``chunkRect`` (see :func:`_downloadChunkTiles`) and merges them
+    into a single NBT file with the same layout as a single :func:`.interface.getChunks`
+    response."""
+    return _mergeChunkTiles(chunkRect, _downloadChunkTiles(chunkRect, tileSize, workers, _parseChunks, **kwargs))
+
+
+def _decodeChunkTile(chunkBytes: bytes, heightmapTypes: List[str]) -> Tuple[Optional[str], int, List[Tuple[int, int, List[Tuple[int, nbt.TAG_List, nbt.TAG_List]], List[TAG_Compound]]]]:
+    """Parses a downloaded tile of chunks and unpacks its heightmaps, block states and biomes.\n
+    This runs in the worker processes of a :class:`.WorldSlice` with ``decodeWorkers``. To avoid
+    pickling them, the unpacked uint16 arrays are written one after the other into a new shared
+    memory block: for each chunk, its heightmaps in the order of ``heightmapTypes``, followed by
+    the block states and the biomes of each of its sections that has block states.\n
+    Returns a tuple (sharedMemoryName, entryCount, chunks), where sharedMemoryName is None if
+    there are no entries, and chunks holds a tuple (yPos, sectionCount, sections,
+    blockEntityTags) for each chunk. sections holds a tuple (Y, blockPalette, biomesPalette) for
+    each section that has block states."""
+    tileNbt = _parseChunks(chunkBytes)
+    arrays: List[np.ndarray] = []
+    chunks = []
+    for chunkTag in tileNbt["Chunks"]:
+        sectionCount = len(chunkTag["sections"])
+        hmBitsPerEntry = max(1, ceil(log2(16 * sectionCount)))
+        for hmName in heightmapTypes:
+            arrays.append(_unpackBitArray(hmBitsPerEntry, 16*16, chunkTag["Heightmaps"][hmName]))
+        sections = []
+        for sectionTag in chunkTag["sections"]:
+            if 'block_states' in sectionTag and len(sectionTag['block_states']) > 0:
+                section = _decodeChunkSection(sectionTag)
+                arrays += (section.blockStates, section.biomes)
+                sections.append((int(sectionTag["Y"].value), section.blockPalette, section.biomesPalette))
+        blockEntityTags = list(chunkTag["block_entities"].tags) if "block_entities" in chunkTag else []
+        chunks.append((int(chunkTag["yPos"].value), sectionCount, sections, blockEntityTags))
+
+    entryCount = sum(len(array) for array in arrays)
+    if entryCount == 0:
+        return None, 0, chunks
+    sharedMemory = shared_memory.SharedMemory(create=True, size=2 * entryCount)
+    entries = np.ndarray(entryCount, dtype=np.uint16, buffer=sharedMemory.buf)
+    offset = 0
+    for array in arrays:
+        entries[offset : offset + len(array)] = array
+        offset += len(array)
+    del entries
+    sharedMemory.close()
+    return sharedMemory.name, entryCount, chunks
+
+
+def _takeSharedArray(sharedMemoryName: Optional[str], entryCount: int) -> np.ndarray:
+    """Copies the uint16 entries of the shared memory block created by :func:`_decodeChunkTile`
+    into a new array, and then frees the block."""
+    if sharedMemoryName is None:
+        return np.zeros(0, dtype=np.uint16)
+    sharedMemory = shared_memory.SharedMemory(name=sharedMemoryName)
+    try:
+        entries = np.ndarray(entryCount, dtype=np.uint16, buffer=sharedMemory.buf)
+        array = entries.copy()
+        del entries
+    finally:
+        sharedMemory.close()
+        sharedMemory.unlink()
+    return array
+
+
+def _freeSharedMemory(sharedMemoryName: Optional[str]) -> None:
+    """Frees the shared memory block created by :func:`_decodeChunkTile` without reading it."""
+    if sharedMemoryName is None:
+        return
+    try:
+        sharedMemory = shared_memory.SharedMemory(name=sharedMemoryName)
+    except FileNotFoundError:
+        return
+    sharedMemory.close()
+    sharedMemory.unlink()
 
 
 class WorldSlice:
     """Contains information on a slice of the world."""
 
-    def __init__(self, rect: Rect, dimension: Optional[str] = None, heightmapTypes: Optional[Iterable[str]] = None, retries=0, timeout=None, host=interface.DEFAULT_HOST) -> None:
+    def __init__(self, rect: Rect, dimension: Optional[str] = None, heightmapTypes: Optional[Iterable[str]] = None, retries=0, timeout=None, deadline: Optional[float] = None, host=interface.DEFAULT_HOST, session: Optional[requests.Session] = None, metrics: Optional[MetricsRegistry] = None, tileSize: Optional[int] = DEFAULT_TILE_SIZE, downloadWorkers: int = DEFAULT_DOWNLOAD_WORKERS, lazy=False, decodeWorkers: Optional[int] = None) -> None:
         """Load a world slice.
 
-        If ``heightmapTypes`` is None, all heightmaps are loaded.
+        If ``heightmapTypes`` is None, all heightmaps are loaded.\n
+        If ``session`` is given, the chunk data is requested through it (see
+        :class:`.interface.SessionPool`). If ``metrics`` is given, the requests are recorded in
+        it as well as in :data:`.interface.requestMetrics`.\n
+        Large areas are downloaded in square tiles of ``tileSize`` by ``tileSize`` chunks, with up
+        to ``downloadWorkers`` tiles in flight at the same time. If ``timeout`` is set and a tile
+        times out, it is split into smaller tiles automatically. If ``tileSize`` is None, the
+        whole area is downloaded with a single request.\n
+        If ``lazy`` is True, the chunk data is only indexed when the slice is loaded. Each chunk
+        section, each heightmap type and the block entities are then decoded when they are first
+        accessed. This makes loading large areas much faster if only a part of the data is used.\n
+        If ``decodeWorkers`` is set (and ``lazy`` is False), the downloaded tiles are parsed and
+        decoded in a pool of ``decodeWorkers`` processes while the remaining tiles download. This
+        speeds up loading large areas on machines with multiple cores. The NBT data is then only
+        parsed in this process if :attr:`.nbt` is accessed. The workers are started with
+        :data:`.DECODE_START_METHOD`, which imports the main module in each of them, so the main
+        module of your program must guard its code with ``if __name__ == "__main__":``.
         """
 
         # To protect from calling this with a Box, which can lead to very confusing bugs.
@@ -103,81 +340,136 @@ class WorldSlice:
             ((self._rect.last) >> 4) - (self._rect.offset >> 4) + 1
         )
 
-        chunkBytes = interface.getChunks(self._chunkRect.offset, self._chunkRect.size, dimension=dimension, asBytes=True, retries=retries, timeout=timeout, host=host)
-        chunkBuffer = BytesIO(chunkBytes)
+        downloadArgs = dict(dimension=dimension, retries=retries, timeout=timeout, deadline=deadline, host=host, session=session, metrics=metrics)
 
-        self._nbt = nbt.NBTFile(buffer=chunkBuffer)
-
-        self._heightmaps: Dict[str, np.ndarray] = {}
-        for hmName in heightmapTypes:
-            self._heightmaps[hmName] = np.zeros(self._rect.size, dtype=int)
+        self._lazy = lazy
+        self._decodeWorkers = None if lazy else decodeWorkers
 
+        self._nbt: Optional[nbt.NBTFile] = None
+        self._tileBytes: List[Tuple[Rect, bytes]] = []
+        self._sectionTags: Dict[ivec3, TAG_Compound] = {}
         self._sections: Dict[ivec3, _ChunkSection] = {}
+        self._blockEntities: Optional[Dict[ivec3, TAG_Compound]] = None
+        self._heightmaps: Mapping[str, np.ndarray]
 
-        self._blockEntities: Dict[ivec3, nbt.TAG_Compound] = {}
+        if self._decodeWorkers is not None:
+            self._loadDecodedChunks(list(heightmapTypes), tileSize, downloadWorkers, downloadArgs)
 
-        inChunkRectOffset = trueMod2D(self._rect.offset, 16)
-
-        # This assumes that the build bounds are the same for every chunk.
-        self._yBegin = 16 * int(self._nbt["Chunks"][0]["yPos"].value)
-        self._ySize  = 16 * len(self._nbt["Chunks"][0]["sections"])
-
-        # Loop through chunks
+        else:
+            self._nbt = _loadChunks(self._chunkRect, tileSize, downloadWorkers, **downloadArgs)
+
+            # This assumes that the build bounds are the same for every chunk.
+            self._yBegin = 16 * int(self._nbt["Chunks"][0]["yPos"].value)
+            self._ySize  = 16 * len(self._nbt["Chunks"][0]["sections"])
+
+            # Index the chunk sections that have block states
+            for chunkPos in loop2D(self._chunkRect.size):
+                for sectionTag in self._getChunkTag(chunkPos)['sections']:
+                    if 'block_states' in sectionTag and len(sectionTag['block_states']) > 0:
+                        self._sectionTags[addY(chunkPos, int(sectionTag['Y'].value))] = sectionTag
+
+            if lazy:
+                self._heightmaps = _LazyMapping(heightmapTypes, self._decodeHeightmap)
+            else:
+                self._heightmaps = {hmName: self._decodeHeightmap(hmName) for hmName in heightmapTypes}
+                for sectionPos, sectionTag in self._sectionTags.items():
+                    self._sections[sectionPos] = _decodeChunkSection(sectionTag)
+                self._blockEntities = self._decodeBlockEntities()
+
+        self._overlay: Dict[ivec3, Block] = {}
+
+        self._blockIndexArray: Optional[np.ndarray] = None
+        self._blockPalette: List[Block] = []
+        self._blockPaletteIndices: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+
+
+    def _getChunkTag(self, chunkPos: ivec2) -> TAG_Compound:
+        """Returns the tag of the chunk at local chunk position ``chunkPos``."""
+        return self._nbt['Chunks'][chunkPos.x + chunkPos.y * self._chunkRect.size.x]
+
+    def _pasteHeightmapChunk(self, heightmap: np.ndarray, chunkPos: ivec2, hmChunk: np.ndarray) -> None:
+        """Copies the part of the unpacked heightmap data ``hmChunk`` of the chunk at local chunk
+        position ``chunkPos`` that lies in the rect into ``heightmap``."""
+        # The part of this chunk that lies in the rect, in chunk-local and in rect coordinates.
+        chunkOffset = chunkPos * 16 - trueMod2D(self._rect.offset, 16)
+        xBegin, zBegin = max(0, -chunkOffset.x), max(0, -chunkOffset.y)
+        xEnd,   zEnd   = min(16, self._rect.size.x - chunkOffset.x), min(16, self._rect.size.y - chunkOffset.y)
+        # Heightmap data is in ZX order. In the heightmap data, the lowest point is encoded
+        # as 0, while since Minecraft 1.18 the actual lowest y position is below zero. We
+        # add yBegin to the heightmap values to compensate for this difference.
+        heightmap[
+            chunkOffset.x + xBegin : chunkOffset.x + xEnd,
+            chunkOffset.y + zBegin : chunkOffset.y + zEnd,
+        ] = hmChunk.reshape(16, 16).T[xBegin:xEnd, zBegin:zEnd].astype(int) + self._yBegin
+
+    def _decodeHeightmap(self, hmName: str) -> np.ndarray:
+        """Decodes the heightmap of type ``hmName`` for the whole rect."""
+        heightmap = np.zeros(self._rect.size, dtype=int)
+        hmBitsPerEntry = max(1, ceil(log2(self._ySize)))
         for chunkPos in loop2D(self._chunkRect.size):
-            chunkID = chunkPos.x + chunkPos.y * self._chunkRect.size.x
-            chunkTag = self._nbt['Chunks'][chunkID]
-
-            # Read heightmaps
-            heightmapsTag = chunkTag['Heightmaps']
-            for hmName in heightmapTypes:
-                hmRaw = heightmapsTag[hmName]
-                hmBitsPerEntry = max(1, ceil(log2(self._ySize)))
-                hmBitArray = _BitArray(hmBitsPerEntry, 16*16, hmRaw)
-                heightmap = self._heightmaps[hmName]
-                for inChunkPos in loop2D(ivec2(16,16)):
-                    try:
-                        # In the heightmap data, the lowest point is encoded as 0, while since
-                        # Minecraft 1.18 the actual lowest y position is below zero. We subtract
-                        # yBegin from the heightmap value to compensate for this difference.
-                        hmPos = -inChunkRectOffset + chunkPos * 16 + inChunkPos # pylint: disable=invalid-unary-operand-type
-                        heightmap[hmPos.x, hmPos.y] = hmBitArray[inChunkPos.y * 16 + inChunkPos.x] + self._yBegin
-                    except IndexError:
-                        pass
-
-            # Read chunk sections
-            for sectionTag in chunkTag['sections']:
-                y = int(sectionTag['Y'].value)
-
-                if (not ('block_states' in sectionTag) or len(sectionTag['block_states']) == 0):
-                    continue
-
-                blockPalette = sectionTag['block_states']['palette']
-                blockData = None
-                if 'data' in sectionTag['block_states']:
-                    blockData = sectionTag['block_states']['data']
-                blockPaletteBitsPerEntry = max(4, ceil(log2(len(blockPalette))))
-                blockDataBitArray = _BitArray(blockPaletteBitsPerEntry, 16*16*16, blockData)
-
-                biomesPalette = sectionTag['biomes']['palette']
-                biomesData = None
-                if 'data' in sectionTag['biomes']:
-                    biomesData = sectionTag['biomes']['data']
-                biomesBitsPerEntry = max(1, ceil(log2(len(biomesPalette))))
-                biomesDataBitArray = _BitArray(biomesBitsPerEntry, 64, biomesData)
-
-                self._sections[addY(chunkPos, y)] = _ChunkSection(
-                    blockPalette, blockDataBitArray, biomesPalette, biomesDataBitArray
-                )
-
-            # Read block entities
+            hmRaw = self._getChunkTag(chunkPos)['Heightmaps'][hmName]
+            self._pasteHeightmapChunk(heightmap, chunkPos, _unpackBitArray(hmBitsPerEntry, 16*16, hmRaw))
+        return heightmap
+
+    def _loadDecodedChunks(self, heightmapTypes: List[str], tileSize: Optional[int], downloadWorkers: int, downloadArgs: Dict[str, Any]) -> None:
+        """Downloads the chunks and decodes them in a pool of :attr:`.decodeWorkers` processes.\n
+        Each tile is submitted for decoding as soon as it has been downloaded."""
+        # The workers create shared memory blocks that this process frees. Starting the resource
+        # tracker first makes the workers share it, so it does not report the blocks as leaked.
+        resource_tracker.ensure_running()
+        submitted: List[futures.Future] = []
+        taken: Set[str] = set()
+        try:
+            with futures.ProcessPoolExecutor(self._decodeWorkers, mp_context=multiprocessing.get_context(DECODE_START_METHOD)) as executor:
+
+                def submit(chunkBytes: bytes) -> Tuple[bytes, futures.Future]:
+                    future = executor.submit(_decodeChunkTile, chunkBytes, heightmapTypes)
+                    submitted.append(future)
+                    return chunkBytes, future
+
+                tiles = _downloadChunkTiles(self._chunkRect, tileSize, downloadWorkers, submit, **downloadArgs)
+                decodedTiles = []
+                for tile, (_, future) in tiles:
+                    sharedMemoryName, entryCount, chunks = future.result()
+                    if sharedMemoryName is not None:
+                        taken.add(sharedMemoryName)
+                    decodedTiles.append((tile, _takeSharedArray(sharedMemoryName, entryCount), chunks))
+        finally:
+            # If anything failed, free the blocks of the tiles that were decoded but not taken.
+            # Leaving the executor waits for all workers, so every future is done here.
+            for future in submitted:
+                if not future.cancelled() and future.exception() is None and future.result()[0] not in taken:
+                    _freeSharedMemory(future.result()[0])
+        self._tileBytes = [(tile, chunkBytes) for tile, (chunkBytes, _) in tiles]
+
+        heightmaps = {hmName: np.zeros(self._rect.size, dtype=int) for hmName in heightmapTypes}
+        self._blockEntities = {}
+        for tile, entries, chunks in decodedTiles:
+            offset = 0
+            for chunkPos, (yPos, sectionCount, sections, blockEntityTags) in zip(_tileChunkPositions(self._chunkRect, tile), chunks):
+                # This assumes that the build bounds are the same for every chunk.
+                self._yBegin = 16 * yPos
+                self._ySize  = 16 * sectionCount
+                for hmName in heightmapTypes:
+                    self._pasteHeightmapChunk(heightmaps[hmName], chunkPos, entries[offset : offset + 16*16])
+                    offset += 16*16
+                for y, blockPalette, biomesPalette in sections:
+                    blockStates = entries[offset : offset + 16*16*16]
+                    biomes      = entries[offset + 16*16*16 : offset + 16*16*16 + 64]
+                    self._sections[addY(chunkPos, y)] = _ChunkSection(blockPalette, blockStates, biomesPalette, biomes)
+                    offset += 16*16*16 + 64
+                for blockEntityTag in blockEntityTags:
+                    self._blockEntities[_blockEntityPosition(blockEntityTag)] = blockEntityTag
+        self._heightmaps = heightmaps
+
+    def _decodeBlockEntities(self) -> Dict[ivec3, TAG_Compound]:
+        """Collects the block entity tags of all chunks by global position."""
+        blockEntities: Dict[ivec3, TAG_Compound] = {}
+        for chunkTag in self._nbt['Chunks']:
             if 'block_entities' in chunkTag:
                 for blockEntityTag in chunkTag['block_entities']:
-                    blockEntityPos = ivec3(
-                        blockEntityTag['x'].value,
-                        blockEntityTag['y'].value,
-                        blockEntityTag['z'].value
-                    )
-                    self._blockEntities[blockEntityPos] = blockEntityTag
+                    blockEntities[_blockEntityPosition(blockEntityTag)] = blockEntityTag
+        return blockEntities
 
 
     def __repr__(self) -> str:
@@ -217,14 +509,101 @@ class WorldSlice:
     @property
     def nbt(self) -> nbt.NBTFile:
         """The parsed NBT data for the chunks of this WorldSlice.\n
-        Its structure is described in the GDMC HTTP interface API."""
+        Its structure is described in the GDMC HTTP interface API.\n
+        If this WorldSlice was decoded by :attr:`.decodeWorkers`, the data is parsed on first
+        access."""
+        if self._nbt is None:
+            self._nbt = _mergeChunkTiles(self._chunkRect, [(tile, _parseChunks(chunkBytes)) for tile, chunkBytes in self._tileBytes])
+            self._tileBytes = []
         return self._nbt
 
     @property
-    def heightmaps(self) -> Dict[str, np.ndarray]:
-        """The heightmaps of this WorldSlice."""
+    def heightmaps(self) -> Mapping[str, np.ndarray]:
+        """The heightmaps of this WorldSlice.\n
+        If this WorldSlice is lazy, each heightmap is decoded when it is first retrieved."""
         return self._heightmaps
 
+    @property
+    def lazy(self) -> bool:
+        """Whether the chunk data of this WorldSlice is decoded on first access."""
+        return self._lazy
+
+    @property
+    def decodeWorkers(self) -> Optional[int]:
+        """The amount of processes the chunk data of this WorldSlice was decoded in, or None if it
+        was decoded in this process."""
+        return self._decodeWorkers
+
+    @property
+    def overlay(self) -> Dict[ivec3, Block]:
+        """The blocks that were set with :meth:`.setBlockGlobal` and related methods, by global
+        position.\n
+        Should not be modified directly."""
+        return self._overlay
+
+    @property
+    def blockIndexArray(self) -> np.ndarray:
+        """A uint16 array of shape ``box.size`` that holds, for each local position in this
+        WorldSlice, the index in :attr:`.blockPalette` of the block at that position.\n
+        This allows queries over the whole slice without per-block calls. For example, a boolean
+        array that indicates the positions of all water blocks is given by
+        ``np.isin(worldSlice.blockIndexArray, [i for i, block in enumerate(worldSlice.blockPalette) if block.id == "minecraft:water"])``.\n
+        The array is built on first access, which takes some time and 2 bytes of memory per block.
+        After that, it is kept up to date with blocks set through :meth:`.setBlockGlobal` and
+        related methods.\n
+        Should not be modified directly."""
+        if self._blockIndexArray is None:
+            self._buildBlockIndexArray()
+        return self._blockIndexArray
+
+    @property
+    def blockPalette(self) -> List[Block]:
+        """The palette of :attr:`.blockIndexArray`: the distinct blocks of this WorldSlice,
+        merged from the palettes of all its chunk sections.\n
+        Block ids are namespaced, and the blocks have no NBT data.
+        Accessing this builds :attr:`.blockIndexArray` if it has not been built yet.\n
+        Should not be modified directly."""
+        if self._blockIndexArray is None:
+            self._buildBlockIndexArray()
+        return self._blockPalette
+
+
+    def _blockPaletteIndex(self, block: Block) -> int:
+        """Returns the index of ``block`` in :attr:`.blockPalette`, adding it if needed."""
+        blockId = block.id if ":" in block.id else f"minecraft:{block.id}"
+        key = (blockId, tuple(sorted(block.states.items())))
+        index = self._blockPaletteIndices.get(key)
+        if index is None:
+            index = self._blockPaletteIndices[key] = len(self._blockPalette)
+            self._blockPalette.append(Block(blockId, dict(key[1])))
+        return index
+
+    def _buildBlockIndexArray(self) -> None:
+        """Builds :attr:`.blockIndexArray` and :attr:`.blockPalette` from the chunk sections and
+        the overlay."""
+        volume = np.empty((self._rect.size.x, self._ySize, self._rect.size.y), dtype=np.uint16)
+        sectionPositions = self._sectionTags.keys() | self._sections.keys()
+        if len(sectionPositions) < self._chunkRect.size.x * self._chunkRect.size.y * (self._ySize // 16):
+            volume[...] = self._blockPaletteIndex(Block("minecraft:void_air"))
+
+        inChunkRectOffset = trueMod2D(self._rect.offset, 16)
+        for sectionPos in sectionPositions:
+            section = self._getChunkSection(sectionPos)
+            paletteMap = np.array([self._blockPaletteIndex(Block.fromBlockStateTag(tag)) for tag in section.blockPalette], dtype=np.uint16)
+            # The part of this section that lies in the rect, in section-local and in rect
+            # coordinates. Only that part is copied, straight into its place in the volume.
+            x, y, z = sectionPos.x * 16 - inChunkRectOffset.x, sectionPos.y * 16 - self._yBegin, sectionPos.z * 16 - inChunkRectOffset.y
+            xBegin, zBegin = max(0, -x), max(0, -z)
+            xEnd,   zEnd   = min(16, self._rect.size.x - x), min(16, self._rect.size.y - z)
+            # Section data is in YZX order
+            blockStates = section.blockStates.reshape(16, 16, 16)[:, zBegin:zEnd, xBegin:xEnd]
+            volume[x+xBegin:x+xEnd, y:y+16, z+zBegin:z+zEnd] = paletteMap[blockStates].transpose(2, 0, 1)
+        self._blockIndexArray = volume
+
+        offset = self.box.offset
+        for position, block in self._overlay.items():
+            self._blockIndexArray[tuple(position - offset)] = self._blockPaletteIndex(block)
+
 
     def getChunkSectionPositionGlobal(self, blockPosition: Vec3iLike) -> ivec3:
         """Returns the local position of the chunk section that contains the global ``blockPosition``."""
@@ -237,12 +616,30 @@ class WorldSlice:
 
     def _getChunkSectionGlobal(self, blockPosition: Vec3iLike) -> Optional[_ChunkSection]:
         """Returns the chunk section that contains the global ``blockPosition``."""
-        return self._sections.get(self.getChunkSectionPositionGlobal(blockPosition))
+        return self._getChunkSection(self.getChunkSectionPositionGlobal(blockPosition))
+
+    def _getChunkSection(self, sectionPos: ivec3) -> Optional[_ChunkSection]:
+        """Returns the chunk section at local section position ``sectionPos``, decoding it if
+        needed."""
+        section = self._sections.get(sectionPos)
+        if section is None:
+            sectionTag = self._sectionTags.get(sectionPos)
+            if sectionTag is None:
+                return None
+            section = self._sections[sectionPos] = _decodeChunkSection(sectionTag)
+        return section
+
+    def _getBlockEntityTagGlobal(self, position: ivec3) -> Optional[TAG_Compound]:
+        """Returns the block entity tag at global ``position``, or None if there is none."""
+        if self._blockEntities is None:
+            self._blockEntities = self._decodeBlockEntities()
+        return self._blockEntities.get(position)
 
 
     def getBlockStateTagGlobal(self, position: Vec3iLike) -> Optional[TAG_Compound]:
         """Returns the block state compound tag at global ``position``.\n
-        If ``position`` is not contained in this WorldSlice, returns None."""
+        If ``position`` is not contained in this WorldSlice, returns None.\n
+        This reflects the loaded chunk data only, not blocks set with :meth:`.setBlockGlobal`."""
         chunkSection = self._getChunkSectionGlobal(position)
         if chunkSection is None:
             return None
@@ -255,17 +652,22 @@ class WorldSlice:
 
     def getBlockStateTag(self, position: Vec3iLike) -> Optional[TAG_Compound]:
         """Returns the block state compound tag at local ``position``.\n
-        If ``position`` is not contained in this WorldSlice, returns None."""
+        If ``position`` is not contained in this WorldSlice, returns None.\n
+        This reflects the loaded chunk data only, not blocks set with :meth:`.setBlock`."""
         return self.getBlockStateTagGlobal(ivec3(*position) + addY(self._rect.offset))
 
 
     def getBlockGlobal(self, position: Vec3iLike) -> Block:
         """Returns the block at global ``position``.\n
         If ``position`` is not contained in this WorldSlice, returns Block("minecraft:void_air")."""
+        if self._overlay:
+            block = self._overlay.get(ivec3(*position))
+            if block is not None:
+                return Block(block.id, dict(block.states), block.data)
         blockStateTag = self.getBlockStateTagGlobal(position)
         if blockStateTag is None:
             return Block("minecraft:void_air")
-        blockEntityTag = self._blockEntities.get(ivec3(*position))
+        blockEntityTag = self._getBlockEntityTagGlobal(ivec3(*position))
         return Block.fromBlockStateTag(blockStateTag, blockEntityTag)
 
     def getBlock(self, position: Vec3iLike) -> Block:
@@ -274,6 +676,37 @@ class WorldSlice:
         return self.getBlockGlobal(ivec3(*position) + addY(self._rect.offset))
 
 
+    def setBlockGlobal(self, position: Vec3iLike, block: Block) -> None:
+        """Sets the block at global ``position`` in this WorldSlice, so that :meth:`.getBlockGlobal`
+        returns it from now on.\n
+        This does not change the Minecraft world, and it does not update :attr:`.heightmaps`,
+        :attr:`.nbt` or the block state tags. If ``position`` is not contained in this
+        WorldSlice, nothing happens."""
+        position = ivec3(*position)
+        if self.box.contains(position):
+            self._overlay[position] = block
+            if self._blockIndexArray is not None:
+                self._blockIndexArray[tuple(position - self.box.offset)] = self._blockPaletteIndex(block)
+
+    def setBlock(self, position: Vec3iLike, block: Block) -> None:
+        """Sets the block at local ``position`` in this WorldSlice, so that :meth:`.getBlock`
+        returns it from now on.\n
+        See :meth:`.setBlockGlobal` for details."""
+        self.setBlockGlobal(ivec3(*position) + addY(self._rect.offset), block)
+
+    def setBlocksGlobal(self, blocks: Iterable[Tuple[ivec3, Block]]) -> None:
+        """Sets multiple blocks, given as (position, block)-tuples with global positions.\n
+        Unlike :meth:`.setBlockGlobal`, all positions must be contained in this WorldSlice.
+        See :meth:`.setBlockGlobal` for details."""
+        if self._blockIndexArray is None:
+            self._overlay.update(blocks)
+            return
+        offset = self.box.offset
+        for position, block in blocks:
+            self._overlay[position] = block
+            self._blockIndexArray[tuple(position - offset)] = self._blockPaletteIndex(block)
+
+
     def getBiomeGlobal(self, position: Vec3iLike) -> str:
         """Returns the namespaced id of the biome at global ``position``.\n
         If ``position`` is not contained in this WorldSlice, returns an empty string.\n
@@ -309,10 +742,10 @@ class WorldSlice:
         if chunkSection is None:
             return None
         biomeCounts: Dict[str, int] = dict()
-        for biomePos in loop3D(ivec3(4,4,4)):
-            biomeIndex = (biomePos.y << 4) | (biomePos.z << 2) | biomePos.x
-            biome = str(chunkSection.getBiomeAtIndex(biomeIndex).value)
-            biomeCounts[biome] = biomeCounts.get(biome, 0) + 1
+        for paletteIndex, count in enumerate(np.bincount(chunkSection.biomes).tolist()):
+            if count > 0:
+                biome = str(chunkSection.biomesPalette[paletteIndex].value)
+                biomeCounts[biome] = biomeCounts.get(biome, 0) + count
         return biomeCounts
 
     def getBiomeCountsInChunk(self, position: Vec3iLike) -> Optional[Dict[str, int]]:
@@ -0,0 +1,13 @@
+"""Shared fixtures for the GDPC test suite.\n
+The tests run against :class:`.StandInServer`, so they do not need a running Minecraft instance."""
+
+import pytest
+
+from gdpc.stand_in_server import StandInServer
+
+
+@pytest.fixture
+def server():
+    """A running stand-in GDMC HTTP server with a fresh world."""
+    with StandInServer() as standIn:
+        yield standIn
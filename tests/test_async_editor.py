@@ -0,0 +1,77 @@
+"""Tests for :class:`.AsyncEditor`."""
+
+import asyncio
+
+from glm import ivec3
+import pytest
+
+from gdpc import Block
+from gdpc.vector_tools import Rect
+from gdpc.async_editor import AsyncEditor
+from gdpc.stand_in_server import StandInServer
+
+
+def test_replaceUsesBulkReads(server):
+    async def run():
+        async with AsyncEditor(host=server.host) as editor:
+            await editor.placeBlock([(x, 64, z) for x in range(8) for z in range(8)], Block("minecraft:glass"))
+            await editor.awaitBufferFlushes()
+            requestCount = server.requestCount
+            await editor.placeBlock([(x, y, z) for x in range(16) for y in range(63, 66) for z in range(16)], Block("minecraft:stone"), replace="minecraft:glass")
+            assert server.requestCount - requestCount == 1
+
+    asyncio.run(run())
+    assert server.world.getBlock(3, 64, 3)[0] == "minecraft:stone"
+    assert server.world.getBlock(3, 63, 3)[0] != "minecraft:stone"
+    assert server.world.getBlock(12, 64, 12)[0] == "minecraft:air"
+
+
+def test_onlyConfirmedBlocksWrittenToWorldSlice(server, monkeypatch):
+    setBlock = server.world.setBlock
+    def rejectingSetBlock(x, y, z, key, data=None):
+        if (x, y, z) == (2, 70, 2):
+            raise ValueError("Rejected")
+        return setBlock(x, y, z, key, data)
+    monkeypatch.setattr(server.world, "setBlock", rejectingSetBlock)
+
+    async def run():
+        async with AsyncEditor(host=server.host) as editor:
+            worldSlice = await editor.loadWorldSlice(Rect((0, 0), (16, 16)), cache=True)
+            await editor.placeBlock([(1, 70, 1), (2, 70, 2)], Block("minecraft:stone"))
+            assert not worldSlice.overlay
+            assert (await editor.getBlock((2, 70, 2))).id == "minecraft:stone"
+            await editor.flushBuffer()
+            await editor.awaitBufferFlushes()
+            assert worldSlice.overlay.keys() == {ivec3(1, 70, 1)}
+
+    asyncio.run(run())
+
+
+def test_flushesWaitingForRequestSlotKeepOrder():
+    with StandInServer(latency=0.1) as server:
+        async def run():
+            async with AsyncEditor(host=server.host, maxConcurrentRequests=1) as editor:
+                await editor.placeBlock((0, 70, 0), Block("minecraft:dirt"))
+                await editor.flushBuffer() # Occupies the only request slot
+
+                async def write(position, block):
+                    await editor.placeBlock(position, block)
+                    await editor.flushBuffer()
+
+                first     = asyncio.ensure_future(write((1, 70, 0), Block("minecraft:stone")))
+                second    = asyncio.ensure_future(write((1, 70, 0), Block("minecraft:glass")))
+                cancelled = asyncio.ensure_future(write((2, 70, 0), Block("minecraft:sand")))
+                await asyncio.sleep(0.01)
+                # Read from the waiting flushes, without waiting for a request slot
+                assert (await editor.getBlock((1, 70, 0))).id == "minecraft:glass"
+                assert not first.done() and not second.done()
+
+                cancelled.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await cancelled
+                assert (await editor.getBlock((2, 70, 0))).id == "minecraft:sand"
+                await asyncio.gather(first, second)
+
+        asyncio.run(run())
+        assert server.world.getBlock(1, 70, 0)[0] == "minecraft:glass"
+        assert server.world.getBlock(2, 70, 0)[0] == "minecraft:sand"
@@ -0,0 +1,45 @@
+"""Tests for :class:`.BlockCache`."""
+
+from glm import ivec3
+
+from gdpc import Block
+from gdpc.block_cache import BlockCache, ENTRY_BYTES
+
+
+def test_recentlyUsedBlocksGetSecondChance():
+    cache = BlockCache(maxSize=4)
+    for x in range(4):
+        cache[ivec3(x, 0, 0)] = Block("minecraft:stone")
+    assert cache.get(ivec3(0, 0, 0)) is not None
+
+    cache[ivec3(4, 0, 0)] = Block("minecraft:stone")
+    assert ivec3(0, 0, 0) in cache
+    assert ivec3(1, 0, 0) not in cache
+    assert len(cache) == 4
+    assert cache.stats == {"hits": 1, "misses": 0, "evictions": 1, "size": 4, "bytes": 4 * ENTRY_BYTES}
+
+
+def test_byteLimitCountsBlockData():
+    data = "{Items:[]}" * 10
+    cache = BlockCache(maxSize=0, maxBytes=3 * (ENTRY_BYTES + len(data)))
+    for x in range(4):
+        cache[ivec3(x, 0, 0)] = Block("minecraft:chest", data=data)
+    assert len(cache) < 4
+    assert cache.bytes <= cache.maxBytes
+
+    cache.get(ivec3(-1, 0, 0))
+    assert cache.stats["misses"] == 1
+
+
+def test_sectionGranularityEvictsWholeSections():
+    cache = BlockCache(maxSize=8, sectionGranularity=True)
+    for x in range(4):
+        cache[ivec3(x, 0, 0)] = Block("minecraft:stone")
+    for x in range(4):
+        cache[ivec3(x, 16, 0)] = Block("minecraft:stone")
+    cache.get(ivec3(0, 16, 0))
+
+    cache[ivec3(0, 32, 0)] = Block("minecraft:stone")
+    assert all(ivec3(x, 0, 0) not in cache for x in range(4))
+    assert all(ivec3(x, 16, 0) in cache for x in range(4))
+    assert cache.stats["evictions"] == 4
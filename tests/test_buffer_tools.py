@@ -0,0 +1,37 @@
+"""Tests for :mod:`.buffer_tools`."""
+
+from glm import ivec3
+
+from gdpc import Block
+from gdpc.buffer_tools import coalesceBoxes, groupAnchors
+from gdpc.vector_tools import Box
+
+
+def test_coalesceBoxes():
+    stone = Block("minecraft:stone")
+    blocks = [(ivec3(x, y, z), stone) for x in range(4) for y in range(2) for z in range(3)]
+    blocks += [(ivec3(9, 0, 0), stone), (ivec3(0, 5, 0), Block("minecraft:glass"))]
+
+    boxes, remainingBlocks = coalesceBoxes(blocks, minVolume=8)
+    assert boxes == [(Box((0, 0, 0), (4, 2, 3)), stone)]
+    assert sorted(tuple(position) for position, _ in remainingBlocks) == [(0, 5, 0), (9, 0, 0)]
+
+
+def test_coalesceBoxesRespectsFillLimit():
+    stone = Block("minecraft:stone")
+    blocks = [(ivec3(x, 0, z), stone) for x in range(4) for z in range(4)]
+
+    boxes, remainingBlocks = coalesceBoxes(blocks, minVolume=1, fillLimit=6)
+    assert not remainingBlocks
+    assert all(box.volume <= 6 for box, _ in boxes)
+    assert sum(box.volume for box, _ in boxes) == 16
+
+
+def test_groupAnchors():
+    stone = Block("minecraft:stone")
+    box = [(ivec3(x, 0, 0), stone) for x in range(4)]
+    blocks = box[:2] + [(ivec3(9, 0, 0), stone)] + box[2:] + [(ivec3(4, 0, 0), stone)]
+    assert groupAnchors(blocks, [[position for position, _ in box]]) == [4]
+
+    blocks = box[:2] + [(ivec3(4, 0, 0), stone)] + box[2:]
+    assert groupAnchors(blocks, [[position for position, _ in box]]) == [None]
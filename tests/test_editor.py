@@ -0,0 +1,291 @@
+"""Tests for :class:`.Editor`."""
+
+import threading
+
+import numpy as np
+import pytest
+from glm import ivec3
+
+from gdpc import Editor, Block, Transform, interface
+from gdpc.exceptions import InterfaceInternalError
+from gdpc.vector_tools import Box, Rect
+from gdpc.stand_in_server import StandInServer
+
+
+def test_skipUnchangedLastWriteWins(server):
+    editor = Editor(host=server.host, skipUnchanged=True, caching=True)
+    editor.placeBlock((1, 70, 1), Block("minecraft:glass"))
+    editor.flushBuffer()
+
+    editor.placeBlockArray(np.array([[1, 70, 1], [1, 70, 1]]), [Block("minecraft:stone"), Block("minecraft:glass")], np.array([0, 1]))
+    editor.flushBuffer()
+
+    assert server.world.getBlock(1, 70, 1)[0] == "minecraft:glass"
+
+
+def test_skipUnchangedSkipsKnownBlocks(server):
+    editor = Editor(host=server.host, skipUnchanged=True, caching=True)
+    positions = np.array([[x, 70, z] for x in range(4) for z in range(4)])
+    editor.placeBlockArray(positions, Block("minecraft:stone"))
+    editor.flushBuffer()
+
+    editor.placeBlockArray(positions, Block("minecraft:stone"))
+    editor.flushBuffer()
+
+    assert editor.skippedWrites == len(positions)
+    assert server.world.getBlock(2, 70, 2)[0] == "minecraft:stone"
+
+
+def test_adaptiveBufferLimitAdjustedOnCallingThread(server, monkeypatch):
+    editor = Editor(host=server.host, buffering=True, bufferLimit=64, multithreading=True, adaptiveBufferLimit=True)
+    threads = []
+    recordFlush = editor._recordFlush
+    def recordingRecordFlush(blockCount, seconds):
+        threads.append(threading.current_thread())
+        recordFlush(blockCount, seconds)
+    monkeypatch.setattr(editor, "_recordFlush", recordingRecordFlush)
+
+    for x in range(256):
+        editor.placeBlock((x, 70, 0), Block("minecraft:stone"))
+    editor.flushBuffer()
+    editor.awaitBufferFlushes()
+
+    assert threads
+    assert all(thread is threading.main_thread() for thread in threads)
+    assert editor.flushThroughput is not None
+
+
+def test_placedBlocksReadFromWorldSlice(server):
+    editor = Editor(host=server.host, buffering=True)
+    editor.loadWorldSlice(Rect((0, 0), (16, 16)), cache=True)
+    editor.placeBlock((1, 70, 1), Block("minecraft:stone"))
+    assert not editor.worldSlice.overlay
+    editor.flushBuffer()
+
+    requestCount = server.requestCount
+    assert editor.getBlock((1, 70, 1)).id == "minecraft:stone"
+    assert server.requestCount == requestCount
+    assert editor.worldSliceDecay[1, 70 - editor.worldSlice.box.offset.y, 1]
+    assert editor.worldSliceDecay.sum() == 1
+
+
+def test_pendingFlushesReadBeforeWorldSlice():
+    with StandInServer(latency=0.3) as server:
+        editor = Editor(host=server.host, buffering=True, multithreading=True)
+        editor.loadWorldSlice(Rect((0, 0), (16, 16)), cache=True)
+        editor.placeBlock((1, 70, 1), Block("minecraft:stone"))
+        editor.flushBuffer()
+
+        assert ivec3(1, 70, 1) not in editor.worldSlice.overlay
+        assert editor.getBlock((1, 70, 1)).id == "minecraft:stone"
+        editor.awaitBufferFlushes()
+        assert editor.worldSlice.overlay[ivec3(1, 70, 1)].id == "minecraft:stone"
+
+
+def test_rejectedBlocksNotWrittenToWorldSlice(server, monkeypatch):
+    setBlock = server.world.setBlock
+    def rejectingSetBlock(x, y, z, key, data=None):
+        if (x, y, z) == (2, 70, 2):
+            raise ValueError("Rejected")
+        return setBlock(x, y, z, key, data)
+    monkeypatch.setattr(server.world, "setBlock", rejectingSetBlock)
+
+    editor = Editor(host=server.host, buffering=True, multithreading=True)
+    editor.loadWorldSlice(Rect((0, 0), (16, 16)), cache=True)
+    editor.placeBlock([(1, 70, 1), (2, 70, 2)], Block("minecraft:stone"))
+    editor.flushBuffer()
+    editor.awaitBufferFlushes()
+
+    assert editor.worldSlice.overlay.keys() == {ivec3(1, 70, 1)}
+    assert editor.getBlock((2, 70, 2)).id == server.world.getBlock(2, 70, 2)[0]
+
+
+def test_readOnlyLookupsShareCachedBlocks(server):
+    editor = Editor(host=server.host, caching=True)
+    editor.placeBlock((1, 70, 1), Block("minecraft:chest", {"facing": "north"}, "{Items:[]}"))
+
+    block = editor.getBlockGlobal((1, 70, 1), readOnly=True)
+    assert editor.getBlockGlobal((1, 70, 1), readOnly=True) is block
+    copied = editor.getBlockGlobal((1, 70, 1))
+    assert copied is not block
+    copied.states["facing"] = "south"
+    assert editor.getBlockGlobal((1, 70, 1)).states["facing"] == "north"
+
+
+def test_failingBatchesResubmittedInHalves(server, monkeypatch):
+    placeBlocks = interface.placeBlocks
+    batchSizes = []
+    def failingPlaceBlocks(blocks, *args, **kwargs):
+        batchSizes.append(len(blocks))
+        if any(tuple(position) == (3, 70, 0) for position, _ in blocks):
+            raise InterfaceInternalError("Injected error")
+        return placeBlocks(blocks, *args, **kwargs)
+    monkeypatch.setattr(interface, "placeBlocks", failingPlaceBlocks)
+
+    editor = Editor(host=server.host, buffering=True)
+    editor.placeBlock([(x, 70, 0) for x in range(16)], Block("minecraft:stone"))
+    editor.flushBuffer()
+
+    assert sorted(batchSizes) == [1, 1, 2, 2, 4, 4, 8, 8, 16]
+    assert [server.world.getBlock(x, 70, 0)[0] == "minecraft:stone" for x in range(16)] == [x != 3 for x in range(16)]
+
+
+def _recordRequests(monkeypatch):
+    """Records the names of the :mod:`.interface` functions that place blocks, in call order."""
+    calls = []
+    for name in ("placeBlocks", "placeStructure", "runCommand"):
+        def record(*args, _name=name, _function=getattr(interface, name), **kwargs):
+            calls.append(_name)
+            return _function(*args, **kwargs)
+        monkeypatch.setattr(interface, name, record)
+    return calls
+
+
+def test_structureFlushingPlacesDenseRegions(server, monkeypatch):
+    calls = _recordRequests(monkeypatch)
+    editor = Editor(host=server.host, buffering=True, structureFlushing=True)
+    stairs = Block("minecraft:oak_stairs", {"facing": "east"})
+    for x in range(8):
+        for y in range(70, 78):
+            for z in range(8):
+                editor.placeBlock((x, y, z), stairs if (x + y + z) % 3 == 0 else Block("minecraft:stone"))
+    editor.flushBuffer()
+
+    assert calls == ["placeStructure"]
+    assert server.world.getBlock(3, 72, 3) == ("minecraft:oak_stairs[facing=east]", None)
+    assert server.world.getBlock(3, 71, 3)[0] == "minecraft:stone"
+
+
+def test_structureFlushingKeepsBufferOrder(server, monkeypatch):
+    calls = _recordRequests(monkeypatch)
+    editor = Editor(host=server.host, buffering=True, structureFlushing=True)
+    cube = [(x, y, z) for x in range(8) for y in range(64, 72) for z in range(8)]
+
+    editor.placeBlock((0, 63, 0), Block("minecraft:glass"))
+    editor.placeBlock(cube, Block("minecraft:sand"))
+    editor.placeBlock((20, 70, 0), Block("minecraft:glass"))
+    editor.flushBuffer()
+    assert calls == ["placeBlocks", "placeStructure", "placeBlocks"]
+
+    # A block buffered in the middle of a dense region, next to it, keeps the region from being
+    # placed at once.
+    calls.clear()
+    editor.placeBlock(cube[:256], Block("minecraft:sand"))
+    editor.placeBlock((8, 66, 0), Block("minecraft:chest", data="{Items:[]}"))
+    editor.placeBlock(cube[256:], Block("minecraft:sand"))
+    editor.flushBuffer()
+    assert calls == ["placeBlocks"]
+    assert server.world.getBlock(7, 71, 7)[0] == "minecraft:sand"
+
+
+def test_fillCoalescing(server):
+    editor = Editor(host=server.host, buffering=True, fillThreshold=8)
+    editor.placeBlock([(x, y, z) for x in range(4) for y in range(70, 74) for z in range(4)], Block("minecraft:stone"))
+    editor.placeBlock((9, 70, 9), Block("minecraft:glass"))
+    editor.flushBuffer()
+
+    assert editor.metrics.requestCount(endpoint="/command") == 1
+    assert editor.metrics.requestCount(endpoint="/blocks") == 1
+    assert server.world.getBlock(3, 73, 3)[0] == "minecraft:stone"
+    assert server.world.getBlock(9, 70, 9)[0] == "minecraft:glass"
+
+
+def test_fillCoalescingKeepsBufferOrder(server, monkeypatch):
+    calls = _recordRequests(monkeypatch)
+    editor = Editor(host=server.host, buffering=True, fillThreshold=8)
+
+    editor.placeBlock((0, 69, 0), Block("minecraft:glass"))
+    editor.placeBlock([(x, y, z) for x in range(4) for y in range(70, 74) for z in range(4)], Block("minecraft:sand"))
+    editor.placeBlock((9, 70, 9), Block("minecraft:glass"))
+    editor.flushBuffer()
+    assert calls == ["placeBlocks", "runCommand", "placeBlocks"]
+
+    # A block buffered in the middle of a box, next to it, keeps the box from being filled.
+    calls.clear()
+    editor.placeBlock([(x, y, z) for x in range(4) for y in range(80, 82) for z in range(4)], Block("minecraft:sand"))
+    editor.placeBlock((4, 81, 0), Block("minecraft:torch"))
+    editor.placeBlock([(x, y, z) for x in range(4) for y in range(82, 84) for z in range(4)], Block("minecraft:sand"))
+    editor.flushBuffer()
+    assert calls == ["placeBlocks"]
+    assert server.world.getBlock(3, 83, 3)[0] == "minecraft:sand"
+
+
+def test_pendingFlushesBounded():
+    with StandInServer(latency=0.05) as server:
+        editor = Editor(host=server.host, buffering=True, bufferLimit=4, multithreading=True, maxPendingFlushes=2)
+        for x in range(32):
+            editor.placeBlock((x, 70, 0), Block("minecraft:stone"))
+            assert len(editor._pendingFlushes) <= 2 # pylint: disable=protected-access
+        editor.flushBuffer()
+        editor.awaitBufferFlushes()
+        assert all(server.world.getBlock(x, 70, 0)[0] == "minecraft:stone" for x in range(32))
+
+
+def test_flushErrorsRaisedOnCallingThread():
+    with StandInServer(errorRate=1.0) as server:
+        editor = Editor(host=server.host, buffering=True, multithreading=True, retries=0)
+        editor.placeBlock([(x, 70, 0) for x in range(64)], Block("minecraft:stone"))
+        editor.flushBuffer()
+        with pytest.raises(InterfaceInternalError):
+            editor.awaitBufferFlushes()
+        editor.awaitBufferFlushes() # The error is only raised once
+
+
+def test_placeBlockVolumeMatchesPlaceBlock(server):
+    transform = Transform((10, 0, 5), rotation=1)
+    palette = [Block("minecraft:stone"), Block("minecraft:oak_stairs", {"facing": "east"})]
+    box = Box((0, 70, 0), (4, 2, 3))
+    indices = np.arange(box.volume).reshape(tuple(box.size)) % 3 - 1 # -1 places nothing
+
+    editor = Editor(host=server.host, transformLike=transform)
+    editor.placeBlockVolume(box, palette, indices)
+
+    with StandInServer() as expectedServer:
+        expectedEditor = Editor(host=expectedServer.host, transformLike=transform)
+        for x in range(box.size.x):
+            for y in range(box.size.y):
+                for z in range(box.size.z):
+                    if indices[x, y, z] >= 0:
+                        expectedEditor.placeBlock(box.offset + ivec3(x, y, z), palette[indices[x, y, z]])
+        placed = 0
+        for x in range(16):
+            for y in range(70, 72):
+                for z in range(16):
+                    assert server.world.getBlock(x, y, z) == expectedServer.world.getBlock(x, y, z)
+                    placed += server.world.getBlock(x, y, z)[0] != "minecraft:air"
+        assert placed == np.count_nonzero(indices >= 0)
+
+
+def test_replaceFilteredInBulk(server):
+    editor = Editor(host=server.host)
+    glassPositions = [(x, 70, z) for x in range(8) for z in range(8) if (x + z) % 2 == 0]
+    editor.placeBlock(glassPositions, Block("minecraft:glass"))
+
+    readCount = editor.metrics.requestCount(method="GET", endpoint="/blocks")
+    editor.placeBlock([(x, 70, z) for x in range(8) for z in range(8)], Block("minecraft:stone"), replace="minecraft:glass")
+    assert editor.metrics.requestCount(method="GET", endpoint="/blocks") - readCount == 1
+
+    for x in range(8):
+        for z in range(8):
+            expected = "minecraft:stone" if (x + z) % 2 == 0 else "minecraft:air"
+            assert server.world.getBlock(x, 70, z)[0] == expected
+
+
+def test_getBlockArrayMatchesGetBlock(server):
+    editor = Editor(host=server.host, transformLike=Transform((3, 0, 3), rotation=2))
+    editor.placeBlock([(x, 70 + x % 2, z) for x in range(5) for z in range(3)], Block("minecraft:oak_stairs", {"facing": "north"}))
+    editor.placeBlock((1, 70, 1), Block("minecraft:chest", {"facing": "south"}, "{Items:[]}"))
+    box = Box((-1, 69, -1), (7, 3, 5))
+
+    readCount = editor.metrics.requestCount(method="GET", endpoint="/blocks")
+    palette, indices = editor.getBlockArray(box, states=True, data=True)
+    assert editor.metrics.requestCount(method="GET", endpoint="/blocks") - readCount == 1
+    assert indices.shape == tuple(box.size)
+    for x in range(box.size.x):
+        for y in range(box.size.y):
+            for z in range(box.size.z):
+                assert palette[indices[x, y, z]] == editor.getBlock(box.offset + ivec3(x, y, z))
+
+    palette, indices = editor.getBlockArray(box)
+    assert {palette[i].id for i in np.unique(indices)} == {"minecraft:air", "minecraft:oak_stairs", "minecraft:chest"}
+    assert all(not block.states and block.data is None for block in palette)
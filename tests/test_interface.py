@@ -0,0 +1,122 @@
+"""Tests for :mod:`.interface`."""
+
+import gzip
+import logging
+import time
+
+import pytest
+
+from gdpc import interface, Block
+from gdpc.exceptions import InterfaceInternalError, InterfaceTimeoutError
+from gdpc.stand_in_server import StandInServer
+
+
+def test_timeoutsRetriedForIdempotentRequests(server):
+    server.latency = 0.3
+    with pytest.raises(InterfaceTimeoutError):
+        interface.getVersion(retries=1, timeout=0.05, host=server.host)
+    assert server.requestCount == 2
+
+
+def test_timeoutsNotRetriedForCommands(server):
+    server.latency = 0.3
+    with pytest.raises(InterfaceTimeoutError):
+        interface.runCommand("setblock 0 70 0 minecraft:stone", retries=2, timeout=0.05, host=server.host)
+    assert server.requestCount == 1
+
+
+def test_serverErrorsNotRetriedForCommands():
+    with StandInServer(errorRate=1.0) as server:
+        with pytest.raises(InterfaceInternalError):
+            interface.runCommand("setblock 0 70 0 minecraft:stone", retries=2, host=server.host)
+        assert server.requestCount == 1
+
+
+def test_sessionPoolSharesSessionsPerHost():
+    pool = interface.SessionPool()
+    session = pool.get("http://127.0.0.1:9000")
+    assert pool.get("http://127.0.0.1:9000") is session
+    assert pool.get("http://127.0.0.1:1") is not session
+    pool.close()
+    assert pool.get("http://127.0.0.1:9000") is not session
+
+
+def test_sessionPoolReusesConnections(server, caplog):
+    pool = interface.SessionPool()
+    session = pool.get(server.host)
+    with caplog.at_level(logging.DEBUG, logger="urllib3.connectionpool"):
+        for _ in range(5):
+            interface.getVersion(host=server.host, session=session)
+    assert sum("Starting new HTTP connection" in record.getMessage() for record in caplog.records) == 1
+    pool.close()
+
+
+def test_compressBodyThreshold():
+    body = b'{"x":0,"y":0,"z":0,"id":"minecraft:stone"},' * 10
+    assert interface._compressBody(body, None) == (body, {}) # pylint: disable=protected-access
+    assert interface._compressBody(body, len(body) + 1) == (body, {}) # pylint: disable=protected-access
+    data, headers = interface._compressBody(body, len(body)) # pylint: disable=protected-access
+    assert headers == {"Content-Encoding": "gzip"}
+    assert gzip.decompress(data) == body
+
+
+def test_compressedBodies(server):
+    stats = interface.compressionStats
+    requestBytes, responseBytes = stats.requestBytesSent, stats.responseBytesReceived
+
+    blocks = [((x, 70, z), Block("minecraft:stone")) for x in range(16) for z in range(16)]
+    interface.placeBlocks(blocks, compressionThreshold=0, host=server.host)
+    assert stats.requestBytesSent > requestBytes
+    assert server.world.getBlock(15, 70, 15)[0] == "minecraft:stone"
+
+    result = interface.getBlocks((0, 70, 0), (16, 1, 16), compressResponse=True, host=server.host)
+    assert stats.responseBytesReceived > responseBytes
+    assert {block.id for _, block in result} == {"minecraft:stone"}
+
+
+def test_toColumns():
+    text = ' [{"x":0,"y":1,"z":2,"id":"a"}, {"x":3,"y":4,"z":5,"id":"b"} ,{"x":6,"y":7,"z":8,"id":"a"}]'
+    entries = ((entry["x"], entry["y"], entry["z"], entry["id"]) for entry in interface._iterJsonArray(text)) # pylint: disable=protected-access
+    positions, palette, indices = interface._toColumns(entries) # pylint: disable=protected-access
+    assert positions.tolist() == [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
+    assert palette == ["a", "b"]
+    assert indices.tolist() == [0, 1, 0]
+    assert indices.dtype.name == "uint16"
+    assert not list(interface._iterJsonArray(" [ ] ")) # pylint: disable=protected-access
+
+
+def test_columnarReadsMatchGetBlocks(server):
+    interface.placeBlocks([((x, 64 + x % 3, 2), Block("minecraft:oak_stairs", {"facing": "east"})) for x in range(6)], host=server.host)
+    interface.placeBlocks([((1, 66, 1), Block("minecraft:chest", {"facing": "north"}, "{Items:[]}"))], host=server.host)
+
+    expected = interface.getBlocks((0, 63, 0), (6, 5, 4), host=server.host)
+    positions, palette, indices = interface.getBlocksAsArrays((0, 63, 0), (6, 5, 4), host=server.host)
+    assert positions.shape == (len(expected), 3)
+    assert [(tuple(position), palette[index]) for position, index in zip(positions.tolist(), indices.tolist())] == \
+           [(tuple(position), block) for position, block in expected]
+
+    expectedBiomes = interface.getBiomes((0, 63, 0), (4, 2, 4), host=server.host)
+    positions, biomePalette, indices = interface.getBiomesAsArrays((0, 63, 0), (4, 2, 4), host=server.host)
+    assert [(tuple(position), biomePalette[index]) for position, index in zip(positions.tolist(), indices.tolist())] == \
+           [(tuple(position), biome) for position, biome in expectedBiomes]
+
+
+def test_deadlineStopsRetries(server):
+    server.errorRate = 1.0
+    startTime = time.monotonic()
+    with pytest.raises(InterfaceInternalError):
+        interface.getVersion(retries=100, deadline=1.0, host=server.host)
+    assert time.monotonic() - startTime < 2.0
+
+
+def test_placeBlocksSerialization(server):
+    stairs = Block("minecraft:oak_stairs", {"facing": "east", "half": "top"})
+    chest  = Block("minecraft:chest", {"facing": "north"}, '{CustomName:\'{"text":"Loot"}\'}')
+    blocks = [((x, 70, 0), stairs) for x in range(4)] + [((0, 71, 0), chest), ((1, 71, 0), Block("minecraft:stone"))]
+    result = interface.placeBlocks(blocks, host=server.host)
+
+    assert result == [(True, 1)] * len(blocks)
+    for position, block in blocks:
+        placed = interface.getBlocks(position, host=server.host)[0][1]
+        assert (placed.id, placed.states) == (block.id, block.states)
+    assert "Loot" in interface.getBlocks((0, 71, 0), host=server.host)[0][1].data
@@ -0,0 +1,36 @@
+"""Tests for :mod:`.metrics`."""
+
+import json
+
+from gdpc import interface, Block
+from gdpc.metrics import MetricsRegistry
+
+
+def test_requestsRecorded(server):
+    metrics = MetricsRegistry()
+    interface.placeBlocks([((x, 70, 0), Block("minecraft:stone")) for x in range(10)], host=server.host, metrics=metrics)
+    interface.getVersion(host=server.host, metrics=metrics)
+
+    assert metrics.requestCount() == 2
+    assert metrics.requestCount(method="PUT", endpoint="/blocks", outcome="success") == 1
+    assert metrics.requestSeconds(method="GET", endpoint="/version") > 0
+    assert interface.requestMetrics.requestCount(method="PUT", endpoint="/blocks") >= 1
+
+    blocksPerRequest = metrics.toDict()["blocksPerRequest"]
+    assert [(entry["endpoint"], entry["count"], entry["sum"]) for entry in blocksPerRequest] == [("/blocks", 1, 10)]
+
+
+def test_exports(server, tmp_path):
+    metrics = MetricsRegistry()
+    interface.getVersion(host=server.host, metrics=metrics)
+
+    metrics.writePrometheusTextfile(str(tmp_path / "gdpc.prom"))
+    text = (tmp_path / "gdpc.prom").read_text(encoding="utf-8")
+    assert "# TYPE gdpc_requests_total counter" in text
+    assert 'gdpc_requests_total{method="GET",endpoint="/version",outcome="success"} 1' in text
+    assert 'gdpc_request_duration_seconds_bucket{method="GET",endpoint="/version",le="+Inf"} 1' in text
+
+    metrics.writeJson(str(tmp_path / "gdpc.json"))
+    with open(tmp_path / "gdpc.json", encoding="utf-8") as file:
+        assert json.load(file) == metrics.toDict()
+    assert sorted(tmp_path.iterdir()) == [tmp_path / "gdpc.json", tmp_path / "gdpc.prom"] # No temporary files are left
@@ -0,0 +1,69 @@
+"""Tests for :class:`.StandInServer`."""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from gdpc import interface, Block
+from gdpc.vector_tools import Rect
+from gdpc.world_slice import WorldSlice
+from gdpc.exceptions import InterfaceInternalError
+from gdpc.stand_in_server import StandInServer, FILL_LIMIT
+
+
+def test_chunksRoundTripThroughWorldSlice(server):
+    server.world.setBlock(3, 70, 5, "minecraft:oak_stairs[facing=east]")
+    server.world.setBlock(20, -60, 9, "minecraft:glass")
+    worldSlice = WorldSlice(Rect((0, 0), (32, 16)), host=server.host)
+
+    assert worldSlice.getBlockGlobal((3, 70, 5)) == Block("minecraft:oak_stairs", {"facing": "east"})
+    assert worldSlice.getBlockGlobal((20, -60, 9)).id == "minecraft:glass"
+    assert worldSlice.getBlockGlobal((3, 71, 5)).id == server.world.getBlock(3, 71, 5)[0]
+    assert worldSlice.getBlockGlobal((3, 63, 5)).id == server.world.getBlock(3, 63, 5)[0]
+
+
+def test_fillLimit(server):
+    response = interface.runCommand(f"fill 0 70 0 {FILL_LIMIT} 70 0 minecraft:stone", host=server.host)
+    assert not response[0][0]
+    assert server.world.getBlock(0, 70, 0)[0] == "minecraft:air"
+
+    response = interface.runCommand("fill 0 70 0 3 71 3 minecraft:stone", host=server.host)
+    assert response[0][0]
+    assert server.world.getBlock(3, 71, 3)[0] == "minecraft:stone"
+
+
+def test_executePositioned(server):
+    interface.runCommand("execute positioned 10 70 10 run setblock ~1 ~ ~-1 minecraft:stone", host=server.host)
+    assert server.world.getBlock(11, 70, 9)[0] == "minecraft:stone"
+
+
+def test_structureRoundTrip(server):
+    server.world.setBlock(0, 70, 0, "minecraft:oak_stairs[facing=east]")
+    server.world.setBlock(1, 71, 2, "minecraft:glass")
+    structureData = interface.getStructure((0, 70, 0), (2, 2, 3), host=server.host)
+
+    interface.placeStructure(structureData, (10, 80, 10), host=server.host)
+    for x in range(2):
+        for y in range(2):
+            for z in range(3):
+                assert server.world.getBlock(10 + x, 80 + y, 10 + z)[0] == server.world.getBlock(x, 70 + y, z)[0]
+
+
+def test_injectedErrorsAndLatency():
+    with StandInServer(latency=0.05, errorRate=1.0) as server:
+        startTime = time.perf_counter()
+        with pytest.raises(InterfaceInternalError):
+            interface.getVersion(host=server.host)
+        assert time.perf_counter() - startTime >= 0.05
+        assert server.requestCount == 1
+
+        server.errorRate = 0.0
+        interface.getVersion(host=server.host)
+        assert server.requestCount == 2
+
+
+def test_requestCountWithConcurrentRequests(server):
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: interface.getVersion(host=server.host), range(64)))
+    assert server.requestCount == 64
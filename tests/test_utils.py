@@ -0,0 +1,27 @@
+"""Tests for :mod:`.utils`."""
+
+import pytest
+
+from gdpc.utils import exponentialBackoff, withRetries
+
+
+def test_exponentialBackoff():
+    for attempt in range(8):
+        for _ in range(20):
+            assert 0 <= exponentialBackoff(attempt, base=0.5, maximum=10.0) <= min(10.0, 0.5 * 2**attempt)
+
+
+def test_withRetries():
+    calls = []
+    def flaky():
+        calls.append(None)
+        if len(calls) < 3:
+            raise ValueError("Flaky")
+        return "done"
+
+    retriesLeft = []
+    assert withRetries(flaky, ValueError, retries=4, onRetry=lambda _, retries: retriesLeft.append(retries)) == "done"
+    assert retriesLeft == [4, 3]
+
+    with pytest.raises(ValueError):
+        withRetries(lambda: int("x"), ValueError, retries=1, onRetry=lambda *_: None)
@@ -0,0 +1,121 @@
+"""Tests for :class:`.WorldSlice`."""
+
+import os
+
+import numpy as np
+import pytest
+
+from gdpc import Editor, Block
+from gdpc.vector_tools import Rect
+from gdpc.world_slice import WorldSlice, DECODE_START_METHOD, _splitRect
+from gdpc.exceptions import InterfaceInternalError
+from gdpc.stand_in_server import StandInServer
+
+
+RECT = Rect((-7, 3), (35, 21))
+
+
+@pytest.fixture
+def builtServer(server):
+    """A stand-in server with some blocks and a block entity in :data:`RECT`."""
+    editor = Editor(host=server.host)
+    editor.placeBlock([(x, 64 + (x * z) % 5, z) for x in range(-7, 28) for z in range(3, 24)], [Block("minecraft:stone"), Block("minecraft:oak_planks"), Block("minecraft:water")])
+    editor.placeBlock((3, 70, 5), Block("minecraft:chest", {"facing": "north"}, "{Items:[]}"))
+    editor.flushBuffer()
+    return server
+
+
+def assertSameSlice(expected: WorldSlice, actual: WorldSlice):
+    assert (expected.yBegin, expected.ySize) == (actual.yBegin, actual.ySize)
+    assert list(expected.heightmaps) == list(actual.heightmaps)
+    for hmName, heightmap in expected.heightmaps.items():
+        assert np.array_equal(heightmap, actual.heightmaps[hmName])
+    for x in range(RECT.offset.x, RECT.end.x, 3):
+        for z in range(RECT.offset.y, RECT.end.y, 3):
+            for y in range(60, 75):
+                assert expected.getBlockGlobal((x, y, z)) == actual.getBlockGlobal((x, y, z))
+                assert expected.getBiomeGlobal((x, y, z)) == actual.getBiomeGlobal((x, y, z))
+    assert actual.getBlockGlobal((3, 70, 5)).id == "minecraft:chest"
+
+
+def test_splitRect():
+    assert _splitRect(Rect((3, -2), (5, 1))) == [Rect((3, -2), (2, 1)), Rect((5, -2), (3, 1))]
+    tiles = _splitRect(Rect((0, 0), (4, 4)))
+    assert len(tiles) == 4
+    assert sum(tile.area for tile in tiles) == 16
+
+
+def test_decodedBlocksMatchWorld(builtServer):
+    worldSlice = WorldSlice(RECT, host=builtServer.host)
+    for x in range(RECT.offset.x, RECT.end.x, 3):
+        for z in range(RECT.offset.y, RECT.end.y, 3):
+            for y in range(60, 72):
+                block = worldSlice.getBlockGlobal((x, y, z))
+                assert f"{block.id}{block.stateString()}" == builtServer.world.getBlock(x, y, z)[0]
+
+
+def test_decodedHeightmapsMatchWorld(builtServer):
+    worldSlice = WorldSlice(RECT, host=builtServer.host)
+    for x in range(RECT.offset.x, RECT.end.x):
+        for z in range(RECT.offset.y, RECT.end.y):
+            surface = next(y for y in range(80, worldSlice.yBegin, -1) if builtServer.world.getBlock(x, y, z)[0] != "minecraft:air") + 1
+            assert worldSlice.heightmaps["WORLD_SURFACE"][x - RECT.offset.x, z - RECT.offset.y] == surface
+
+
+def test_tiledDownloadMatchesSingleRequest(builtServer):
+    single = WorldSlice(RECT, host=builtServer.host, tileSize=None)
+    requestCount = builtServer.requestCount
+    tiled = WorldSlice(RECT, host=builtServer.host, tileSize=1)
+    assert builtServer.requestCount - requestCount == len(tiled.nbt["Chunks"])
+    assertSameSlice(single, tiled)
+
+
+def test_lazyMatchesEager(builtServer):
+    eager = WorldSlice(RECT, host=builtServer.host)
+    lazy  = WorldSlice(RECT, host=builtServer.host, lazy=True)
+    assert lazy.lazy
+    assertSameSlice(eager, lazy)
+
+
+def test_lazyDecodesOnAccess(builtServer):
+    worldSlice = WorldSlice(RECT, host=builtServer.host, lazy=True)
+    assert not worldSlice._sections # pylint: disable=protected-access
+    worldSlice.getBlockGlobal((0, 64, 5))
+    assert len(worldSlice._sections) == 1 # pylint: disable=protected-access
+    with pytest.raises(KeyError):
+        worldSlice.heightmaps["NOT_A_HEIGHTMAP"] # pylint: disable=pointless-statement
+
+
+# Forking while download threads run warns (and can deadlock) on Python 3.12+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_decodeWorkersMatchesEager(builtServer):
+    assert DECODE_START_METHOD != "fork"
+    eager   = WorldSlice(RECT, host=builtServer.host)
+    decoded = WorldSlice(RECT, host=builtServer.host, tileSize=1, decodeWorkers=2)
+    assert decoded.decodeWorkers == 2
+    assertSameSlice(eager, decoded)
+    assert len(decoded.nbt["Chunks"]) == len(eager.nbt["Chunks"])
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requires /dev/shm")
+def test_decodeWorkersFreesSharedMemoryOnError():
+    with StandInServer(errorRate=0.3, seed=1) as server:
+        before = set(os.listdir("/dev/shm"))
+        with pytest.raises(InterfaceInternalError):
+            WorldSlice(Rect((0, 0), (256, 256)), host=server.host, tileSize=2, decodeWorkers=2)
+        assert set(os.listdir("/dev/shm")) - before == set()
+
+
+def test_blockIndexArray(builtServer):
+    worldSlice = WorldSlice(RECT, host=builtServer.host)
+    indices = worldSlice.blockIndexArray
+    assert indices.shape == tuple(worldSlice.box.size)
+    for x in range(RECT.size.x):
+        for y in range(60, 72):
+            for z in range(RECT.size.y):
+                expected = worldSlice.getBlock((x, y, z))
+                actual = worldSlice.blockPalette[indices[x, y - worldSlice.yBegin, z]]
+                assert (actual.id, actual.states) == (expected.id, expected.states)
+
+    worldSlice.setBlock((2, 65, 4), Block("minecraft:glass"))
+    assert worldSlice.blockPalette[indices[2, 65 - worldSlice.yBegin, 4]].id == "minecraft:glass"